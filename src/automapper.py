@@ -1,94 +1,122 @@
 import os
-import re
-import xml.etree.cElementTree as ET
-import gzip
 import json
 import time
+import hashlib
+from .matcher import NameIndex
+from .normalizer import core_name
+from .xmltvstream import open_source, read_channels
+from .servicecatalog import BOUQUETS_PATH, load_catalogue
 
-CACHE_FILE = "/tmp/enigma_services.json"
-CACHE_MAX_AGE = 60
+# Trwały cache mapowania: wynik dopasowania per usługa, ważny dopóki lista kanałów źródła XML
+# (fingerprint) się nie zmieni. Usługi z bukietów: wspólny katalog (servicecatalog, własny cache).
+CACHE_FILE = "/etc/enigma2/iptv_mapping.cache.json"
+CACHE_VERSION = 2
 
-def _load_services_cached(bouquets_path):
-    if os.path.exists(CACHE_FILE): os.remove(CACHE_FILE)
-    services = []
+def mapping_cache_file(index=0, path=None):
+    # path: plik z ustawień ("Plik mapowania"); osobny cache mapowania dla każdego źródła przy imporcie z wielu źródeł
+    path = path or CACHE_FILE
+    if not index: return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{index}{ext or '.json'}"
+
+def feed_fingerprint(channels):
+    # Odcisk listy kanałów XML (id + display-name), niezależny od kolejności
+    h = hashlib.sha1()
+    for xml_id, display in sorted((i or "", d or "") for i, d in channels):
+        h.update(f"{xml_id}\t{display}\n".encode('utf-8', 'ignore'))
+    return h.hexdigest()
+
+def read_xmltv_channels(xml_path):
+    # Czyta tylko nagłówek <channel> (przerywa na pierwszym <programme>)
+    if not os.path.exists(xml_path): return []
     try:
-        files = [f for f in os.listdir(bouquets_path) if f.endswith('.tv') and 'userbouquet' in f]
-        for filename in files:
-            path = os.path.join(bouquets_path, filename)
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    if line.startswith('#SERVICE '):
-                        ref = line.replace('#SERVICE ', '').strip()
-                        parts = line.split(':')
-                        name = parts[-1].strip()
-                        if '4097:' in ref or '5001:' in ref or 'http' in ref.lower():
-                            services.append({'full_ref': ref, 'name': name})
-                    elif line.startswith('#DESCRIPTION') and services:
-                        desc = line.replace('#DESCRIPTION', '').strip()
-                        if "###" not in desc: services[-1]['name'] = desc
-    except: pass
-    return services
+        with open_source(xml_path) as f: return read_channels(f)
+    except: return []
 
 class AutoMapper:
-    def __init__(self, log_callback=None):
-        self.bouquets_path = '/etc/enigma2/'
+    def __init__(self, log_callback=None, cache_file=CACHE_FILE, catalogue=None):
+        self.bouquets_path = BOUQUETS_PATH
+        self.cache_file = cache_file
+        self.catalogue = catalogue
         self.log = log_callback
 
-    # Normalizacja identyczna jak w epgcore
-    def _simplify_name(self, text):
-        if not text: return ""
-        text = text.upper()
-        replacements = {'+': 'PLUS', '&': 'AND', '24': 'TWENTYFOUR', 'Ł': 'L', 'Ś': 'S', 'Ć': 'C', 'Ż': 'Z', 'Ź': 'Z', 'Ą': 'A', 'Ę': 'E', 'Ó': 'O', 'Ń': 'N'}
-        for old, new in replacements.items(): text = text.replace(old, new)
-        trash = ['FULLHD', 'FHD', 'UHD', '4K', 'HEVC', 'H265', 'H.265', 'HD', 'SD', 'PL', 'POL', '(PL)', '[PL]', 'VIP', 'RAW', 'VOD', 'XXX', 'PREMIUM', 'BACKUP', 'TEST', 'SUB', 'DUB', 'LEKTOR', 'OTV', 'V2', 'V3', 'ORG', 'PL:', '|PL|', '[STREAM]', '(TV)', '[YT]', '(YT)', 'TV', 'CHANNEL', 'LIVE', 'POLSKA', 'KANAL', 'POLAND', 'INTERNATIONAL', 'EU', 'EUROPE']
-        for t in trash: text = text.replace(t, '')
-        text = re.sub(r'[^A-Z0-9\s]', '', text) 
-        return text.strip()
+    # Normalizacja wspólna z epgcore (normalizer.core_name, z cache)
+    def _simplify_name(self, text): return core_name(text)
 
     def get_xmltv_channels(self, xml_path):
+        return self._index_channels(read_xmltv_channels(xml_path))
+
+    def _index_channels(self, channels):
+        # channels: lista (xml_id, display-name) z nagłówka XMLTV
         norm_map = {}
-        if not os.path.exists(xml_path): return {}
-        opener = gzip.open if xml_path.endswith('.gz') else open
-        try:
-            with opener(xml_path, 'rb') as f:
-                context = ET.iterparse(f, events=("end",))
-                for event, elem in context:
-                    if elem.tag == 'channel':
-                        xml_id = elem.get('id')
-                        display = ""
-                        for child in elem:
-                            if child.tag == 'display-name': display = child.text; break
-                        if xml_id: norm_map[self._simplify_name(xml_id).replace(' ', '')] = xml_id
-                        if display: norm_map[self._simplify_name(display).replace(' ', '')] = xml_id
-                        elem.clear()
-                    elif elem.tag == 'programme': break
-        except: pass
+        for xml_id, display in channels:
+            if not xml_id: continue
+            norm_map[self._simplify_name(xml_id)] = xml_id
+            if display: norm_map[self._simplify_name(display)] = xml_id
         return norm_map
 
     def generate_mapping(self, xml_path, exclude_refs=None, progress_callback=None):
+        return self.map_channels(read_xmltv_channels(xml_path), exclude_refs=exclude_refs, progress_callback=progress_callback)
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, 'r') as f: data = json.load(f)
+            if data.get('version') == CACHE_VERSION: return data
+        except: pass
+        return {}
+
+    def _save_cache(self, data):
+        try:
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, 'w') as f: json.dump(data, f)
+            os.replace(tmp, self.cache_file)
+        except: pass
+
+    def map_channels(self, channels, exclude_refs=None, progress_callback=None, cancel=None):
+        # Mapowanie z gotowej listy kanałów (single pass: EPGParser podaje nagłówek bez ponownego parsowania pliku).
+        # Usługi z niezmienioną nazwą przy niezmienionej liście kanałów biorą wynik z cache -
+        # normalizacja i dopasowanie liczone są tylko dla nowych/zmienionych usług.
         if exclude_refs is None: exclude_refs = set()
-        services = _load_services_cached(self.bouquets_path)
-        xml_map = self.get_xmltv_channels(xml_path)
+        cache = self._load_cache()
+        services = (self.catalogue or load_catalogue(self.bouquets_path)).iptv()
+        fingerprint = feed_fingerprint(channels)
+        known = cache.get('services', {}) if cache.get('feed') == fingerprint else {}
+        xml_index = None
         
         final = {}
+        results = {}
         matched = 0
+        reused = 0
         total = len(services)
         
         for idx, s in enumerate(services):
-            if s['full_ref'] in exclude_refs: continue
-            
-            name = self._simplify_name(s['name']).replace(' ', '')
-            if len(name) < 2: continue
+            ref = s['ref']
+            hit = known.get(ref)
+            if hit and hit[0] == s['name']:
+                results[ref] = hit
+                xml_id = hit[1]; reused += 1
+            elif ref in exclude_refs:
+                continue
+            else:
+                if xml_index is None: xml_index = NameIndex(self._index_channels(channels).items())
+                xml_id = self._match(xml_index, s['core'])
+                results[ref] = [s['name'], xml_id or ""]
             
-            xml_id = xml_map.get(name)
-            if not xml_id and len(name) > 3:
-                for xk, xid in xml_map.items():
-                    if (name in xk or xk in name): xml_id = xid; break
-            
-            if xml_id:
-                final.setdefault(xml_id, []).append(s['full_ref'])
+            if xml_id and ref not in exclude_refs:
+                final.setdefault(xml_id, []).append(ref)
                 matched += 1
             
-            if progress_callback and idx % 200 == 0: progress_callback(idx, total)
-            
+            if idx % 200 == 0:
+                if progress_callback: progress_callback(idx, total)
+                if cancel: cancel.check()
+        
+        self._save_cache({'version': CACHE_VERSION, 'feed': fingerprint, 'services': results})
+        if self.log: self.log(f"Mapping: {matched}/{total} (cache: {reused}, new: {len(results) - reused})")
         return final
+
+    def _match(self, xml_index, name):
+        # name: nazwa już znormalizowana (katalog usług)
+        if len(name) < 2: return None
+        xml_id = xml_index.lookup(name)
+        if not xml_id and len(name) > 3: xml_id = xml_index.find(name)
+        return xml_id
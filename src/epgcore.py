@@ -1,6 +1,3 @@
-import xml.etree.cElementTree as ET
-import gzip
-import datetime
 import time
 import urllib.request
 import urllib.error
@@ -8,15 +5,33 @@ import shutil
 import ssl
 import os
 import subprocess
-import re
-from enigma import eEPGCache, eServiceCenter, eServiceReference
+import threading
+import collections
+from .matcher import NameIndex
+from .normalizer import core_name
+from .xmltvtime import parse_xmltv_time
+from .xmltvstream import READERS, ExpatReader, open_source, select_backend
+from .xmltvchunks import ParallelParse
+from .httpstream import FeedStream, is_url
+from .metrics import Latency
+from .servicecatalog import load_catalogue
+from .statuslog import get_log, LOG_FILE
+from .importstate import ImportCancelled
+from enigma import eEPGCache
+
+# Budżety pamięci importu (liczone w zdarzeniach EPG)
+EVENT_BUDGET = 50000      # max zdarzeń w buforze injectora / w kolejce parser -> injector
+FLUSH_MIN_EVENTS = 200    # początkowa wielkość wywołania importEvents (potem wg zmierzonego kosztu)
+BATCH_MAX_EVENTS = 2000   # max długość bloku jednego kanału z parsera
+SAT_LOOKUP_BATCH = 50     # usług SAT w jednym wywołaniu lookupEvent
+COMMIT_LATENCY = 0.05     # s - docelowy czas jednego importEvents
+IMPORT_MIN_EVENTS = 50    # granice wielkości jednego wywołania (zdarzenia x refy)
+IMPORT_MAX_EVENTS = 5000
+IMPORT_RETRIES = 2
 
 # Logowanie
-DEBUG_FILE = "/tmp/simple_epg.log"
-def log_debug(msg):
-    try:
-        with open(DEBUG_FILE, "a") as f: f.write(f"[CORE] {msg}\n")
-    except: pass
+DEBUG_FILE = LOG_FILE
+def log_debug(msg): get_log(DEBUG_FILE).write(f"[CORE] {msg}")
 
 # --- TOOLS ---
 def check_url_alive(url, timeout=10):
@@ -40,147 +55,437 @@ def download_file(url, target_path, retries=3, timeout=120):
     return False
 
 # --- NORMALIZACJA ---
-def get_extended_core_name(name):
-    if not name: return ""
-    name = name.upper()
-    replacements = {'+': 'PLUS', '&': 'AND', '24': 'TWENTYFOUR', 'Ł': 'L', 'Ś': 'S', 'Ć': 'C', 'Ż': 'Z', 'Ź': 'Z', 'Ą': 'A', 'Ę': 'E', 'Ó': 'O', 'Ń': 'N'}
-    for old, new in replacements.items(): name = name.replace(old, new)
-    trash = ['FULLHD', 'FHD', 'UHD', '4K', 'HEVC', 'H265', 'H.265', 'HD', 'SD', 'PL', 'POL', '(PL)', '[PL]', 'VIP', 'RAW', 'VOD', 'XXX', 'PREMIUM', 'BACKUP', 'TEST', 'SUB', 'DUB', 'LEKTOR', 'OTV', 'V2', 'V3', 'ORG', 'PL:', '|PL|', '[STREAM]', '(TV)', '[YT]', '(YT)', 'TV', 'CHANNEL', 'LIVE', 'POLSKA', 'KANAL', 'POLAND', 'INTERNATIONAL', 'EU', 'EUROPE']
-    for t in trash: name = name.replace(t, '')
-    name = re.sub(r'[^A-Z0-9]', '', name)
-    return name.strip()
+# Wspólna, skompilowana normalizacja (normalizer.py) - ta sama co w automapper
+get_extended_core_name = core_name
 
 # --- EPG ---
+def epg_window(past_hours=3, days_ahead=7, now=None):
+    # Okno importu (epoch od, do): programy zakończone przed "od" lub zaczynające się po "do" są pomijane
+    if now is None: now = int(time.time())
+    return now - int(past_hours) * 3600, now + int(days_ahead) * 86400
+
+def _ref_key(ref):
+    # Pierwsze 10 pól referencji (bez URL/nazwy) - tak porównujemy ref z odpowiedzi lookupEvent
+    return ':'.join(str(ref).split(':')[:10])
+
+def _sat_event(ev, first):
+    # (B, D, T, S, E) -> (start, dur, title, desc); opis rozszerzony, a gdy brak - krótki
+    return (ev[first], ev[first + 1], ev[first + 2] or "", ev[first + 4] or ev[first + 3] or "")
+
 def get_sat_epg_events(sat_ref, start_ts, end_ts):
     cache = eEPGCache.getInstance()
-    events = cache.lookupEvent([sat_ref, 2, start_ts, end_ts])
+    minutes = max(1, (end_ts - start_ts) // 60)
+    events = cache.lookupEvent(['BDTSE', (sat_ref, 0, start_ts, minutes)])
     out = []
     if events:
-        for ev in events: 
-            out.append((ev[0], ev[1], ev[2], ev[3] if len(ev) > 3 else ""))
+        for ev in events:
+            if ev and ev[0]: out.append(_sat_event(ev, 0))
     return out
 
-# --- SCAN RAM ---
-def get_all_services_from_memory():
-    sat_map = {}   
-    iptv_list = [] 
-    
-    serviceHandler = eServiceCenter.getInstance()
-    ref_root = eServiceReference('1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.tv" ORDER BY bouquet')
-    list_root = serviceHandler.list(ref_root)
-    
-    if list_root:
-        bouquets = list_root.getContent("SN")
-        for b_ref_str, b_name in bouquets:
-            ref_bouquet = eServiceReference(b_ref_str)
-            list_bouquet = serviceHandler.list(ref_bouquet)
-            
-            if list_bouquet:
-                services = list_bouquet.getContent("SN")
-                for s_ref, s_name in services:
-                    if "---" in s_name or "###" in s_name: continue
-                    ref_lower = s_ref.lower()
-                    
-                    # Definicja IPTV (rozszerzona o MAC/Stalker 1:0:1...http)
-                    is_iptv = False
-                    if '4097:' in s_ref or '5001:' in s_ref or '5002:' in s_ref: is_iptv = True
-                    elif any(x in ref_lower for x in ['http', 'https', '%3a', 'rtmp']): is_iptv = True
-                    
-                    # Definicja SAT
-                    is_sat = ('1:0:' in s_ref) and not is_iptv
-                    
-                    if is_sat:
-                        core = get_extended_core_name(s_name)
-                        if len(core) > 1: sat_map[core] = s_ref
-                    elif is_iptv:
-                        iptv_list.append({'ref': s_ref, 'name': s_name})
-                            
-    return sat_map, iptv_list
+class SatEpgLookup:
+    """Cache zapytań o EPG kanałów SAT na jeden przebieg (klucz: ref + okno).
+    Brakujące refy są pobierane paczkami - jedno lookupEvent z wieloma krotkami usług,
+    wyniki rozdzielane po kolumnie R. Przy błędzie zapytania zbiorczego: pojedyncze zapytania."""
+    def __init__(self, window, batch=SAT_LOOKUP_BATCH):
+        self.start, self.end = window
+        self.batch = batch
+        self.cache = {}
+        self.calls = 0
+    def get_many(self, sat_refs, progress_cb=None):
+        out = {}
+        missing = []
+        for ref in sat_refs:
+            key = (_ref_key(ref), self.start, self.end)
+            if key in self.cache: out[ref] = self.cache[key]
+            else: missing.append(ref)
+        minutes = max(1, (self.end - self.start) // 60)
+        epg = eEPGCache.getInstance()
+        for i in range(0, len(missing), self.batch):
+            chunk = missing[i:i + self.batch]
+            found = {_ref_key(ref): [] for ref in chunk}
+            try:
+                self.calls += 1
+                rows = epg.lookupEvent(['RBDTSE'] + [(ref, 0, self.start, minutes) for ref in chunk]) or []
+                for ev in rows:
+                    lst = found.get(_ref_key(ev[0])) if ev else None
+                    if lst is not None and ev[1]: lst.append(_sat_event(ev, 1))
+            except:
+                for ref in chunk:
+                    self.calls += 1
+                    try: found[_ref_key(ref)] = get_sat_epg_events(ref, self.start, self.end)
+                    except: pass
+            for ref in chunk:
+                events = found.get(_ref_key(ref), [])
+                self.cache[(_ref_key(ref), self.start, self.end)] = events
+                out[ref] = events
+            if progress_cb: progress_cb(min(i + self.batch, len(missing)), len(missing))
+        return out
 
 # --- INJECT ---
-def inject_sat_clone_by_name(injector, log_cb=None):
-    log_debug("Start RAM Scan...")
-    sat_map, iptv_list = get_all_services_from_memory()
-    log_debug(f"RAM: SAT={len(sat_map)}, IPTV={len(iptv_list)}")
+def inject_sat_clone_by_name(injector, log_cb=None, window=None, catalogue=None, cancel=None, progress_cb=None):
+    # catalogue: servicecatalog.ServiceCatalogue (domyślnie wspólny katalog /etc/enigma2)
+    # progress_cb: komunikaty postępu (zastępują się w oknie statusu), log_cb: zwykłe linie
+    # cancel: importstate.CancelToken - sprawdzany po każdej paczce zapytań EPG SAT
+    catalogue = catalogue or load_catalogue()
+    sat_map, iptv_list = catalogue.sat_map(), catalogue.iptv()
+    log_debug(f"Catalogue: {catalogue.summary()}; SAT={len(sat_map)}, IPTV={len(iptv_list)}")
     if log_cb: log_cb(f"Analiza: SAT={len(sat_map)} | IPTV={len(iptv_list)}")
 
+    sat_index = NameIndex(sat_map.items())
     injected = set()
-    now = int(time.time()); end = now + 7 * 86400
-    matched_count = 0
+    lookup = SatEpgLookup(window or epg_window(past_hours=0))
     
+    # 1) Dopasowanie IPTV -> SAT; grupy refów IPTV per kanał SAT
+    groups = {}
     for idx, iptv in enumerate(iptv_list):
-        core_key = get_extended_core_name(iptv['name'])
-        sat_ref = sat_map.get(core_key)
+        core_key = iptv['core']
+        sat_ref = sat_index.lookup(core_key)
         
-        # Smart Match (fallback)
+        # Smart Match (fallback) - indeks zamiast skanu całej mapy SAT
         if not sat_ref and len(core_key) > 3:
-             for k, v in sat_map.items():
-                 if (core_key in k or k in core_key) and abs(len(k) - len(core_key)) < 3:
-                     sat_ref = v; break
-
-        if sat_ref:
-            events = get_sat_epg_events(sat_ref, now, end)
-            if events:
-                for start, dur, title, desc in events:
-                    injector.add_event(iptv['ref'], (start, dur, title[:240], desc[:1024]))
-                injected.add(iptv['ref'])
-                matched_count += 1
-
-        if log_cb and idx % 500 == 0:
+            sat_ref = sat_index.find(core_key, max_len_diff=2)
+
+        if sat_ref: groups.setdefault(sat_ref, []).append(iptv['ref'])
+
+        if progress_cb and idx % 500 == 0:
             percent = int((idx + 1) * 100 / max(len(iptv_list), 1))
-            log_cb(f"Łączenie SAT: {percent}%")
+            progress_cb(f"Łączenie SAT: {percent}%")
+
+    # 2) Jedno zapytanie EPG na kanał SAT (paczkami), niezależnie od liczby kopii IPTV
+    def lookup_progress(current, total):
+        if progress_cb: progress_cb(f"EPG SAT: {current}/{total}")
+        if cancel: cancel.check()
+    sat_events = lookup.get_many(list(groups), progress_cb=lookup_progress)
+    log_debug(f"SAT lookups: {len(groups)} channels, {lookup.calls} lookupEvent calls")
+
+    matched_count = 0
+    for sat_ref, refs in groups.items():
+        events = sat_events.get(sat_ref)
+        if events:
+            # Kompletny blok kanału - wspólna lista dla wszystkich refów IPTV
+            injector.add_events(refs, [(start, dur, title[:240], desc[:1024]) for start, dur, title, desc in events])
+            injected.update(refs)
+            matched_count += len(refs)
 
     if log_cb: log_cb(f"SAT: Zgrano {matched_count} kanałów")
-    if injected: injector.commit()
+    injector.commit()
     return injected
 
 def inject_sat_fallback(injector, injected_refs, log_cb=None): return 0
 
 class EPGParser:
-    def __init__(self, source_path): self.source_path = source_path
-    def parse_timestamp(self, xmltv_date):
-        try: return int(datetime.datetime.strptime(xmltv_date[:14], "%Y%m%d%H%M%S").timestamp())
-        except: return 0
+    # backend: 'auto' (najszybszy dostępny wg kalibracji), 'expat' (pomija niezmapowane kanały
+    # bez budowania elementów), 'iterparse' albo 'lxml' (gdy zainstalowany)
+    # window: (od, do) w epoch - programy spoza okna odrzucane przed budową krotek (patrz epg_window)
+    # source_path: plik (.xml/.xml.gz) albo URL - wtedy parsowanie idzie w trakcie pobierania (FeedStream),
+    # a tee_path opcjonalnie zachowuje kopię pobranego pliku
+    # workers > 1: sekcja programów cięta na kawałki parsowane w procesach python3 (xmltvchunks),
+    # uruchamianych z helper_prefix (np. nice/ionice przy dławieniu importu)
+    def __init__(self, source_path, backend='auto', window=None, tee_path=None, workers=1, helper_prefix=()):
+        self.source_path = source_path
+        self.backend = backend
+        self.window = window
+        self.tee_path = tee_path
+        self.workers = workers
+        self.helper_prefix = helper_prefix
+        self.chunks = 0
+        self.bytes_read = 0
+        self.seen = 0
+        self.kept = 0          # programy przekazane dalej (zmapowane, w oknie, z poprawnym czasem)
+        self.dropped = 0       # zmapowane, ale poza oknem
+        self.error = None
+    def parse_timestamp(self, xmltv_date): return parse_xmltv_time(xmltv_date)
     def load_events(self, channel_map, progress_cb=None):
-        if not os.path.exists(self.source_path): return
-        opener = gzip.open if self.source_path.endswith('.gz') else open
+        # Zgodność wstecz: (ref, event) dla każdej usługi zmapowanej na kanał
+        for chid, refs, events in self.load_batches(channel_map, progress_cb=progress_cb):
+            for event_tuple in events:
+                for ref in refs: yield ref, event_tuple
+
+    def load_batches(self, channel_map, progress_cb=None, max_batch=BATCH_MAX_EVENTS):
+        # Zwraca (xml_id, refs, [event]) dla każdego ciągłego bloku programów jednego kanału
+        # (XMLTV zwykle grupuje programy kanałami, więc blok = kompletny kanał).
+        # channel_map: dict xml_id -> [refs] albo funkcja(channels) -> dict.
+        # Funkcja jest wołana raz, po nagłówku <channel>, i parsowanie idzie dalej
+        # w <programme> bez ponownego otwierania/dekompresji pliku (single pass).
+        resolver = channel_map if callable(channel_map) else None
+        streaming = is_url(self.source_path)
+        if not streaming and not os.path.exists(self.source_path):
+            if resolver: resolver([])
+            return
+        maps = {}
+        def resolve(channels):
+            maps['map'] = (resolver(channels) if resolver else channel_map) or {}
+            return maps['map']
+        self.backend = select_backend(self.backend) if self.workers <= 1 else 'expat'
+        reader = READERS.get(self.backend, ExpatReader)
+        parse = self.parse_timestamp
+        lo, hi = self.window or (0, 1 << 62)
+        next_report = 10000
+        cur = None; batch = []
         try:
-            with opener(self.source_path, 'rb') as f:
-                context = ET.iterparse(f, events=("end",))
-                count = 0
-                for event, elem in context:
-                    if elem.tag == 'programme':
+            with (FeedStream.from_url(self.source_path, tee_path=self.tee_path) if streaming else open_source(self.source_path)) as f:
+                if self.workers > 1:
+                    # Okno filtrowane już w procesach potomnych; tu tylko sklejanie bloków na granicach kawałków
+                    pp = ParallelParse(f, workers=self.workers, window=self.window, prefix=self.helper_prefix)
+                    for chid, events in pp.blocks(resolve):
+                        if chid != cur:
+                            if batch: yield cur, maps['map'][cur], batch
+                            cur = chid; batch = []
+                        batch.extend(events)
+                        while len(batch) >= max_batch:
+                            yield cur, maps['map'][cur], batch[:max_batch]
+                            batch = batch[max_batch:]
+                        self.seen = pp.seen; self.kept = pp.kept; self.dropped = pp.dropped; self.chunks = pp.chunks
+                        if progress_cb and pp.seen >= next_report:
+                            next_report = pp.seen - pp.seen % 10000 + 10000
+                            progress_cb(f"[XML] Eventy: {pp.seen}")
+                    self.seen = pp.seen; self.kept = pp.kept; self.dropped = pp.dropped; self.chunks = pp.chunks
+                else:
+                    r = reader(f)
+                    for chid, start, stop, title, desc in r.programmes(resolve):
+                        if chid != cur or len(batch) >= max_batch:
+                            if batch: yield cur, maps['map'][cur], batch
+                            cur = chid; batch = []
                         try:
-                            chid = elem.get('channel')
-                            if chid in channel_map:
-                                refs = channel_map[chid]
-                                start = self.parse_timestamp(elem.get('start'))
-                                stop = self.parse_timestamp(elem.get('stop'))
-                                if start > 0 and stop > start:
-                                    dur = stop - start
-                                    title = ""; desc = ""
-                                    for child in elem:
-                                        if child.tag == 'title': title = child.text
-                                        elif child.tag == 'desc': desc = child.text
-                                    event_tuple = (int(start), int(dur), str(title or "")[:240], str(desc or "")[:1024])
-                                    for r in refs: yield r, event_tuple
+                            start = parse(start)
+                            if start >= hi: self.dropped += 1; continue
+                            stop = parse(stop)
+                            if stop <= lo: self.dropped += 1; continue
+                            if start > 0 and stop > start:
+                                batch.append((start, stop - start, title[:240], desc[:1024]))
+                                self.kept += 1
                         except: pass
-                        finally: elem.clear()
-                        count += 1
-                        if progress_cb and count % 10000 == 0: progress_cb(f"[XML] Eventy: {count}")
-                    elif elem.tag == 'tv': elem.clear()
-        except: pass
+                        if progress_cb and r.seen >= next_report:
+                            next_report = r.seen - r.seen % 10000 + 10000
+                            progress_cb(f"[XML] Eventy: {r.seen}")
+                        self.seen = r.seen
+                    self.seen = r.seen
+                if streaming: self.bytes_read = f.bytes_in
+        except ImportCancelled: raise
+        except Exception as e:
+            log_debug(f"XML parse error: {e}")
+            self.error = e
+        if batch: yield cur, maps['map'][cur], batch
+        # Błąd przed nagłówkiem - mapowanie i tak musi zostać policzone
+        if resolver and 'map' not in maps: resolver([])
+        # Przerwany plik (uszkodzony gzip, zerwane połączenie) to nieudany import, nie sukces z częścią kanałów
+        if self.error: raise self.error
 
 class EPGInjector:
-    def __init__(self):
+    # Bufor ograniczony budżetem zdarzeń: po przekroczeniu max_buffered największe grupy idą do importEvents
+    # (aż bufor spadnie do połowy), małe czekają na dalsze zdarzenia zamiast iść po 1-2 sztuki.
+    # Klucz bufora to krotka refów: usługi zmapowane na ten sam kanał źródłowy (FHD/HEVC/backup)
+    # dzielą jedną listę zdarzeń, rozsyłaną do wszystkich refów dopiero przy imporcie.
+    # Wielkość pojedynczego wywołania (zdarzenia x refy) dopasowywana do zmierzonego kosztu importEvents
+    # tak, żeby jedno wywołanie (blokada cache EPG = przestój GUI) mieściło się w latency_budget.
+    # throttle (throttle.Throttle, opcjonalnie): checkpoint po każdym wywołaniu - import oddaje procesor GUI.
+    # cancel (importstate.CancelToken, opcjonalnie): sprawdzany przed każdym wywołaniem; niewysłana reszta
+    # grupy wraca do bufora, więc uncommitted() mówi, które grupy nie są jeszcze w EPG.
+    def __init__(self, max_buffered=EVENT_BUDGET, flush_min=FLUSH_MIN_EVENTS, latency_budget=COMMIT_LATENCY):
         self.epg_cache = eEPGCache.getInstance()
-        self.events_buffer = {} 
+        self.events_buffer = {}
+        self.max_buffered = max_buffered
+        self.flush_min = flush_min
+        self.latency_budget = latency_budget
+        self.target = min(max(flush_min, IMPORT_MIN_EVENTS), IMPORT_MAX_EVENTS)  # zdarzenia x refy na wywołanie
+        self.cost = None       # s na zdarzenie-usługę (średnia krocząca)
+        self.buffered = 0
+        self.peak_buffered = 0
+        self.imported = 0
+        self.imported_refs = set()
+        self.stored = 0        # krotki faktycznie zbudowane (jedna na kanał źródłowy)
+        self.fanned_out = 0    # krotki, które trzeba by zbudować osobno dla każdego refa
+        self.multi_ref = None  # czy importEvents przyjmuje krotkę refów (sprawdzane przy 1. grupie)
+        self.latency = Latency()  # czas pojedynczych wywołań importEvents
+        self.over_budget = 0   # wywołania dłuższe niż latency_budget
+        self.retried = 0
+        self.failed_calls = 0
+        self.failed_events = 0
+        self.failed_refs = set()  # usługi z nieudanym importEvents (import przyrostowy ich nie zapamiętuje)
+        self.errors = collections.deque(maxlen=5)
+        self.throttle = None
+        self.cancel = None
     def add_event(self, service_ref, event_data):
-        if service_ref not in self.events_buffer: self.events_buffer[service_ref] = []
+        group = (service_ref,)
+        if group not in self.events_buffer: self.events_buffer[group] = []
         start, duration, title, desc = event_data
-        self.events_buffer[service_ref].append((start, duration, title, "", desc, 0))
+        self.events_buffer[group].append((start, duration, title, "", desc, 0))
+        self.fanned_out += 1
+        self._grow(1)
+    def add_events(self, service_refs, events):
+        # Kompletny blok zdarzeń (np. cały kanał) dla jednej lub kilku usług - jedna wspólna lista
+        group = tuple(service_refs)
+        buf = self.events_buffer.setdefault(group, [])
+        buf.extend((start, duration, title, "", desc, 0) for start, duration, title, desc in events)
+        self.fanned_out += len(events) * len(group)
+        self._grow(len(events))
+        buf = self.events_buffer.get(group)
+        if buf and len(buf) * len(group) >= self.target: self.flush(group)
+    def _grow(self, n):
+        self.buffered += n
+        self.stored += n
+        if self.buffered > self.peak_buffered: self.peak_buffered = self.buffered
+        if self.buffered >= self.max_buffered: self._relieve()
+    def _relieve(self):
+        for group in sorted(self.events_buffer, key=lambda g: len(self.events_buffer[g]), reverse=True):
+            if self.buffered <= self.max_buffered // 2: break
+            self.flush(group)
+    def flush(self, service_refs):
+        group = tuple(service_refs)
+        events = self.events_buffer.pop(group, None)
+        if events: self._import(group, events)
+    def _import(self, group, events):
+        # Lista dzielona na wywołania po ~target zdarzeń-usług
+        self.buffered -= len(events)
+        per_call = len(group) if self.multi_ref is not False else 1
+        step = max(1, self.target // per_call)
+        for i in range(0, len(events), step):
+            if self.cancel and self.cancel.cancelled():
+                rest = events[i:]
+                self.events_buffer[group] = rest + self.events_buffer.get(group, [])
+                self.buffered += len(rest)
+                self.cancel.check()
+            self._send(group, events[i:i + step])
+            if self.throttle: self.throttle.checkpoint()
+    def _send(self, group, events):
+        if len(group) > 1 and self.multi_ref is not False:
+            # Jedno wywołanie dla całej grupy (enigma2: krotka refów), inaczej per ref z tą samą listą
+            ok = self._call(tuple(str(r) for r in group), events, len(group))
+            if ok is None: self.multi_ref = False
+            elif ok:
+                self.multi_ref = True
+                self._imported(group, events)
+                return
+        for service_ref in group:
+            if self._call(str(service_ref), events, 1): self._imported((service_ref,), events)
+            else:
+                self.failed_events += len(events)
+                self.failed_refs.add(service_ref)
+    def _call(self, refs, events, n_refs):
+        # True = zaimportowane, False = błąd po ponowieniach, None = enigma nie przyjmuje krotki refów
+        err = None
+        for attempt in range(IMPORT_RETRIES + 1):
+            t = time.perf_counter()
+            try:
+                self.epg_cache.importEvents(refs, events)
+            except TypeError as e:
+                if n_refs > 1: return None
+                err = e; break
+            except Exception as e:
+                err = e
+                if attempt < IMPORT_RETRIES:
+                    self.retried += 1
+                    time.sleep(0.05 * (attempt + 1))
+                continue
+            dt = time.perf_counter() - t
+            self.latency.add(dt)
+            self._adapt(dt, len(events) * n_refs)
+            return True
+        self.failed_calls += 1
+        self.errors.append(f"{refs if n_refs == 1 else refs[0] + ' (+' + str(n_refs - 1) + ')'}: {err}")
+        log_debug(f"importEvents failed ({len(events)} events): {self.errors[-1]}")
+        return False
+    def _adapt(self, dt, n):
+        per = dt / max(n, 1)
+        self.cost = per if self.cost is None else 0.7 * self.cost + 0.3 * per
+        if dt > self.latency_budget: self.over_budget += 1
+        self.target = int(min(IMPORT_MAX_EVENTS, max(IMPORT_MIN_EVENTS, self.latency_budget * 0.8 / max(self.cost, 1e-7))))
+    def _imported(self, group, events):
+        self.imported += len(events) * len(group)
+        self.imported_refs.update(group)
     def commit(self):
-        for service_ref, events in self.events_buffer.items():
-            try: self.epg_cache.importEvents(str(service_ref), events)
-            except: pass
-        self.events_buffer.clear()
+        for group in list(self.events_buffer): self._import(group, self.events_buffer.pop(group))
+        self.buffered = 0
+    def uncommitted(self, refs):
+        # Grupa jeszcze w buforze (także po przerwaniu w połowie) albo z nieudanym importEvents
+        group = tuple(refs)
+        return group in self.events_buffer or not self.failed_refs.isdisjoint(group)
+    def report(self):
+        lat = self.latency
+        text = (f"{lat.count} importEvents calls, avg {lat.total * 1000 / max(lat.count, 1):.1f} ms, max {lat.max * 1000:.0f} ms, "
+                f"{self.over_budget} over {self.latency_budget * 1000:.0f} ms, batch {self.target}")
+        if self.failed_calls or self.retried:
+            text += f", retried {self.retried}, failed {self.failed_calls} calls / {self.failed_events} events"
+        return text
+
+# --- PIPELINE ---
+class EventQueue:
+    """Ograniczona kolejka bloków zdarzeń między parserem (producent) a injectorem.
+    Limit liczony w zdarzeniach: producent czeka, gdy w kolejce jest max_events.
+    close(): konsument kończy (błąd, przerwanie) - put() przestaje czekać i zwraca False."""
+    def __init__(self, max_events=EVENT_BUDGET):
+        self.max_events = max_events
+        self.items = collections.deque()
+        self.pending = 0
+        self.peak = 0
+        self.closed = False
+        self.cond = threading.Condition()
+    def put(self, item, size):
+        with self.cond:
+            # Pusty bufor zawsze przyjmuje blok (nawet większy niż limit)
+            while self.pending and self.pending + size > self.max_events and not self.closed: self.cond.wait()
+            if self.closed: return False
+            self.items.append((item, size))
+            self.pending += size
+            if self.pending > self.peak: self.peak = self.pending
+            self.cond.notify_all()
+            return True
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+    def get(self):
+        with self.cond:
+            while not self.items: self.cond.wait()
+            item, size = self.items.popleft()
+            self.pending -= size
+            self.cond.notify_all()
+            return item
+
+_DONE = object()
+
+def pump_batches(batches, injector, max_events=EVENT_BUDGET, skip_refs=None, wrap=None, on_batch=None, cancel=None):
+    """Parser w osobnym wątku -> EventQueue -> injector w wątku wywołującym.
+    Zwraca (zaimportowane zdarzenia, szczyt kolejki). wrap: opcjonalne opakowanie funkcji
+    wątku parsera (np. RunMetrics.profiled). on_batch(chid, refs): po przekazaniu bloku do injectora
+    (np. ImportCheckpoint.track). Wyjątek w wątku parsera: injector zapisuje to, co już jest w kolejce,
+    i wyjątek idzie dalej w wątku wywołującym. cancel (CancelToken): sprawdzany przed każdym blokiem
+    z kolejki i przed końcowym commit - przerwanie nie czeka na opróżnienie kolejki. Wyjątek konsumenta
+    zamyka kolejkę - parser kończy na najbliższym bloku, wątek jest zawsze dołączany."""
+    q = EventQueue(max_events)
+    errors = []
+    def produce():
+        try:
+            for chid, refs, events in batches:
+                if not q.put((chid, refs, events), len(events)): break
+        except ImportCancelled as e: errors.append(e)
+        except Exception as e:
+            log_debug(f"Pipeline producer error: {e}")
+            errors.append(e)
+        finally:
+            # Generator zamknięty od razu (plik / procesy parsera), nie dopiero przez GC
+            close = getattr(batches, 'close', None)
+            if close:
+                try: close()
+                except Exception: pass
+            q.put(_DONE, 0)
+    producer = threading.Thread(target=wrap(produce) if wrap else produce, daemon=True)
+    producer.start()
+    count = 0
+    try:
+        while True:
+            item = q.get()
+            if cancel: cancel.check()
+            if item is _DONE: break
+            chid, refs, events = item
+            if skip_refs: refs = [r for r in refs if r not in skip_refs]
+            if refs and events:
+                injector.add_events(refs, events)
+                count += len(events) * len(refs)
+            if on_batch: on_batch(chid, refs)
+        injector.commit()
+    finally:
+        q.close()
+        producer.join()
+    if errors: raise errors[0]
+    return count, q.peak
@@ -0,0 +1,119 @@
+# Import przyrostowy: skrót (digest) tego, co zostało wstrzyknięte, per grupa usług i doba.
+# Przy kolejnym imporcie doby z identycznym skrótem są pomijane - EPG enigmy już je ma
+# (epg.dat jest zapisywany/wczytywany przez enigmę). Zmieniona lub nowa doba idzie w całości.
+import hashlib
+import json
+import os
+import time
+
+DELTA_FILE = "/etc/enigma2/iptv_epg_delta.json"
+DELTA_VERSION = 1
+DELTA_MAX_AGE = 3 * 86400   # starszy stan = pełny import (np. po dłuższym wyłączeniu tunera)
+DAY = 86400
+
+def group_key(refs):
+    # Klucz grupy: zmiana zestawu refów kanału (mapowanie) = nowa grupa = pełny import kanału
+    return hashlib.sha1("|".join(sorted(refs)).encode('utf-8', 'ignore')).hexdigest()[:16]
+
+def _hasher(): return hashlib.blake2b(digest_size=8)
+
+class DeltaFilter:
+    """Filtr bloków (chid, refs, [(start, dur, title, desc)]) między parserem a injectorem.
+    Zdarzenia są zbierane per (grupa, doba UTC) tylko do zmiany doby/grupy w strumieniu -
+    w pamięci jest co najwyżej jedna doba jednego kanału. Doba jest przepuszczana, gdy jej
+    skrót różni się od zapisanego w poprzednim przebiegu. Feed bez porządku (ta sama doba
+    w kilku kawałkach) daje po prostu więcej przepuszczonych zdarzeń, nigdy mniej."""
+
+    def __init__(self, path=DELTA_FILE, max_age=DELTA_MAX_AGE):
+        self.path = path
+        self.old = {}
+        self.new = {}
+        self.refs = {}            # klucz -> refy grupy (save() pomija grupy z błędem importu)
+        self.groups = {}          # klucz -> [dób razem, dób pominiętych]
+        self.events_skipped = 0
+        self.events_passed = 0
+        self.sample = []
+        self.reason = "no state"
+        try:
+            with open(path, 'r') as f: data = json.load(f)
+            if data.get('version') != DELTA_VERSION: self.reason = "version"
+            elif time.time() - data.get('saved', 0) > max_age: self.reason = "state too old"
+            else: self.old = data.get('groups', {}); self.reason = ""
+        except: pass
+
+    @property
+    def active(self): return bool(self.old)
+
+    def reset(self, reason):
+        # EPG enigmy nie ma już wcześniejszych zdarzeń - tym razem wszystko
+        self.old = {}; self.reason = reason
+
+    def sample_refs(self, count=5):
+        # Refy do sprawdzenia, czy EPG enigmy wciąż trzyma poprzedni import
+        return self.old.get('_refs', [])[:count]
+
+    def filter(self, batches):
+        pending = None   # [klucz, doba, refs, chid, zdarzenia, hasher, powtórka]
+        for chid, refs, events in batches:
+            key = group_key(refs)
+            for ev in events:
+                day = ev[0] // DAY
+                if pending is None or pending[0] != key or pending[1] != day:
+                    if pending is not None:
+                        out = self._close(pending)
+                        if out: yield out
+                    pending = self._open(key, day, refs, chid)
+                pending[4].append(ev)
+                pending[5].update(f"{ev[0]}\t{ev[1]}\t{ev[2]}\t{ev[3]}\n".encode('utf-8', 'ignore'))
+        if pending is not None:
+            out = self._close(pending)
+            if out: yield out
+
+    def _open(self, key, day, refs, chid):
+        days = self.new.setdefault(key, {})
+        self.refs.setdefault(key, refs)
+        h = days.get(day)
+        # Doba wraca w strumieniu drugi raz: skrót liczony dalej, kawałek zawsze przepuszczany
+        again = h is not None
+        if h is None: h = days[day] = _hasher()
+        stats = self.groups.setdefault(key, [0, 0])
+        if not again: stats[0] += 1
+        if len(self.sample) < 20 and refs[0] not in self.sample: self.sample.append(refs[0])
+        return [key, day, refs, chid, [], h, again]
+
+    def _close(self, pending):
+        key, day, refs, chid, events, h, again = pending
+        if not again and self.old.get(key, {}).get(str(day)) == h.hexdigest():
+            self.groups[key][1] += 1
+            self.events_skipped += len(events)
+            return None
+        self.events_passed += len(events)
+        return chid, refs, events
+
+    @property
+    def channels_total(self): return len(self.groups)
+    @property
+    def channels_skipped(self): return sum(1 for total, skipped in self.groups.values() if total == skipped)
+
+    def summary(self):
+        if not self.active: return f"full import ({self.reason}), {self.channels_total} channels"
+        return (f"skipped {self.channels_skipped}/{self.channels_total} channels unchanged, "
+                f"{self.events_skipped} events skipped, {self.events_passed} injected")
+
+    def save(self, failed_refs=()):
+        # Po udanym imporcie; zostają tylko grupy/doby z tego przebiegu. Grupa z usługą, dla której
+        # importEvents zawiódł, nie jest zapisywana - przy następnym imporcie idzie w całości
+        failed = set(failed_refs)
+        groups = {key: {str(day): h.hexdigest() for day, h in days.items()} for key, days in self.new.items()
+                  if not failed or failed.isdisjoint(self.refs.get(key, ()))}
+        groups['_refs'] = self.sample
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f: json.dump({'version': DELTA_VERSION, 'saved': int(time.time()), 'groups': groups}, f)
+            os.replace(tmp, self.path)
+        except: pass
+
+    @staticmethod
+    def clear(path=DELTA_FILE):
+        try: os.remove(path)
+        except: pass
@@ -0,0 +1,197 @@
+# Binarny magazyn przetworzonego EPG: ponowne wstrzyknięcie po utracie cache EPG bez pobierania i parsowania XML.
+# Układ pliku (liczby 32-bit w kolejności bajtów zapisującego, oznaczonej w nagłówku):
+#   nagłówek | grupy (refs_start, refs_count, ev_start, ev_count) | indeksy refów grup
+#   | przesunięcia napisów (n+1) | bloki napisów (surowy początek, koniec po kompresji) | dane napisów
+#   | zdarzenia (start, dur, title, desc)
+# Napisy (refy, tytuły, opisy) są deduplikowane w jednej tablicy i trzymane w blokach zlib
+# (~64 KB przed kompresją, napis nigdy nie przechodzi przez granicę bloku).
+import array
+import bisect
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+import zlib
+
+STORE_FILE = "iptv_epg.store"
+STORE_MAGIC = b'SIEPGST1'
+STORE_VERSION = 1
+HEADER = struct.Struct('<8sIIIIIIII')  # magic, wersja, big-endian, utworzono, grupy, refy grup, napisy, bloki, zdarzenia
+GROUP_FIELDS = 4
+EVENT_FIELDS = 4
+WRITE_CHUNK = 4096                      # zdarzeń na jeden zapis tablicy
+STRING_BLOCK = 64 * 1024
+
+def _u32(): return array.array('I')
+
+class EPGStoreWriter:
+    """Zapis strumieniowy: zdarzenia i napisy idą od razu do plików tymczasowych,
+    w pamięci zostają tylko indeksy (4 B na napis/grupę) i słownik skrótów do deduplikacji.
+    Plik docelowy powstaje dopiero w close(commit=True) - przerwany import nie psuje magazynu."""
+
+    def __init__(self, path):
+        self.path = path
+        self.groups = _u32()
+        self.group_refs = _u32()
+        self.offsets = _u32(); self.offsets.append(0)
+        self.strings = {}
+        self.ref_lists = {}
+        self.events = _u32()
+        self.n_events = 0
+        self.data_size = 0
+        self.block = bytearray()
+        self.blocks = _u32()                # (surowy początek, skompresowany koniec) dla każdego bloku
+        self.z_size = 0
+        self._ev = open(path + '.events.tmp', 'wb')
+        self._str = open(path + '.strings.tmp', 'wb')
+
+    def _string(self, text):
+        raw = (text or "").encode('utf-8', 'ignore')
+        key = hashlib.blake2b(raw, digest_size=8).digest()
+        idx = self.strings.get(key)
+        if idx is None:
+            idx = self.strings[key] = len(self.offsets) - 1
+            if self.block and len(self.block) + len(raw) > STRING_BLOCK: self._flush_block()
+            self.block += raw
+            self.data_size += len(raw)
+            self.offsets.append(self.data_size)
+        return idx
+
+    def _flush_block(self):
+        z = zlib.compress(bytes(self.block), 6)
+        self._str.write(z)
+        self.z_size += len(z)
+        self.blocks.extend((self.data_size - len(self.block), self.z_size))
+        self.block = bytearray()
+
+    def add(self, refs, events):
+        if not refs or not events: return
+        key = tuple(refs)
+        span = self.ref_lists.get(key)
+        if span is None:
+            span = self.ref_lists[key] = (len(self.group_refs), len(key))
+            self.group_refs.extend(self._string(r) for r in key)
+        self.groups.extend((span[0], span[1], self.n_events, len(events)))
+        string = self._string
+        ev = self.events
+        for start, dur, title, desc in events:
+            ev.extend((start, dur, string(title), string(desc)))
+            if len(ev) >= WRITE_CHUNK * EVENT_FIELDS:
+                ev.tofile(self._ev); del ev[:]
+        self.n_events += len(events)
+
+    def tap(self, batches, skip_refs=None):
+        # Przepuszcza bloki (chid, refs, events) dalej, zapisując je po drodze
+        for chid, refs, events in batches:
+            self.add([r for r in refs if r not in skip_refs] if skip_refs else refs, events)
+            yield chid, refs, events
+
+    def close(self, commit=True):
+        if self.events: self.events.tofile(self._ev); del self.events[:]
+        if self.block: self._flush_block()
+        self._ev.close(); self._str.close()
+        tmp = self.path + '.tmp'
+        try:
+            if commit:
+                with open(tmp, 'wb') as f:
+                    f.write(HEADER.pack(STORE_MAGIC, STORE_VERSION, int(sys.byteorder == 'big'), int(time.time()),
+                                        len(self.groups) // GROUP_FIELDS, len(self.group_refs), len(self.offsets) - 1,
+                                        len(self.blocks) // 2, self.n_events))
+                    for a in (self.groups, self.group_refs, self.offsets, self.blocks): a.tofile(f)
+                    for part in (self._str.name, self._ev.name):
+                        with open(part, 'rb') as src: shutil.copyfileobj(src, f, 1 << 20)
+                os.replace(tmp, self.path)
+        finally:
+            for name in (self._ev.name, self._str.name, tmp):
+                try: os.remove(name)
+                except: pass
+        return commit
+
+class EPGStore:
+    """Odczyt przez mmap: tablice indeksów są kopiowane (małe), bloki napisów rozpakowywane
+    dopiero przy odczycie grupy (ostatni blok w pamięci - odczyt idzie zwykle po kolei)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, big, self.created, n_groups, n_refs, n_strings, n_blocks, self.n_events = HEADER.unpack_from(self.map, 0)
+            if magic != STORE_MAGIC or version != STORE_VERSION: raise ValueError("unknown EPG store format")
+            swap = big != int(sys.byteorder == 'big')
+            pos = HEADER.size
+            self.groups, pos = self._array(pos, n_groups * GROUP_FIELDS, swap)
+            self.group_refs, pos = self._array(pos, n_refs, swap)
+            self.offsets, pos = self._array(pos, n_strings + 1, swap)
+            blocks, pos = self._array(pos, n_blocks * 2, swap)
+            self.block_raw = blocks[0::2]; self.block_end = blocks[1::2]
+            self.data_pos = pos
+            self.events_pos = pos + (self.block_end[-1] if n_blocks else 0)
+            self._cached = (-1, b'')
+            self.swap = swap
+            self.n_groups = n_groups
+        except:
+            self.close(); raise
+
+    def _array(self, pos, count, swap):
+        a = _u32()
+        end = pos + count * a.itemsize
+        a.frombytes(self.map[pos:end])
+        if swap: a.byteswap()
+        return a, end
+
+    def string(self, idx):
+        off = self.offsets[idx]; end = self.offsets[idx + 1]
+        if off == end: return ""
+        b = bisect.bisect_right(self.block_raw, off) - 1
+        if self._cached[0] != b:
+            z0 = self.block_end[b - 1] if b else 0
+            self._cached = (b, zlib.decompress(self.map[self.data_pos + z0:self.data_pos + self.block_end[b]]))
+        base = self.block_raw[b]
+        return self._cached[1][off - base:end - base].decode('utf-8', 'ignore')
+
+    def iter_groups(self, min_end=0):
+        # (refs, [(start, dur, title, desc)]) w kolejności zapisu; zdarzenia kończące się przed min_end pominięte
+        g = self.groups; refs_idx = self.group_refs
+        string = self.string
+        names = {}
+        for i in range(0, len(g), GROUP_FIELDS):
+            r0, rn, e0, en = g[i:i + GROUP_FIELDS]
+            refs = [string(x) for x in refs_idx[r0:r0 + rn]]
+            ev, _ = self._array(self.events_pos + e0 * EVENT_FIELDS * 4, en * EVENT_FIELDS, self.swap)
+            events = []
+            for j in range(0, len(ev), EVENT_FIELDS):
+                start, dur, t, d = ev[j:j + EVENT_FIELDS]
+                if start + dur <= min_end: continue
+                title = names.get(t)
+                if title is None: title = names[t] = string(t)
+                events.append((start, dur, title, string(d)))
+            if events: yield refs, events
+
+    def sample_refs(self, count=5):
+        out = []
+        for i in range(0, len(self.groups), GROUP_FIELDS):
+            ref = self.string(self.group_refs[self.groups[i]])
+            if ref not in out: out.append(ref)
+            if len(out) >= count: break
+        return out
+
+    def close(self):
+        try: self.map.close()
+        except: pass
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def reload_store(path, injector, min_end=0):
+    # Wstrzyknięcie zawartości magazynu (bez XML); zwraca liczbę zdarzeń na usługach
+    count = 0
+    with EPGStore(path) as store:
+        for refs, events in store.iter_groups(min_end):
+            injector.add_events(refs, events)
+            count += len(events) * len(refs)
+    injector.commit()
+    return count
@@ -0,0 +1,211 @@
+# Strumieniowe pobieranie feedu: odpowiedź HTTP -> (opcjonalnie kopia na dysk) -> gunzip w locie -> parser
+import json
+import os
+import ssl
+import time
+import urllib.error
+import urllib.request
+import zlib
+
+STREAM_CHUNK = 64 * 1024
+USER_AGENT = 'Mozilla/5.0'
+
+def is_url(source): return source.startswith(('http://', 'https://'))
+
+def open_url(url, timeout=60, headers=None):
+    ctx = ssl.create_default_context(); ctx.check_hostname = False; ctx.verify_mode = ssl.CERT_NONE
+    h = {'User-Agent': USER_AGENT}
+    if headers: h.update(headers)
+    req = urllib.request.Request(url, headers=h)
+    return urllib.request.urlopen(req, context=ctx, timeout=timeout)
+
+class FeedStream:
+    """Plik-podobny strumień (read) nad surowym źródłem bajtów, np. odpowiedzią HTTP.
+    gzip rozpoznawany po nagłówku 1f 8b i rozpakowywany przyrostowo (także wieloczłonowy),
+    więc plik nigdy nie leży w całości w /tmp. tee_path: surowe bajty zapisywane równolegle
+    do tee_path + '.part' i przenoszone na tee_path dopiero po odczycie do końca."""
+
+    def __init__(self, raw, tee_path=None, chunk_size=STREAM_CHUNK):
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self.tee_path = tee_path
+        self.tee = open(tee_path + '.part', 'wb') if tee_path else None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.complete = False
+        self._z = None
+        self._tail = b''
+        self._started = False
+
+    @classmethod
+    def from_url(cls, url, tee_path=None, timeout=60):
+        return cls(open_url(url, timeout=timeout), tee_path=tee_path)
+
+    def read(self, size=-1):
+        limit = size if size and size > 0 else 0
+        while True:
+            if self._tail:
+                data = self._z.decompress(self._tail, limit)
+                self._tail = self._z.unconsumed_tail
+            else:
+                raw = self.raw.read(self.chunk_size)
+                if not raw: return self._finish()
+                self.bytes_in += len(raw)
+                if self.tee: self.tee.write(raw)
+                if not self._started:
+                    self._started = True
+                    if raw[:2] == b'\x1f\x8b': self._z = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if self._z is None:
+                    data = raw
+                else:
+                    data = self._z.decompress(raw, limit)
+                    self._tail = self._z.unconsumed_tail
+            if self._z is not None and self._z.eof and self._z.unused_data:
+                # Kolejny człon gzip
+                rest = self._z.unused_data + self._tail
+                self._z = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                self._tail = rest
+            if data:
+                self.bytes_out += len(data)
+                return data
+
+    def _finish(self):
+        data = self._z.flush() if self._z is not None else b''
+        if not self.complete:
+            self.complete = True
+            if self.tee:
+                self.tee.close(); self.tee = None
+                try: os.replace(self.tee_path + '.part', self.tee_path)
+                except: pass
+        self.bytes_out += len(data)
+        return data
+
+    def close(self):
+        if self.tee:
+            # Przerwany odczyt - niepełna kopia nie może udawać całego pliku
+            self.tee.close(); self.tee = None
+            try: os.remove(self.tee_path + '.part')
+            except: pass
+        try: self.raw.close()
+        except: pass
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+# --- POBIERANIE WARUNKOWE / WZNAWIANE ---
+MIN_FEED_SIZE = 1000
+
+class FetchResult:
+    def __init__(self):
+        self.ok = False
+        self.status = "error"      # downloaded / resumed / not_modified / cancelled / error
+        self.http_code = 0
+        self.bytes = 0             # bajty faktycznie przesłane
+        self.reused = 0            # bajty wzięte z poprzedniej kopii / niedokończonego pliku
+        self.seconds = 0.0
+        self.saved_seconds = 0.0   # szacunek na podstawie prędkości z poprzedniego pobrania
+        self.error = ""
+    def summary(self):
+        return (f"{self.status} (HTTP {self.http_code}): {self.bytes} B transferred, {self.reused} B reused, "
+                f"{self.seconds:.1f} s, ~{self.saved_seconds:.0f} s saved")
+
+def _load_meta(path):
+    try:
+        with open(path + '.meta', 'r') as f: return json.load(f)
+    except: return {}
+
+def _save_meta(path, meta):
+    try:
+        with open(path + '.meta', 'w') as f: json.dump(meta, f)
+    except: pass
+
+def fetch_feed(url, path, retries=3, timeout=60, chunk_size=STREAM_CHUNK, cancel=None):
+    """Pobiera url do path, zachowując walidatory (ETag/Last-Modified) w path + '.meta'.
+    - jest pełna kopia tego samego url: If-None-Match / If-Modified-Since, 304 = kopia bez pobierania,
+    - jest niedokończony path + '.part': Range + If-Range, dopisywanie od miejsca przerwania,
+    - samo zapytanie sprawdza dostępność (bez osobnego HEAD); 4xx kończy bez ponawiania,
+    - cancel (importstate.CancelToken) sprawdzany co porcję: .part zostaje do wznowienia."""
+    res = FetchResult()
+    t0 = time.time()
+    meta = _load_meta(path)
+    part = path + '.part'
+    have_copy = meta.get('url') == url and meta.get('complete') and os.path.exists(path)
+    for attempt in range(retries):
+        if cancel and cancel.cancelled():
+            res.status = "cancelled"; res.error = "cancelled"
+            break
+        headers = {}
+        if have_copy:
+            if meta.get('etag'): headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+        partial = meta.get('partial') or {}
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = partial.get('etag') or partial.get('last_modified')
+        if offset and partial.get('url') == url and validator:
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = validator
+        else:
+            offset = 0
+        try:
+            resp = open_url(url, timeout=timeout, headers=headers)
+        except urllib.error.HTTPError as e:
+            res.http_code = e.code
+            if e.code == 304 and have_copy:
+                res.ok = True; res.status = "not_modified"
+                res.reused = os.path.getsize(path)
+                if meta.get('bps'): res.saved_seconds = res.reused / meta['bps']
+                break
+            if e.code == 416:
+                # Zły zakres (plik po stronie serwera się zmienił) - od zera
+                try: os.remove(part)
+                except: pass
+                meta.pop('partial', None)
+                continue
+            res.error = f"HTTP {e.code}"
+            if 400 <= e.code < 500: break
+            time.sleep(2); continue
+        except Exception as e:
+            res.error = str(e)
+            time.sleep(2); continue
+        try:
+            with resp:
+                res.http_code = resp.status
+                resumed = resp.status == 206 and offset > 0
+                if not resumed: offset = 0
+                etag = resp.headers.get('ETag'); last_mod = resp.headers.get('Last-Modified')
+                length = resp.headers.get('Content-Length')
+                meta['partial'] = {'url': url, 'etag': etag, 'last_modified': last_mod}
+                _save_meta(path, meta)
+                t_body = time.time()
+                got = 0
+                with open(part, 'ab' if resumed else 'wb') as f:
+                    while not (cancel and cancel.cancelled()):
+                        buf = resp.read(chunk_size)
+                        if not buf: break
+                        f.write(buf); got += len(buf)
+                res.bytes += got
+                if cancel and cancel.cancelled():
+                    res.status = "cancelled"; res.error = "cancelled"
+                    break
+                if length is not None and got < int(length):
+                    res.error = f"incomplete ({got}/{length})"
+                    continue
+            size = os.path.getsize(part)
+            if size < MIN_FEED_SIZE:
+                res.error = f"file too small ({size} B)"
+                continue
+            os.replace(part, path)
+            elapsed = max(time.time() - t_body, 1e-3)
+            meta = {'url': url, 'etag': etag, 'last_modified': last_mod, 'complete': True, 'size': size, 'bps': got / elapsed}
+            _save_meta(path, meta)
+            res.ok = True
+            res.status = "resumed" if resumed else "downloaded"
+            if resumed:
+                res.reused = offset
+                res.saved_seconds = offset / meta['bps']
+            break
+        except Exception as e:
+            res.error = str(e)
+            time.sleep(2)
+    res.seconds = time.time() - t0
+    return res
@@ -0,0 +1,161 @@
+# Przerywanie i wznawianie importu: token anulowania sprawdzany w pętlach pobierania, mapowania,
+# parsowania i zapisu oraz punkt kontrolny na dysku (kanały już zapisane w EPG), żeby przerwany
+# (limit czasu, przycisk, restart tunera) import z tego samego pliku nie zaczynał od zera.
+import hashlib
+import json
+import os
+import threading
+import time
+
+CHECKPOINT_FILE = "/etc/enigma2/iptv_epg_checkpoint.json"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_MAX_AGE = 86400     # s - starszy punkt kontrolny = import od nowa
+CHECKPOINT_INTERVAL = 30.0     # s - co ile w trakcie importu commit injectora + zapis punktu kontrolnego
+SAMPLE_REFS = 5
+
+class ImportCancelled(Exception): pass
+
+class CancelToken:
+    """cancel() z dowolnego wątku (GUI, limit czasu); check() w pętlach importu rzuca ImportCancelled
+    w bezpiecznym miejscu (między porcjami), guard() robi to samo dla każdego elementu generatora."""
+    def __init__(self):
+        self.event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="user"):
+        if not self.event.is_set():
+            self.reason = reason
+            self.event.set()
+
+    def cancelled(self): return self.event.is_set()
+
+    def check(self):
+        if self.event.is_set(): raise ImportCancelled(self.reason)
+
+    def guard(self, iterable):
+        for item in iterable:
+            self.check()
+            yield item
+
+def source_key(url, path, *settings):
+    # Punkt kontrolny dotyczy konkretnej kopii pliku (rozmiar + mtime) i ustawień okna
+    try: st = os.stat(path)
+    except OSError: return None
+    return "|".join([url, str(st.st_size), str(int(st.st_mtime))] + [str(s) for s in settings])
+
+def mapping_digest(mapping):
+    h = hashlib.blake2b(digest_size=8)
+    for chid in sorted(mapping):
+        h.update(chid.encode('utf-8', 'ignore')); h.update(b'\0')
+        h.update("|".join(sorted(mapping[chid])).encode('utf-8', 'ignore')); h.update(b'\n')
+    return h.hexdigest()
+
+class ImportCheckpoint:
+    """Kanały XML, których zdarzenia są już w EPG (po commit injectora), dla danej kopii pliku.
+    Kanał jest zakończony, gdy po nim przyszedł inny - XMLTV grupuje programy kanałami; gdy kanał wraca
+    (feed niepogrupowany), punkt kontrolny nie jest zapisywany. Wznowienie usuwa zakończone kanały
+    z mapowania, więc parser pomija je bez budowania krotek; łączenie SAT jest brane z poprzedniego przebiegu."""
+    def __init__(self, path=CHECKPOINT_FILE, max_age=CHECKPOINT_MAX_AGE, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.max_age = max_age
+        self.interval = interval
+        self.key = None            # None = import bez punktów kontrolnych (stream, kilka źródeł)
+        self.loaded = False        # wznowienie poprzedniego przebiegu
+        self.reason = "none"
+        self.expected = None       # skrót mapowania z poprzedniego przebiegu
+        self.mapping = None
+        self.done = set()          # kanały zakończone w poprzednich przebiegach
+        self.closed = set()        # ... w tym przebiegu
+        self.groups = {}           # kanał -> refy przekazane do injectora (czy już w EPG: injector.uncommitted)
+        self.current = None
+        self.grouped = True
+        self.sample = []
+        self.sat_refs = None
+        self.skipped = 0
+        self.saves = 0
+        self.injector = None
+        self.last_save = time.monotonic()
+
+    def load(self, key):
+        # True = zgodny punkt kontrolny, import będzie wznowiony
+        self.key = key
+        if key is None: return False
+        try:
+            with open(self.path, 'r') as f: data = json.load(f)
+        except: return False
+        if data.get('version') != CHECKPOINT_VERSION or data.get('key') != key: self.discard("different file or settings")
+        elif time.time() - data.get('saved', 0) > self.max_age: self.discard("too old")
+        else:
+            self.loaded = True; self.reason = "resumed"
+            self.done = set(data.get('channels', []))
+            self.expected = data.get('mapping')
+            self.sample = data.get('refs', [])
+            self.sat_refs = data.get('sat_refs')
+        return self.loaded
+
+    def discard(self, reason, keep_sat=False):
+        # Pełny import; punkt kontrolny tego przebiegu budowany od zera (keep_sat: łączenie SAT nadal aktualne)
+        self.loaded = False; self.reason = reason
+        self.done = set(); self.expected = None; self.sample = []
+        if not keep_sat: self.sat_refs = None
+        self.clear()
+
+    def sample_refs(self):
+        # Refy do sprawdzenia, czy EPG enigmy wciąż trzyma to, co zapisał przerwany przebieg
+        return self.sample[:SAMPLE_REFS] + (self.sat_refs or [])[:1]
+
+    def apply(self, mapping):
+        # Wołane z gotowym mapowaniem (nagłówek <channel>); inne mapowanie niż przy zapisie = kanały od nowa
+        self.mapping = mapping_digest(mapping)
+        if self.loaded and self.mapping != self.expected: self.discard("mapping changed", keep_sat=True)
+        if not self.done: return mapping
+        self.skipped = sum(1 for chid in mapping if chid in self.done)
+        return {chid: refs for chid, refs in mapping.items() if chid not in self.done}
+
+    def bind(self, injector): self.injector = injector
+
+    def track(self, chid, refs):
+        # pump_batches(on_batch=...): wątek injectora, blok właśnie przekazany do injectora
+        if chid != self.current:
+            if self.current is not None: self.closed.add(self.current)
+            if chid in self.closed and self.grouped:
+                self.grouped = False; self.clear()
+            self.current = chid
+        self.groups[chid] = tuple(refs)
+        if refs and len(self.sample) < SAMPLE_REFS and refs[0] not in self.sample: self.sample.append(refs[0])
+        if time.monotonic() - self.last_save >= self.interval: self.save()
+
+    def save(self, commit=True):
+        # Najpierw commit injectora: kanały z pliku są już w EPG, zanim trafią do punktu kontrolnego.
+        # Przy przerwaniu (commit=False) bez czekania na commit - tylko kanały, których nic nie zostało w injectorze
+        self.last_save = time.monotonic()
+        if self.key is None or not self.grouped: return False
+        if self.injector and commit: self.injector.commit()
+        committed = self.committed()
+        # Próbka do sprawdzenia przy wznowieniu tylko z usług, które są już w EPG
+        pending = {ref for chid, refs in self.groups.items() if chid not in committed for ref in refs}
+        data = {'version': CHECKPOINT_VERSION, 'saved': int(time.time()), 'key': self.key, 'mapping': self.mapping,
+                'channels': sorted(self.done | committed), 'refs': [r for r in self.sample if r not in pending][:SAMPLE_REFS],
+                'sat_refs': self.sat_refs}
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f: json.dump(data, f)
+            os.replace(tmp, self.path)
+        except: return False
+        self.saves += 1
+        return True
+
+    def committed(self):
+        if not self.injector: return set(self.closed)
+        return {chid for chid in self.closed if not self.injector.uncommitted(self.groups.get(chid, ()))}
+
+    def clear(self):
+        try: os.remove(self.path)
+        except OSError: pass
+
+    def summary(self):
+        done = len(self.committed())
+        text = f"{self.reason}, channels done {len(self.done) + done} ({done} in this run), saves {self.saves}"
+        if self.skipped: text += f", skipped {self.skipped} in mapping"
+        if not self.grouped: text += ", feed not grouped by channel - no resume"
+        return text
@@ -0,0 +1,91 @@
+# Indeks nazw kanałów - zastępuje liniowe "name in key or key in name" (O(N*M))
+# Klucze to już znormalizowane nazwy (bez spacji), wartości to xml_id / sat_ref.
+
+class NameIndex:
+    """Indeks budowany raz na przebieg. Odpowiada na:
+    - lookup(key): dokładne trafienie (jak dict.get),
+    - find(query): klucz zawierający query lub w nim zawarty.
+    Kandydaci 'zawiera' pochodzą z list trigramów, 'zawarty w' z podciągów zapytania,
+    więc zapytanie nie skanuje wszystkich kluczy.
+    Remis: najmniejsza różnica długości, potem kolejność dodania klucza."""
+
+    def __init__(self, items=None, min_len=2):
+        self.min_len = min_len
+        self.keys = []      # id -> klucz
+        self.values = []    # id -> wartość
+        self.ids = {}       # klucz -> id
+        self.grams = {}     # trigram -> [id] (rosnąco)
+        self.short = []     # id kluczy krótszych niż 3 znaki (bez trigramów)
+        if items:
+            for key, value in items: self.add(key, value)
+
+    def __len__(self): return len(self.keys)
+
+    def add(self, key, value):
+        # Puste/krótkie klucze pomijamy ('' byłby "zawarty" w każdej nazwie)
+        if not key or len(key) < self.min_len: return
+        idx = self.ids.get(key)
+        if idx is not None:
+            # Semantyka dict: ostatnia wartość wygrywa, pozycja zostaje
+            self.values[idx] = value
+            return
+        idx = len(self.keys)
+        self.keys.append(key); self.values.append(value); self.ids[key] = idx
+        if len(key) < 3:
+            self.short.append(idx)
+            return
+        for g in {key[i:i + 3] for i in range(len(key) - 2)}:
+            self.grams.setdefault(g, []).append(idx)
+
+    def lookup(self, key):
+        idx = self.ids.get(key)
+        return None if idx is None else self.values[idx]
+
+    def find(self, query, max_len_diff=None):
+        """Wartość najlepszego klucza, który zawiera query lub jest w nim zawarty
+        (z |len(klucz) - len(query)| <= max_len_diff, jeśli podano). None gdy brak."""
+        idx = self.find_id(query, max_len_diff)
+        return None if idx is None else self.values[idx]
+
+    def find_id(self, query, max_len_diff=None):
+        if not query: return None
+        idx = self.ids.get(query)
+        if idx is not None: return idx
+        n = len(query)
+        best = None  # (różnica długości, id)
+
+        # 1) Klucze zawarte w zapytaniu: podciągi query (od najdłuższych)
+        lo = self.min_len if max_len_diff is None else max(self.min_len, n - max_len_diff)
+        ids = self.ids
+        for size in range(n - 1, lo - 1, -1):
+            found = None
+            for i in range(n - size + 1):
+                idx = ids.get(query[i:i + size])
+                if idx is not None and (found is None or idx < found): found = idx
+            if found is not None:
+                best = (n - size, found)
+                break
+
+        # 2) Klucze zawierające zapytanie: najrzadszy trigram + weryfikacja
+        hi = None if max_len_diff is None else n + max_len_diff
+        if best is not None:
+            # Dłuższy klucz musi mieć mniejszą (lub równą, z niższym id) różnicę
+            hi = n + best[0] if hi is None else min(hi, n + best[0])
+        if n >= 3:
+            postings = None
+            for g in {query[i:i + 3] for i in range(n - 2)}:
+                p = self.grams.get(g)
+                if p is None: return None if best is None else best[1]
+                if postings is None or len(p) < len(postings): postings = p
+            candidates = postings
+        else:
+            candidates = range(len(self.keys))
+        keys = self.keys
+        for idx in candidates:
+            k = keys[idx]
+            size = len(k)
+            if size <= n or (hi is not None and size > hi): continue
+            if query in k:
+                cand = (size - n, idx)
+                if best is None or cand < best: best = cand
+        return None if best is None else best[1]
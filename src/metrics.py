@@ -0,0 +1,177 @@
+# Pomiary importu: czasy etapów (zegar + CPU), liczniki, opóźnienia wywołań; zapis JSON per przebieg.
+# Opcjonalnie profilowanie: cProfile (wątek importu + wątki opakowane przez profiled) albo tracemalloc.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+thread_time = getattr(time, 'thread_time', time.process_time)
+
+METRICS_PREFIX = "epg_metrics_"
+KEEP_RUNS = 10
+
+class Latency:
+    # Licznik wywołań: liczba, suma, maksimum i przedziały (ms) - bez trzymania każdej próbki
+    BUCKETS = (1, 5, 20, 100, 500, 2000)
+    def __init__(self):
+        self.count = 0; self.total = 0.0; self.max = 0.0
+        self.hist = [0] * (len(self.BUCKETS) + 1)
+    def add(self, seconds):
+        self.count += 1; self.total += seconds
+        if seconds > self.max: self.max = seconds
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.BUCKETS) and ms > self.BUCKETS[i]: i += 1
+        self.hist[i] += 1
+    def to_dict(self):
+        labels = [f"<={b}ms" for b in self.BUCKETS] + [f">{self.BUCKETS[-1]}ms"]
+        return {'count': self.count, 'total_s': round(self.total, 4), 'avg_ms': round(self.total * 1000 / max(self.count, 1), 3),
+                'max_ms': round(self.max * 1000, 3), 'histogram': dict(zip(labels, self.hist))}
+
+class RunMetrics:
+    def __init__(self, profile="off"):
+        self.started = time.time()
+        self.stages = {}
+        self.order = []
+        self.nested = {}       # etap -> etap nadrzędny (czas już odjęty od nadrzędnego)
+        self._active = {}      # etap w toku -> wątek
+        self.counters = {}
+        self.latencies = {}
+        self.profile_mode = profile
+        self.lock = threading.Lock()
+        self._profiles = []
+        self._profiler = None
+        self.profile_files = []
+
+    @contextmanager
+    def stage(self, name, within=None):
+        # Czas etapu; ten sam etap mierzony kilka razy jest sumowany. CPU = thread_time wątku, który mierzy
+        # (process_time liczyłby też procesy/wątki GUI). within: etap zagnieżdżony w innym (np. mapowanie
+        # w parsowaniu) - jego czas jest odejmowany od etapu nadrzędnego, więc etapy sumują się do całości
+        ident = threading.get_ident()
+        with self.lock: self._active[name] = ident
+        w0 = time.perf_counter(); c0 = thread_time()
+        try: yield
+        finally:
+            wall = time.perf_counter() - w0; cpu = thread_time() - c0
+            with self.lock: self._active.pop(name, None)
+            self.add_stage(name, wall, cpu, within=within, ident=ident)
+
+    def add_stage(self, name, wall, cpu=0.0, within=None, ident=None):
+        with self.lock:
+            st = self._entry(name)
+            st['wall_s'] += wall; st['cpu_s'] += cpu
+            if within:
+                self.nested[name] = within
+                parent = self._entry(within)
+                parent['wall_s'] -= wall
+                # CPU innego wątku nie wchodzi do CPU etapu nadrzędnego
+                if ident is not None and self._active.get(within) == ident: parent['cpu_s'] -= cpu
+
+    def _entry(self, name):
+        st = self.stages.get(name)
+        if st is None:
+            st = self.stages[name] = {'wall_s': 0.0, 'cpu_s': 0.0}
+            self.order.append(name)
+        return st
+
+    def set(self, **counters):
+        with self.lock: self.counters.update(counters)
+
+    def latency(self, name):
+        with self.lock:
+            lat = self.latencies.get(name)
+            if lat is None: lat = self.latencies[name] = Latency()
+            return lat
+
+    # --- PROFILOWANIE (opcjonalne) ---
+    def start_profile(self):
+        if self.profile_mode == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile(); self._profiler.enable()
+        elif self.profile_mode == "tracemalloc":
+            import tracemalloc
+            tracemalloc.start(10)
+
+    def profiled(self, fn):
+        # Funkcja wątku pomocniczego (np. parser w pump_batches): jego CPU (z mapowaniem) w helper_threads_cpu_s;
+        # cProfile mierzy tylko swój wątek - przy profilowaniu dostaje osobny profiler
+        def run(*args, **kwargs):
+            c0 = thread_time()
+            try:
+                if self.profile_mode != "cprofile": return fn(*args, **kwargs)
+                import cProfile
+                prof = cProfile.Profile()
+                try: return prof.runcall(fn, *args, **kwargs)
+                finally:
+                    with self.lock: self._profiles.append(prof)
+            finally:
+                with self.lock: self.counters['helper_threads_cpu_s'] = round(self.counters.get('helper_threads_cpu_s', 0) + thread_time() - c0, 4)
+        return run
+
+    def stop_profile(self, out_dir):
+        stamp = self.stamp()
+        try:
+            if self.profile_mode == "cprofile" and self._profiler:
+                import io, pstats
+                self._profiler.disable()
+                stats = pstats.Stats(self._profiler)
+                for prof in self._profiles: stats.add(prof)
+                path = os.path.join(out_dir, f"epg_profile_{stamp}.prof")
+                stats.dump_stats(path)
+                text = io.StringIO()
+                pstats.Stats(path, stream=text).sort_stats('cumulative').print_stats(40)
+                with open(path[:-5] + ".txt", 'w') as f: f.write(text.getvalue())
+                self.profile_files = [path, path[:-5] + ".txt"]
+            elif self.profile_mode == "tracemalloc":
+                import tracemalloc
+                if tracemalloc.is_tracing():
+                    current, peak = tracemalloc.get_traced_memory()
+                    top = tracemalloc.take_snapshot().statistics('lineno')[:25]
+                    tracemalloc.stop()
+                    self.counters['tracemalloc_peak_bytes'] = peak
+                    self.counters['tracemalloc_top'] = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size} B x{s.count}" for s in top]
+        except Exception as e:
+            self.counters['profile_error'] = str(e)
+
+    # --- WYNIK ---
+    def to_dict(self):
+        return {'started': int(self.started), 'duration_s': round(time.time() - self.started, 3),
+                'stages': {n: dict({k: round(v, 4) for k, v in self.stages[n].items()}, **({'within': self.nested[n]} if n in self.nested else {}))
+                           for n in self.order},
+                'counters': self.counters, 'latency': {n: l.to_dict() for n, l in self.latencies.items()},
+                'profile': self.profile_mode, 'profile_files': self.profile_files}
+
+    def stamp(self):
+        # Milisekundy w nazwie: dwa przebiegi w tej samej sekundzie nie nadpisują swoich plików
+        return time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started)) + f"_{int(self.started * 1000) % 1000:03d}"
+
+    def save(self, out_dir):
+        # Plik JSON na przebieg (najnowsze KEEP_RUNS zostają)
+        path = os.path.join(out_dir, f"{METRICS_PREFIX}{self.stamp()}.json")
+        try:
+            with open(path, 'w') as f: json.dump(self.to_dict(), f, indent=1)
+            old = sorted(n for n in os.listdir(out_dir) if n.startswith(METRICS_PREFIX) and n.endswith('.json'))
+            for name in old[:-KEEP_RUNS]: os.remove(os.path.join(out_dir, name))
+        except: return None
+        return path
+
+    def summary(self):
+        # Krótkie linie do panelu statusu
+        parts = [f"{n} {s['wall_s']:.1f}s" + (f" (in {self.nested[n]})" if n in self.nested else "") for n, s in ((n, self.stages[n]) for n in self.order)]
+        lines = [" | ".join(parts)]
+        c = self.counters
+        if c.get('programmes_seen'):
+            lines.append(f"XML: {c.get('programmes_seen')} prog, kept {c.get('programmes_kept', 0)}, "
+                         f"dropped {c.get('programmes_dropped', 0)}, {c.get('events_per_s', 0):.0f} ev/s")
+        lat = self.latencies.get('importEvents')
+        if lat and lat.count:
+            lines.append(f"importEvents: {lat.count} calls, avg {lat.total * 1000 / lat.count:.1f} ms, max {lat.max * 1000:.0f} ms")
+        gui = c.get('reactor_lag_ms')
+        if gui and gui.get('samples'):
+            line = f"GUI lag p50 {gui['p50']} / p95 {gui['p95']} / p99 {gui['p99']} / max {gui['max']} ms"
+            th = c.get('throttle')
+            if th: line += f", throttle {th['mode']}: {th['yields']} yields, slept {th['slept_s']} s"
+            lines.append(line)
+        return lines
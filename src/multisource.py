@@ -0,0 +1,89 @@
+# Import z wielu źródeł: równoległe pobieranie, potem źródła po kolei wg priorytetu przez zwykły
+# potok parser -> kolejka -> injector (parsowanie w procesach xmltvchunks, jak przy jednym źródle).
+# Zdarzenia niższego priorytetu przechodzą tylko tam, gdzie nie nachodzą na wyższe.
+import bisect
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+OVERLAP_TOLERANCE = 120  # s - krótsze nakładanie się nie jest traktowane jako konflikt
+MAX_WORKERS = 4
+
+def run_parallel(fn, items, workers=2):
+    # fn(item) dla każdego elementu w ograniczonej puli wątków (pobieranie - czekanie na sieć); wyniki w kolejności items
+    if not items: return []
+    workers = max(1, min(int(workers), MAX_WORKERS, len(items)))
+    if workers == 1: return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+def union(starts, ends, intervals):
+    # Suma posortowanych rozłącznych przedziałów i nowych (dowolnych) -> posortowane, rozłączne tablice
+    out_s = array('q'); out_e = array('q')
+    for s, e in sorted(list(zip(starts, ends)) + intervals):
+        if out_e and s <= out_e[-1]:
+            if e > out_e[-1]: out_e[-1] = e
+        else:
+            out_s.append(s); out_e.append(e)
+    return out_s, out_e
+
+class MergeStats:
+    def __init__(self, sources=0):
+        # Obie wartości w zdarzeniach na usługach (zdarzenie x liczba refów), jak licznik importu
+        self.kept = [0] * sources       # przyjęte z każdego źródła
+        self.overlaps = [0] * sources   # odrzucone jako nakładające się na źródło o wyższym priorytecie
+
+class SourceMerger:
+    """Scalanie strumieniowe: filter() stoi między parserem źródła a resztą potoku. W pamięci zostają
+    tylko przedziały czasu zdarzeń przyjętych ze źródeł o wyższym priorytecie - per zestaw usług,
+    jako suma przedziałów (rozłączna także wtedy, gdy źródło samo ma nakładające się programy).
+    Zdarzenia bieżącego źródła są porównywane wyłącznie z wcześniejszymi źródłami; do sumy
+    dochodzą w begin() następnego źródła. Usługi z tą samą historią dzielą jeden zestaw przedziałów."""
+    def __init__(self, sources, tolerance=OVERLAP_TOLERANCE):
+        self.tolerance = tolerance
+        self.stats = MergeStats(sources)
+        self.ref_set = {}     # ref -> id zestawu przedziałów (źródła już zakończone)
+        self.sets = {}        # id -> (starts, ends)
+        self.pending = {}     # (id zestawu, kanał bieżącego źródła) -> [refy, [(start, koniec)]]
+        self.next_id = 0
+        self.index = 0
+
+    def begin(self, index):
+        # Nowe źródło: przyjęte zdarzenia poprzedniego wchodzą do sum przedziałów
+        for (set_id, chid), (refs, intervals) in self.pending.items():
+            starts, ends = self.sets.get(set_id, ((), ()))
+            self.sets[self.next_id] = union(starts, ends, intervals)
+            for ref in refs: self.ref_set[ref] = self.next_id
+            self.next_id += 1
+        self.pending = {}
+        used = set(self.ref_set.values())
+        for set_id in [s for s in self.sets if s not in used]: del self.sets[set_id]
+        self.index = index
+
+    def filter(self, batches):
+        si = self.index
+        for chid, refs, events in batches:
+            by_set = {}
+            for ref in refs: by_set.setdefault(self.ref_set.get(ref), []).append(ref)
+            for set_id, group in by_set.items():
+                added = events if set_id is None else self._free(set_id, events)
+                self.stats.kept[si] += len(added) * len(group)
+                self.stats.overlaps[si] += (len(events) - len(added)) * len(group)
+                if not added: continue
+                entry = self.pending.setdefault((set_id, chid), [set(), []])
+                entry[0].update(group)
+                entry[1].extend((ev[0], ev[0] + ev[1]) for ev in added)
+                yield chid, group, added
+
+    def _free(self, set_id, events):
+        # Zdarzenia bez konfliktu z sumą przedziałów (tolerancja z obu stron)
+        starts, ends = self.sets[set_id]
+        tol = self.tolerance
+        out = []
+        for ev in events:
+            start = ev[0] + tol; end = ev[0] + ev[1] - tol
+            # Pierwszy przedział kończący się po starcie (sąsiad z lewej lub obejmujący start)
+            # i czy zaczyna się przed końcem zdarzenia (sąsiad z prawej)
+            i = bisect.bisect_right(ends, start)
+            if i < len(starts) and starts[i] < end: continue
+            out.append(ev)
+        return out
@@ -0,0 +1,42 @@
+# Wspólna normalizacja nazw kanałów (SAT, IPTV, XMLTV id / display-name)
+# Tablice zamian skompilowane raz: translate() dla znaków + jeden regex dla "śmieci".
+import re
+from functools import lru_cache
+
+NAME_CACHE_SIZE = 32768
+
+REPLACEMENTS = {'+': 'PLUS', '&': 'AND', '24': 'TWENTYFOUR', 'Ł': 'L', 'Ś': 'S', 'Ć': 'C', 'Ż': 'Z', 'Ź': 'Z', 'Ą': 'A', 'Ę': 'E', 'Ó': 'O', 'Ń': 'N'}
+TRASH = ['FULLHD', 'FHD', 'UHD', '4K', 'HEVC', 'H265', 'H.265', 'HD', 'SD', 'PL', 'POL', '(PL)', '[PL]', 'VIP', 'RAW', 'VOD', 'XXX', 'PREMIUM', 'BACKUP', 'TEST', 'SUB', 'DUB', 'LEKTOR', 'OTV', 'V2', 'V3', 'ORG', 'PL:', '|PL|', '[STREAM]', '(TV)', '[YT]', '(YT)', 'TV', 'CHANNEL', 'LIVE', 'POLSKA', 'KANAL', 'POLAND', 'INTERNATIONAL', 'EU', 'EUROPE']
+
+def _trie_pattern(words):
+    # Alternatywa w postaci drzewa prefiksów (F(?:HD|ULLHD)...) - regex nie próbuje
+    # po kolei wszystkich ~45 słów na każdej pozycji; dłuższe dopasowanie wygrywa.
+    trie = {}
+    for w in words:
+        node = trie
+        for c in w: node = node.setdefault(c, {})
+        node[''] = True
+    def build(node):
+        alts = [re.escape(c) + build(node[c]) for c in sorted(k for k in node if k)]
+        if not alts: return ''
+        body = alts[0] if len(alts) == 1 and '' not in node else '(?:' + '|'.join(alts) + ')'
+        return body + ('?' if '' in node else '')
+    return build(trie)
+
+# Zamiany jednoznakowe -> tablica translate; jedyna wieloznakowa ('24') -> str.replace
+_TRANSLATE = str.maketrans({k: v for k, v in REPLACEMENTS.items() if len(k) == 1})
+_MULTI = [(k, v) for k, v in REPLACEMENTS.items() if len(k) > 1]
+# Jeden przebieg: tagi + wszystko poza A-Z0-9
+_PATTERN = re.compile(_trie_pattern(TRASH) + r'|[^A-Z0-9]+')
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def core_name(name):
+    """Klucz porównania nazwy kanału: wielkie litery, bez polskich znaków,
+    bez tagów jakości/języka (HD, FHD, VIP, PL...) i znaków spoza A-Z0-9.
+    Wynik zapamiętywany w ograniczonym LRU (klucz: surowa nazwa)."""
+    if not name: return ""
+    name = name.upper().translate(_TRANSLATE)
+    for old, new in _MULTI: name = name.replace(old, new)
+    return _PATTERN.sub('', name)
+
+def clear_cache(): core_name.cache_clear()
@@ -12,15 +12,12 @@ from twisted.internet import reactor
 from twisted.web.client import getPage
 import threading
 import os
-import json
 import time
-import shutil
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from .statuslog import get_log, StatusBuffer
 
-# Importy lokalne
-from .epgcore import EPGParser, EPGInjector, download_file, inject_sat_fallback, inject_sat_clone_by_name, check_url_alive
-from .automapper import AutoMapper
+# Silniki (epgcore, automapper, ...) importujemy dopiero przy użyciu (przycisk / timer), nie przy starcie GUI:
+# ciągną xml.etree, gzip, ssl, urllib, subprocess i wiązania EPG enigmy. Pomiar: tools/bench_startup.py
 
 # --- KONFIGURACJA ---
 GITHUB_USER = "OliOli2013"
@@ -47,7 +44,23 @@ TR = {
     "help_arrows": { "pl": "< Zmień źródło strzałkami Lewo/Prawo >", "en": "< Change source using Left/Right arrows >" },
     "source_label": { "pl": "Wybierz Źródło EPG:", "en": "Select EPG Source:" },
     "custom_label": { "pl": "   >> Wpisz własny URL:", "en": "   >> Enter Custom URL:" },
+    "extra_sources_label": { "pl": "Dodatkowe źródła (URL, po spacji):", "en": "Extra sources (URLs, space separated):" },
+    "parallel_label": { "pl": "   >> Równoległe pobieranie źródeł:", "en": "   >> Parallel source downloads:" },
     "map_file_label": { "pl": "Plik mapowania (Cache):", "en": "Mapping File (Cache):" },
+    "past_label": { "pl": "Zachowaj minione programy (godz.):", "en": "Keep past programmes (hours):" },
+    "days_label": { "pl": "Importuj EPG na dni do przodu:", "en": "Import EPG days ahead:" },
+    "mode_label": { "pl": "Tryb importu:", "en": "Import mode:" },
+    "cache_dir_label": { "pl": "Katalog kopii pliku EPG:", "en": "EPG file cache directory:" },
+    "delta_label": { "pl": "Import przyrostowy (tylko zmiany):", "en": "Incremental import (changes only):" },
+    "store_label": { "pl": "Zapis EPG do szybkiego odtworzenia:", "en": "Keep EPG store for fast reload:" },
+    "store_dir_label": { "pl": "   >> Katalog magazynu EPG:", "en": "   >> EPG store directory:" },
+    "backend_label": { "pl": "Parser XML:", "en": "XML parser:" },
+    "parse_workers_label": { "pl": "Procesy parsowania XML (rdzenie):", "en": "XML parse processes (cores):" },
+    "profile_label": { "pl": "Profilowanie importu (diagnostyka):", "en": "Import profiling (diagnostics):" },
+    "latency_label": { "pl": "Maks. czas jednego zapisu EPG (ms):", "en": "Max time per EPG write (ms):" },
+    "budget_label": { "pl": "Bufor importu (zdarzeń EPG):", "en": "Import buffer (EPG events):" },
+    "throttle_label": { "pl": "Import w tle (oszczędzanie CPU dla TV):", "en": "Background import (spare CPU for TV):" },
+    "recording_label": { "pl": "   >> Wstrzymaj import podczas nagrywania:", "en": "   >> Pause import while recording:" },
     "autoupdate_label": { "pl": "Auto-Aktualizacja (co 24h):", "en": "Auto-Update (every 24h):" },
     "btn_hide": { "pl": "Ukryj w tle", "en": "Hide in background" }, 
     "btn_import": { "pl": "Importuj EPG", "en": "Import EPG" },
@@ -55,6 +68,7 @@ TR = {
     "btn_update": { "pl": "Aktualizuj Wtyczkę", "en": "Update Plugin" },
     "status_ready": { "pl": "Gotowy. Wybierz opcję z menu poniżej.\n", "en": "Ready. Select an option from the menu below.\n" },
     "downloading": { "pl": "Pobieranie pliku EPG...", "en": "Downloading EPG file..." },
+    "not_modified": { "pl": "Plik EPG bez zmian na serwerze (304) - używam poprzedniej kopii.", "en": "EPG file unchanged on server (304) - using previous copy." },
     "success": { "pl": "ZAKOŃCZONO!\nZaimportowano XML: {} | Połączono z SAT: {}", "en": "SUCCESS!\nXML Imported: {} | SAT Linked: {}" },
     "restart_title": { "pl": "EPG Zaktualizowane pomyślnie!\nWymagany restart GUI. Zrestartować teraz?", "en": "EPG Updated Successfully!\nGUI Restart required. Restart now?" },
     "mapping_start": { "pl": "Rozpoczynam mapowanie kanałów...", "en": "Starting channel mapping process..." },
@@ -66,7 +80,11 @@ TR = {
     "update_start": { "pl": "Pobieranie i instalowanie aktualizacji...", "en": "Downloading and installing update..." },
     "update_done": { "pl": "Aktualizacja zakończona sukcesem!\nWymagany restart GUI.", "en": "Update successful!\nGUI Restart is required." },
     "update_fail": { "pl": "Aktualizacja nieudana. Sprawdź połączenie lub logi.", "en": "Update failed. Check internet connection or logs." },
-    "timeout_error": { "pl": "BŁĄD: Przekroczono limit czasu (45 min)! Plik jest zbyt duży.", "en": "ERROR: Timeout (45 min)! Source file is too big." },
+    "timeout_error": { "pl": "BŁĄD: Przekroczono limit czasu (45 min)! Import przerwany - kolejny wznowi od miejsca przerwania.", "en": "ERROR: Timeout (45 min)! Import stopped - the next one resumes where it stopped." },
+    "cancel_question": { "pl": "Import EPG trwa. Przerwać go?\n(Kolejny import wznowi od miejsca przerwania)", "en": "EPG import is running. Stop it?\n(The next import resumes where it stopped)" },
+    "cancelling": { "pl": "Przerywanie importu...", "en": "Stopping import..." },
+    "import_cancelled": { "pl": "Import przerwany. Postęp zapisany.", "en": "Import stopped. Progress saved." },
+    "resuming": { "pl": "Wznawianie przerwanego importu (pominięte kanały: {})...", "en": "Resuming interrupted import ({} channels already done)..." },
     "import_crash": { "pl": "CRASH: Wystąpił błąd krytyczny: {}", "en": "CRASH: Critical error: {}" },
     "xml_url_dead": { "pl": "BŁĄD: Wybrane źródło XML jest niedostępne (Offline/404)!", "en": "ERROR: Selected XML Source is unreachable (Offline/404)!" },
     "sat_smart_match": { "pl": "Inteligentne łączenie (SAT <-> IPTV)...", "en": "Smart Linking (SAT <-> IPTV)..." },
@@ -93,82 +111,399 @@ EPG_SOURCES = [
 
 config.plugins.SimpleIPTV_EPG.source_select = ConfigSelection(default="https://epgshare01.online/epgshare01/epg_ripper_PL1.xml.gz", choices=EPG_SOURCES)
 config.plugins.SimpleIPTV_EPG.custom_url = ConfigText(default="http://", fixed_size=False, visible_width=80)
-config.plugins.SimpleIPTV_EPG.mapping_file = ConfigText(default="/etc/enigma2/iptv_mapping.json", fixed_size=False)
+config.plugins.SimpleIPTV_EPG.mapping_file = ConfigText(default="/etc/enigma2/iptv_mapping.cache.json", fixed_size=False)
+config.plugins.SimpleIPTV_EPG.past_hours = ConfigSelection(default="3", choices=[("0", "0"), ("1", "1"), ("3", "3"), ("6", "6"), ("12", "12"), ("24", "24")])
+config.plugins.SimpleIPTV_EPG.days_ahead = ConfigSelection(default="7", choices=[(str(d), str(d)) for d in (1, 2, 3, 5, 7, 10, 14)])
+config.plugins.SimpleIPTV_EPG.delta_import = ConfigYesNo(default=True)
+config.plugins.SimpleIPTV_EPG.epg_store = ConfigYesNo(default=True)
+config.plugins.SimpleIPTV_EPG.store_dir = ConfigText(default="/etc/enigma2", fixed_size=False)
+config.plugins.SimpleIPTV_EPG.parser_backend = ConfigSelection(default="auto", choices=[("auto", "Auto"), ("expat", "expat"), ("iterparse", "ElementTree"), ("lxml", "lxml")])
+config.plugins.SimpleIPTV_EPG.parse_workers = ConfigSelection(default="1", choices=[("1", "1"), ("2", "2"), ("3", "3"), ("4", "4")])
+config.plugins.SimpleIPTV_EPG.profile_mode = ConfigSelection(default="off", choices=[("off", "Off"), ("cprofile", "cProfile"), ("tracemalloc", "tracemalloc")])
+config.plugins.SimpleIPTV_EPG.commit_latency = ConfigSelection(default="50", choices=[("20", "20"), ("50", "50"), ("100", "100"), ("250", "250")])
+config.plugins.SimpleIPTV_EPG.event_budget = ConfigSelection(default="50000", choices=[("20000", "20000"), ("50000", "50000"), ("100000", "100000"), ("200000", "200000")])
+config.plugins.SimpleIPTV_EPG.import_mode = ConfigSelection(default="download", choices=[("download", "Download + Parse"), ("stream", "Stream (no temp file)"), ("stream_tee", "Stream + keep copy")])
+config.plugins.SimpleIPTV_EPG.cache_dir = ConfigText(default="/tmp", fixed_size=False)
+config.plugins.SimpleIPTV_EPG.extra_sources = ConfigText(default="", fixed_size=False, visible_width=80)
+config.plugins.SimpleIPTV_EPG.parallel_sources = ConfigSelection(default="2", choices=[("1", "1"), ("2", "2"), ("3", "3"), ("4", "4")])
+config.plugins.SimpleIPTV_EPG.throttle_mode = ConfigSelection(default="normal", choices=[("off", "Off"), ("light", "Light"), ("normal", "Normal"), ("strong", "Strong")])
+config.plugins.SimpleIPTV_EPG.pause_recording = ConfigYesNo(default=True)
 config.plugins.SimpleIPTV_EPG.auto_update = ConfigYesNo(default=False)
 config.plugins.SimpleIPTV_EPG.last_update = ConfigText(default="0", fixed_size=False)
 
 def write_log(msg):
-    try:
-        with open("/tmp/simple_epg.log", "a") as f:
-            f.write(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}\n")
-    except: pass
+    # Bufor w pamięci, zapis do /tmp/simple_epg.log co kilka sekund (z rotacją) - patrz statuslog
+    get_log().write(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
-def save_json(data, path):
+def is_recording():
+    # Wołane tylko w wątku reaktora (ReactorProbe)
     try:
-        with open(path, 'w') as f: json.dump(data, f, indent=4)
-    except: pass
+        import NavigationInstance
+        return bool(NavigationInstance.instance.getRecordings())
+    except: return False
 
 class EPGWorker:
     def __init__(self):
         self.lock = threading.Lock()
-        
+        self.throttle = None
+        self.cancel = None
+
     def get_url(self):
         val = config.plugins.SimpleIPTV_EPG.source_select.value
         return config.plugins.SimpleIPTV_EPG.custom_url.value if val == "CUSTOM" else val
+
+    def get_urls(self):
+        # Źródło główne + dodatkowe (kolejność = priorytet przy scalaniu)
+        urls = [self.get_url()]
+        extra = config.plugins.SimpleIPTV_EPG.extra_sources.value.replace(',', ' ').replace(';', ' ').split()
+        for u in extra:
+            if u.startswith(('http://', 'https://')) and u not in urls: urls.append(u)
+        return urls
     
-    def run_import(self, callback_log=None, silent=False):
-        url = self.get_url()
+    def get_mapping_file(self, index=0):
+        # Cache mapowania z ustawień - ten sam plik dla "Mapuj Kanały" i importu
+        from .automapper import mapping_cache_file
+        return mapping_cache_file(index, config.plugins.SimpleIPTV_EPG.mapping_file.value.strip())
+
+    def get_temp_path(self, url, index=0):
         ext = ".xml.gz" if ".gz" in url else ".xml"
-        temp_path = "/tmp/epg_temp" + ext
-        injector = EPGInjector()
+        name = "epg_temp" + (f"_{index}" if index else "") + ext
+        return os.path.join(config.plugins.SimpleIPTV_EPG.cache_dir.value, name)
+
+    def new_injector(self, cancel=None):
+        from .epgcore import EPGInjector
+        # Przy dławieniu pojedyncze importEvents (trzyma GIL) nie dłuższe niż docelowe opóźnienie GUI
+        budget = int(config.plugins.SimpleIPTV_EPG.commit_latency.value) / 1000.0
+        if self.throttle: budget = min(budget, self.throttle.target / 1000.0)
+        injector = EPGInjector(max_buffered=int(config.plugins.SimpleIPTV_EPG.event_budget.value), latency_budget=budget)
+        injector.throttle = self.throttle
+        injector.cancel = cancel
+        return injector
+
+    def start_throttle(self):
+        # Pomiar opóźnienia GUI zawsze (także "off" - do porównania w metrykach), dławienie wg ustawień
+        from .throttle import ReactorProbe, Throttle
+        probe = ReactorProbe(reactor, recording=is_recording)
+        probe.start()
+        mode = config.plugins.SimpleIPTV_EPG.throttle_mode.value
+        if mode != "off":
+            self.throttle = Throttle(mode, probe, pause_recording=config.plugins.SimpleIPTV_EPG.pause_recording.value, log=write_log)
+            self.throttle.enter_thread()
+        return probe
+
+    def stop_throttle(self, probe, metrics=None):
+        probe.stop()
+        if metrics:
+            metrics.set(reactor_lag_ms=probe.report())
+            if self.throttle: metrics.set(throttle=self.throttle.stats())
+        self.throttle = None
+
+    def helper_prefix(self):
+        from .throttle import helper_prefix
+        return helper_prefix(self.throttle.nice) if self.throttle else ()
+
+    def get_store_path(self):
+        from .epgstore import STORE_FILE
+        return os.path.join(config.plugins.SimpleIPTV_EPG.store_dir.value, STORE_FILE)
+
+    def reload_from_store(self):
+        # Po starcie GUI: jeśli cache EPG nie ma już zdarzeń IPTV, wstrzykujemy je z magazynu (bez XML)
+        path = self.get_store_path()
+        if not config.plugins.SimpleIPTV_EPG.epg_store.value or not os.path.exists(path): return 0
+        try:
+            from .epgcore import epg_window, SatEpgLookup
+            from .epgstore import EPGStore, reload_store
+            window = epg_window(config.plugins.SimpleIPTV_EPG.past_hours.value, config.plugins.SimpleIPTV_EPG.days_ahead.value)
+            with EPGStore(path) as store: sample = store.sample_refs()
+            if sample and all(SatEpgLookup(window).get_many(sample).values()):
+                write_log("Store: EPG cache intact, reload not needed")
+                return 0
+            t0 = time.time()
+            probe = self.start_throttle()
+            try:
+                injector = self.new_injector()
+                count = reload_store(path, injector, min_end=window[0])
+            finally: self.stop_throttle(probe)
+            lag = probe.report()
+            write_log(f"Store: reloaded {count} events in {time.time() - t0:.1f} s ({injector.report()}), GUI lag p95 {lag.get('p95', 0)} ms")
+            return count
+        except Exception as e:
+            write_log(f"Store reload error: {e}")
+            return 0
+
+    def cancel_import(self, reason="user"):
+        # Z dowolnego wątku; import kończy bieżącą porcję pracy i zapisuje punkt kontrolny
+        cancel = self.cancel
+        if cancel: cancel.cancel(reason)
+
+    def fetch(self, url, temp_path, callback_log=None, cancel=None):
+        # Pobranie warunkowe/wznawiane; poprzednia kopia zostaje na kolejny import (304)
+        from .httpstream import fetch_feed
+        if callback_log: callback_log(_("downloading"))
+        write_log(f"Start Download: {url}")
+        res = fetch_feed(url, temp_path, retries=3, timeout=60, cancel=cancel)
+        write_log(f"Download: {res.summary()}" + (f" [{res.error}]" if res.error else ""))
+        if res.ok and callback_log and res.status == "not_modified": callback_log(_("not_modified"))
+        return res
+
+    def run_import(self, callback_log=None, silent=False, callback_progress=None):
+        # Pomiary etapów w każdym przebiegu; plik JSON w katalogu kopii EPG, podsumowanie w panelu.
+        # Zwraca True/False, None = przerwany (cancel_import, limit czasu) - postęp w punkcie kontrolnym.
+        # callback_log: linie statusu, callback_progress: postęp (kolejne komunikaty zastępują poprzedni)
+        from .metrics import RunMetrics
+        from .importstate import CancelToken, ImportCancelled
+        metrics = RunMetrics(profile=config.plugins.SimpleIPTV_EPG.profile_mode.value)
+        out_dir = config.plugins.SimpleIPTV_EPG.cache_dir.value
+        self.cancel = cancel = CancelToken()
+        metrics.start_profile()
+        probe = self.start_throttle()
+        if self.throttle: self.throttle.cancel = cancel
+        result = "failed"
+        try:
+            ok = self._run_import(metrics, cancel, callback_log, silent, callback_progress)
+            if ok: result = "ok"
+            return ok
+        except ImportCancelled as e:
+            result = "cancelled"
+            write_log(f"Import cancelled ({e})")
+            if callback_log: callback_log(_("import_cancelled"))
+            return None
+        except Exception as e:
+            # Np. przerwany plik XML (parser zgłasza błąd zamiast częściowego "sukcesu")
+            write_log(f"Import failed: {e}")
+            raise
+        finally:
+            self.cancel = None
+            self.stop_throttle(probe, metrics)
+            metrics.stop_profile(out_dir)
+            metrics.set(result=result)
+            path = metrics.save(out_dir)
+            for line in metrics.summary():
+                write_log(f"Metrics: {line}")
+                if callback_log: callback_log(line)
+            if path: write_log(f"Metrics file: {path}")
+            get_log().flush()
+
+    def _run_import(self, metrics, cancel, callback_log=None, silent=False, callback_progress=None):
+        with metrics.stage("load"):
+            from .epgcore import EPGParser, inject_sat_fallback, inject_sat_clone_by_name, check_url_alive, epg_window, pump_batches, SatEpgLookup
+            from .epgdelta import DeltaFilter
+            from .epgstore import EPGStoreWriter
+            from .automapper import AutoMapper
+            from .multisource import run_parallel, SourceMerger
+            from .servicecatalog import load_catalogue
+            from .importstate import ImportCheckpoint, ImportCancelled, source_key
+        urls = self.get_urls()
+        url = urls[0]
+        temp_path = self.get_temp_path(url)
+        budget = int(config.plugins.SimpleIPTV_EPG.event_budget.value)
+        workers = int(config.plugins.SimpleIPTV_EPG.parallel_sources.value)
+        injector = self.new_injector()
+        metrics.latencies['importEvents'] = injector.latency
         injected_refs = set()
 
         def progress_wrapper(msg):
-            if callback_log: callback_log(msg)
-
-        if not check_url_alive(url):
-            if callback_log: callback_log(_("xml_url_dead"))
-            return False
+            if callback_progress: callback_progress(msg)
+
+        # Tryb "stream": parser czyta odpowiedź HTTP w trakcie pobierania (bez pliku w /tmp),
+        # "stream_tee" dodatkowo zachowuje kopię pliku; "download": najpierw cały plik.
+        # Kilka źródeł: zawsze pobieranie (równoległe), potem parsowanie źródeł po kolei ze scalaniem.
+        mode = config.plugins.SimpleIPTV_EPG.import_mode.value
+        if len(urls) > 1:
+            paths = [self.get_temp_path(u, i) for i, u in enumerate(urls)]
+            with metrics.stage("download"):
+                fetch_one = lambda i: self.fetch(urls[i], paths[i], callback_log, cancel)
+                results = run_parallel(self.throttle.niced(fetch_one) if self.throttle else fetch_one, list(range(len(urls))), workers)
+            cancel.check()
+            metrics.set(sources=len(urls), download_bytes=sum(r.bytes for r in results), download_reused=sum(r.reused for r in results))
+            sources = [(i, paths[i]) for i, res in enumerate(results) if res.ok]
+            write_log(f"Sources: {len(sources)}/{len(urls)} available")
+            if not sources:
+                if callback_log: callback_log(_("xml_url_dead"))
+                return False
+        elif mode == "download":
+            # Dostępność sprawdza samo (warunkowe) zapytanie - bez osobnego HEAD
+            with metrics.stage("download"): res = self.fetch(url, temp_path, callback_log, cancel)
+            metrics.set(download_status=res.status, download_bytes=res.bytes, download_reused=res.reused)
+            cancel.check()
+            if not res.ok:
+                if callback_log: callback_log(_("xml_url_dead") if res.http_code >= 400 else "Download Error!")
+                return False
+            source, tee_path = temp_path, None
+        else:
+            with metrics.stage("head"): alive = check_url_alive(url)
+            if not alive:
+                if callback_log: callback_log(_("xml_url_dead"))
+                return False
+            write_log(f"Start Streaming ({mode})...")
+            source, tee_path = url, (temp_path if mode == "stream_tee" else None)
+
+        past_hours, days_ahead = config.plugins.SimpleIPTV_EPG.past_hours.value, config.plugins.SimpleIPTV_EPG.days_ahead.value
+        window = epg_window(past_hours, days_ahead)
+
+        # Punkt kontrolny (przerwany import tej samej kopii pliku): tylko pobrany plik z jednego źródła
+        checkpoint = ImportCheckpoint()
+        if len(urls) == 1 and mode == "download":
+            if checkpoint.load(source_key(url, temp_path, past_hours, days_ahead)):
+                if not all(SatEpgLookup(window).get_many(checkpoint.sample_refs()).values()):
+                    checkpoint.discard("EPG cache lost checkpointed events")
+                else:
+                    if callback_log: callback_log(_("resuming").format(len(checkpoint.done)))
+            write_log(f"Checkpoint: {checkpoint.reason}" + (f" ({len(checkpoint.done)} channels done)" if checkpoint.loaded else ""))
+        store = None
+        def stop_if_cancelled():
+            # Przerwanie: bez dokańczania commit injectora - punkt kontrolny tylko z kanałami już w EPG
+            if not cancel.cancelled(): return
+            if store: store.close(commit=False)
+            if checkpoint.save(commit=False): write_log(f"Checkpoint saved: {checkpoint.summary()}")
+            metrics.set(checkpoint=checkpoint.summary())
+            cancel.check()
 
         if callback_log: callback_log(_("sat_smart_match"))
-        cloned_refs = inject_sat_clone_by_name(injector, log_cb=progress_wrapper)
+        # Bukiety czytane raz (i tylko zmienione pliki) - wspólnie dla łączenia SAT i mapowania XML
+        with metrics.stage("catalogue"): catalogue = load_catalogue()
+        write_log(f"Catalogue: {catalogue.summary()}")
+        metrics.set(catalogue_services=len(catalogue.services), catalogue_bouquets_read=catalogue.files_read)
+        if checkpoint.sat_refs is not None:
+            # Łączenie SAT z przerwanego przebiegu jest już w EPG (sprawdzone próbką)
+            cloned_refs = set(checkpoint.sat_refs)
+            write_log(f"Checkpoint: SAT links from previous run ({len(cloned_refs)})")
+        else:
+            try:
+                with metrics.stage("sat_link"):
+                    cloned_refs = inject_sat_clone_by_name(injector, log_cb=callback_log, progress_cb=progress_wrapper, window=window, catalogue=catalogue, cancel=cancel)
+            except ImportCancelled: stop_if_cancelled(); raise
+            checkpoint.sat_refs = sorted(cloned_refs)
         injected_refs.update(cloned_refs)
+        metrics.set(sat_cloned=len(cloned_refs))
+        stop_if_cancelled()
         
-        if callback_log: callback_log(_("downloading"))
-        write_log("Start Download...")
-        
-        if not download_file(url, temp_path, retries=3, timeout=600):
-            if callback_log: callback_log("Download Error!")
-            return False
-            
-        mapper = AutoMapper(log_callback=write_log)
         def mapping_progress(current, total):
-            if callback_log and current % 100 == 0: 
+            if callback_progress and current % 100 == 0: 
                 percent = int(current * 100 / max(total, 1))
-                callback_log(f"Mapping: {percent}% ({current}/{total})")
-
-        mapping = mapper.generate_mapping(temp_path, exclude_refs=injected_refs, progress_callback=mapping_progress)
+                callback_progress(f"Mapping: {percent}% ({current}/{total})")
+
+        # Single pass: mapowanie liczone z nagłówka <channel> w trakcie tego samego parsowania
+        # Wznowienie: kanały z punktu kontrolnego wypadają z mapowania - parser je pomija
+        def resolver(mapper, checkpoint=None):
+            def resolve_mapping(channels):
+                write_log(f"XML channels: {len(channels)}")
+                with metrics.stage("mapping", within="parse"):
+                    mapping = mapper.map_channels(channels, exclude_refs=cloned_refs, progress_callback=mapping_progress, cancel=cancel)
+                return checkpoint.apply(mapping) if checkpoint else mapping
+            return resolve_mapping
+
+        # Import przyrostowy: doby kanałów z niezmienionym skrótem nie są ponownie wstrzykiwane
+        delta = None
+        if config.plugins.SimpleIPTV_EPG.delta_import.value:
+            delta = DeltaFilter()
+            sample = delta.sample_refs()
+            if sample and not all(SatEpgLookup(window).get_many(sample).values()):
+                delta.reset("EPG cache lost previous import")
+        else: DeltaFilter.clear()
+        def changed_only(batches): return delta.filter(batches) if delta else batches
+
+        # Magazyn binarny dostaje wszystko z okna (także doby pominięte przez import przyrostowy);
+        # wznowiony import nie ma kanałów z punktu kontrolnego, więc zostaje poprzedni magazyn
+        if config.plugins.SimpleIPTV_EPG.epg_store.value and not checkpoint.loaded: store = EPGStoreWriter(self.get_store_path())
+        def stored(batches): return store.tap(batches, skip_refs=cloned_refs) if store else batches
+        def paced(batches): return self.throttle.paced(batches) if self.throttle else batches
 
         if callback_log: callback_log("Import XML...")
         write_log("Start Parsing XML...")
-        parser = EPGParser(temp_path)
-        
-        count_xml = 0
-        batch = 0
-        
-        for service_ref, event_data in parser.load_events(mapping, progress_cb=progress_wrapper):
-            if service_ref in injected_refs: continue
-            
-            injector.add_event(service_ref, event_data)
-            injected_refs.add(service_ref)
-            count_xml += 1
-            batch += 1
+        if len(urls) > 1:
+            # Źródła po kolei wg priorytetu, każde zwykłym potokiem (parsowanie w procesach xmltvchunks);
+            # każde ma własne id kanałów, więc własne mapowanie (i własny plik cache mapowania)
+            merger = SourceMerger(len(urls))
+            count_xml = queue_peak = seen = kept = dropped = 0
+            finished, error = 0, None
+            for index, path in sources:
+                merger.begin(index)
+                parser = EPGParser(path, backend=config.plugins.SimpleIPTV_EPG.parser_backend.value, window=window,
+                                   workers=int(config.plugins.SimpleIPTV_EPG.parse_workers.value), helper_prefix=self.helper_prefix())
+                mapper = AutoMapper(log_callback=write_log, cache_file=self.get_mapping_file(index), catalogue=catalogue)
+                batches = cancel.guard(paced(changed_only(stored(merger.filter(parser.load_batches(resolver(mapper), progress_cb=progress_wrapper))))))
+                # Licznik z injectora: obejmuje też zdarzenia źródła przerwanego w połowie (już wstrzyknięte)
+                before = injector.fanned_out
+                try:
+                    with metrics.stage("parse"):
+                        peak = pump_batches(batches, injector, max_events=budget, skip_refs=cloned_refs, wrap=metrics.profiled, cancel=cancel)[1]
+                    queue_peak = max(queue_peak, peak)
+                    finished += 1
+                except ImportCancelled: stop_if_cancelled(); raise
+                except Exception as e:
+                    # Zdarzenia przekazane przed błędem zostają (i blokują niższe źródła), reszta źródła odpada
+                    write_log(f"XML[{index}]: parse failed, rest of source dropped ({e})")
+                    error = e
+                    continue
+                finally:
+                    count_xml += injector.fanned_out - before
+                    seen += parser.seen; kept += parser.kept; dropped += parser.dropped
+                write_log(f"XML[{index}] ({parser.backend}): programmes {parser.seen}, kept {parser.kept}, outside window {parser.dropped}"
+                          + (f", {parser.chunks} chunks on {parser.workers} processes" if parser.workers > 1 else ""))
+            if not finished:
+                # Żadne źródło nie doszło do końca: jak przy jednym źródle - bez zapisu magazynu i stanu delty
+                write_log(f"XML: all {len(sources)} sources failed ({count_xml} events injected before the errors)")
+                if store: store.close(commit=False)
+                raise error
+            stats = merger.stats
+            metrics.set(programmes_seen=seen, programmes_kept=kept, programmes_dropped=dropped,
+                        merge_kept=stats.kept, merge_overlaps=stats.overlaps, queue_peak=queue_peak)
+            write_log(f"Merge: kept per source {stats.kept}, overlapping dropped {stats.overlaps} (service events)")
+        else:
+            mapper = AutoMapper(log_callback=write_log, cache_file=self.get_mapping_file(), catalogue=catalogue)
+            parser = EPGParser(source, backend=config.plugins.SimpleIPTV_EPG.parser_backend.value, window=window, tee_path=tee_path,
+                               workers=int(config.plugins.SimpleIPTV_EPG.parse_workers.value), helper_prefix=self.helper_prefix())
             
-            if batch >= 2000:
-                injector.commit()
-                batch = 0
-        
-        injector.commit()
+            # Parser i injector rozdzielone ograniczoną kolejką (backpressure przy pełnym budżecie);
+            # przy dławieniu wątek parsera oddaje procesor po każdym bloku kanału
+            batches = cancel.guard(paced(changed_only(stored(parser.load_batches(resolver(mapper, checkpoint), progress_cb=progress_wrapper)))))
+            # Punkt kontrolny co CHECKPOINT_INTERVAL (commit injectora + zapis zakończonych kanałów)
+            checkpoint.bind(injector)
+            # Etap "parse" obejmuje wstrzykiwanie (idą potokiem równolegle); mapowanie z nagłówka liczone osobno
+            try:
+                with metrics.stage("parse"):
+                    count_xml, queue_peak = pump_batches(batches, injector, max_events=budget, skip_refs=cloned_refs, wrap=metrics.profiled,
+                                                         on_batch=checkpoint.track if checkpoint.key else None, cancel=cancel)
+            except ImportCancelled: stop_if_cancelled(); raise
+            except Exception:
+                # Błąd parsera/injectora: bez zapisu niepełnego magazynu (pliki tymczasowe usuwane)
+                if store: store.close(commit=False)
+                raise
+            metrics.set(programmes_seen=parser.seen, programmes_kept=parser.kept, programmes_dropped=parser.dropped,
+                        parser_backend=parser.backend, parse_workers=parser.workers, queue_peak=queue_peak,
+                        bytes_read=parser.bytes_read if mode != "download" else os.path.getsize(source) if os.path.exists(source) else 0)
+            write_log(f"Buffers: injector peak {injector.peak_buffered}, queue peak {queue_peak} (budget {budget})")
+            write_log(f"XML ({parser.backend}): programmes {parser.seen}, kept {parser.kept}, outside window {parser.dropped}"
+                      + (f", {parser.chunks} chunks on {parser.workers} processes" if parser.workers > 1 else ""))
+            if mode != "download": write_log(f"Streamed {parser.bytes_read} bytes")
+        injected_refs.update(injector.imported_refs)
+        # Przepustowość potoku: parsowanie + wstrzykiwanie razem z mapowaniem (odjętym od etapu parse)
+        parse_wall = metrics.stages.get("parse", {}).get("wall_s", 0) + metrics.stages.get("mapping", {}).get("wall_s", 0)
+        metrics.set(events=count_xml, events_per_s=count_xml / max(parse_wall, 1e-3), injector_peak=injector.peak_buffered,
+                    events_stored=injector.stored, import_calls=injector.latency.count, import_batch=injector.target,
+                    import_over_budget=injector.over_budget, import_retried=injector.retried,
+                    import_failed_calls=injector.failed_calls, import_failed_events=injector.failed_events)
+        write_log(f"Injector: {injector.report()}")
+        for err in injector.errors: write_log(f"importEvents error: {err}")
+        if delta:
+            write_log(f"Delta: {delta.summary()}")
+            metrics.set(delta_channels=delta.channels_total, delta_channels_skipped=delta.channels_skipped, delta_events_skipped=delta.events_skipped)
+            # Wznowiony import widział tylko część kanałów - zostaje poprzedni stan (pominięte doby wrócą przy kolejnym)
+            if checkpoint.loaded: write_log("Delta: state kept (resumed import)")
+            else:
+                if injector.failed_refs: write_log(f"Delta: {len(injector.failed_refs)} services with failed importEvents not remembered")
+                delta.save(failed_refs=injector.failed_refs)
+        if store:
+            with metrics.stage("store"): store.close(commit=True)
+            try:
+                write_log(f"Store: {store.n_events} events, {os.path.getsize(store.path)} bytes")
+                metrics.set(store_events=store.n_events, store_bytes=os.path.getsize(store.path))
+            except: pass
+        write_log(f"Shared events: stored {injector.stored} tuples for {injector.fanned_out} service events (saved {injector.fanned_out - injector.stored})")
+        if checkpoint.key: write_log(f"Checkpoint: {checkpoint.summary()}")
+        metrics.set(checkpoint=checkpoint.reason, checkpoint_skipped=checkpoint.skipped)
+        checkpoint.clear()
 
         if callback_log: callback_log(_("sat_fallback"))
         count_sat_fallback = inject_sat_fallback(injector, injected_refs, log_cb=write_log)
@@ -180,9 +515,6 @@ class EPGWorker:
         msg = _("success").format(count_xml, total_sat)
         if callback_log: callback_log(msg)
         
-        try: os.remove(temp_path)
-        except: pass
-        
         return True
 
 class IPTV_EPG_Config(ConfigListScreen, Screen):
@@ -224,6 +556,9 @@ class IPTV_EPG_Config(ConfigListScreen, Screen):
         self["status"] = ScrollLabel(_("status_ready"))
         
         self.worker = EPGWorker()
+        # Okno statusu: ograniczony bufor linii, odświeżany najwyżej kilka razy na sekundę
+        self.status = StatusBuffer(reactor, self.render_status)
+        self.onClose.append(self.status.close)
         self.list = []
         self.createConfigList()
         ConfigListScreen.__init__(self, self.list)
@@ -256,7 +591,25 @@ class IPTV_EPG_Config(ConfigListScreen, Screen):
         self.list.append(getConfigListEntry(_("source_label"), config.plugins.SimpleIPTV_EPG.source_select))
         if config.plugins.SimpleIPTV_EPG.source_select.value == "CUSTOM":
             self.list.append(getConfigListEntry(_("custom_label"), config.plugins.SimpleIPTV_EPG.custom_url))
+        self.list.append(getConfigListEntry(_("extra_sources_label"), config.plugins.SimpleIPTV_EPG.extra_sources))
+        self.list.append(getConfigListEntry(_("parallel_label"), config.plugins.SimpleIPTV_EPG.parallel_sources))
         self.list.append(getConfigListEntry(_("map_file_label"), config.plugins.SimpleIPTV_EPG.mapping_file))
+        self.list.append(getConfigListEntry(_("past_label"), config.plugins.SimpleIPTV_EPG.past_hours))
+        self.list.append(getConfigListEntry(_("days_label"), config.plugins.SimpleIPTV_EPG.days_ahead))
+        self.list.append(getConfigListEntry(_("mode_label"), config.plugins.SimpleIPTV_EPG.import_mode))
+        self.list.append(getConfigListEntry(_("cache_dir_label"), config.plugins.SimpleIPTV_EPG.cache_dir))
+        self.list.append(getConfigListEntry(_("delta_label"), config.plugins.SimpleIPTV_EPG.delta_import))
+        self.list.append(getConfigListEntry(_("store_label"), config.plugins.SimpleIPTV_EPG.epg_store))
+        if config.plugins.SimpleIPTV_EPG.epg_store.value:
+            self.list.append(getConfigListEntry(_("store_dir_label"), config.plugins.SimpleIPTV_EPG.store_dir))
+        self.list.append(getConfigListEntry(_("backend_label"), config.plugins.SimpleIPTV_EPG.parser_backend))
+        self.list.append(getConfigListEntry(_("parse_workers_label"), config.plugins.SimpleIPTV_EPG.parse_workers))
+        self.list.append(getConfigListEntry(_("budget_label"), config.plugins.SimpleIPTV_EPG.event_budget))
+        self.list.append(getConfigListEntry(_("latency_label"), config.plugins.SimpleIPTV_EPG.commit_latency))
+        self.list.append(getConfigListEntry(_("profile_label"), config.plugins.SimpleIPTV_EPG.profile_mode))
+        self.list.append(getConfigListEntry(_("throttle_label"), config.plugins.SimpleIPTV_EPG.throttle_mode))
+        if config.plugins.SimpleIPTV_EPG.throttle_mode.value != "off":
+            self.list.append(getConfigListEntry(_("recording_label"), config.plugins.SimpleIPTV_EPG.pause_recording))
         self.list.append(getConfigListEntry(_("autoupdate_label"), config.plugins.SimpleIPTV_EPG.auto_update))
 
     def updateConfigList(self):
@@ -269,51 +622,57 @@ class IPTV_EPG_Config(ConfigListScreen, Screen):
         self.hide()
         self.session.open(MessageBox, _("hidden_msg"), MessageBox.TYPE_INFO, timeout=5)
 
-    def log(self, message): reactor.callFromThread(self.gui_update_log, message)
+    # log/animate_percent: bezpieczne z dowolnego wątku (tylko zmiana stanu StatusBuffer)
+    def log(self, message): self.status.add(message)
 
-    def gui_update_log(self, message):
-        try:
-            if "[" in message and "%" in message:
-                 self["status"].setText(message)
-            else:
-                 t = datetime.now().strftime("%H:%M:%S")
-                 old = self["status"].getText()
-                 self["status"].setText(old + f"[{t}] {message}\n")
-                 self["status"].lastPage()
-        except: pass
+    def render_status(self, text):
+        self["status"].setText(text)
+        self["status"].lastPage()
 
     def animate_percent(self, prefix, current, total):
-        try:
-            percent = int(current * 100 / max(total, 1))
-            self["status"].setText(f"{prefix} | %: {percent}% ({current}/{total})")
-        except: pass
+        percent = int(current * 100 / max(total, 1))
+        self.status.progress(f"{prefix} | %: {percent}% ({current}/{total})")
 
     def save_settings(self):
         for x in self["config"].list: x[1].save()
         config.plugins.SimpleIPTV_EPG.save()
 
     def start_import_gui(self):
+        # Import w toku: zielony przycisk pyta o przerwanie
+        if self.worker.cancel:
+            self.session.openWithCallback(self.stop_import, MessageBox, _("cancel_question"), MessageBox.TYPE_YESNO)
+            return
         self.save_settings()
-        self["status"].setText(_("status_ready"))
+        self.status.reset(_("status_ready"))
 
         def _run_with_timeout():
+            from concurrent.futures import ThreadPoolExecutor, TimeoutError
             try:
                 with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(self.worker.run_import, callback_log=self.log, silent=False)
-                    result = future.result(timeout=OPERATION_TIMEOUT)
+                    future = executor.submit(self.worker.run_import, callback_log=self.log, silent=False, callback_progress=self.status.progress)
+                    try: result = future.result(timeout=OPERATION_TIMEOUT)
+                    except TimeoutError:
+                        # Samo czekanie to za mało - import przerywany w najbliższym bezpiecznym miejscu (punkt kontrolny)
+                        self.worker.cancel_import("timeout")
+                        raise
                     if result: 
-                        reactor.callFromThread(self.gui_update_log, "OK! Finished.")
+                        self.log("OK! Finished.")
                         reactor.callFromThread(self.ask_restart)
-                    else:
-                        reactor.callFromThread(self.gui_update_log, "IMPORT ERROR!")
+                    elif result is False:
+                        self.log("IMPORT ERROR!")
             except TimeoutError:
-                reactor.callFromThread(self.gui_update_log, _("timeout_error"))
+                self.log(_("timeout_error"))
                 reactor.callFromThread(self.session.open, MessageBox, _("timeout_error"), MessageBox.TYPE_ERROR)
             except Exception as e:
-                reactor.callFromThread(self.gui_update_log, _("import_crash").format(e))
+                self.log(_("import_crash").format(e))
 
         threading.Thread(target=_run_with_timeout, daemon=True).start()
 
+    def stop_import(self, answer):
+        if answer and self.worker.cancel:
+            self.log(_("cancelling"))
+            self.worker.cancel_import("user")
+
     def ask_restart(self):
         self.session.openWithCallback(self.do_restart, MessageBox, _("restart_title"), MessageBox.TYPE_YESNO)
 
@@ -322,30 +681,30 @@ class IPTV_EPG_Config(ConfigListScreen, Screen):
 
     def start_mapping(self):
         self.save_settings()
-        self["status"].setText(_("mapping_start"))
+        self.status.reset(_("mapping_start"))
         threading.Thread(target=self.thread_mapping, daemon=True).start()
 
     def thread_mapping(self):
         try:
+            from .automapper import AutoMapper
             url = self.worker.get_url()
-            ext = ".xml.gz" if ".gz" in url else ".xml"
-            temp_path = "/tmp/epg_temp" + ext
+            temp_path = self.worker.get_temp_path(url)
             
-            if not download_file(url, temp_path, retries=3, timeout=600):
-                reactor.callFromThread(self.gui_update_log, "Download FAIL")
+            if not self.worker.fetch(url, temp_path, callback_log=self.log).ok:
+                self.log("Download FAIL")
                 return
 
-            mapper = AutoMapper(log_callback=lambda msg: reactor.callFromThread(self.gui_update_log, msg))
+            # Wynik trafia do cache mapowania z ustawień, z którego korzysta import
+            mapper = AutoMapper(log_callback=self.log, cache_file=self.worker.get_mapping_file())
             
             def progress_cb(current, total):
-                reactor.callFromThread(self.animate_percent, "Map", current, total)
+                self.animate_percent("Map", current, total)
 
             mapping = mapper.generate_mapping(temp_path, progress_callback=progress_cb, exclude_refs=set())
-            save_json(mapping, config.plugins.SimpleIPTV_EPG.mapping_file.value)
             
-            reactor.callFromThread(self.gui_update_log, _("mapping_success").format(len(mapping)))
+            self.log(_("mapping_success").format(len(mapping)))
         except Exception as e:
-            reactor.callFromThread(self.gui_update_log, f"ERROR: {e}")
+            self.log(f"ERROR: {e}")
 
     def check_github_update(self):
         self.log(_("check_update"))
@@ -372,11 +731,15 @@ class IPTV_EPG_Config(ConfigListScreen, Screen):
 
     def perform_update_question(self, answer):
         if answer:
-            self["status"].setText(_("update_start"))
+            self.status.reset(_("update_start"))
             threading.Thread(target=self.thread_perform_update, daemon=True).start()
 
     def thread_perform_update(self):
-        FILES = ["plugin.py", "epgcore.py", "automapper.py", "version"]
+        FILES = ["plugin.py", "epgcore.py", "automapper.py", "matcher.py", "normalizer.py", "xmltvtime.py", "xmltvstream.py",
+                 "httpstream.py", "multisource.py", "epgdelta.py", "epgstore.py", "xmltvchunks.py", "metrics.py", "throttle.py",
+                 "servicecatalog.py", "statuslog.py", "importstate.py", "version"]
+        import shutil
+        from .epgcore import download_file
         success = True
         plugin_path = os.path.dirname(__file__)
         try:
@@ -386,13 +749,13 @@ class IPTV_EPG_Config(ConfigListScreen, Screen):
                 target_final = os.path.join(plugin_path, fname)
                 if download_file(url, target_tmp, retries=2, timeout=10):
                     shutil.move(target_tmp, target_final)
-                    reactor.callFromThread(self.gui_update_log, f"Updated: {fname}")
+                    self.log(f"Updated: {fname}")
                 else:
                     success = False; break
             if success: reactor.callFromThread(self.session.openWithCallback, self.do_restart, MessageBox, _("update_done"), MessageBox.TYPE_YESNO)
             else: reactor.callFromThread(self.session.open, MessageBox, _("update_fail"), MessageBox.TYPE_ERROR)
         except Exception as e:
-            reactor.callFromThread(self.gui_update_log, f"Update Crash: {e}")
+            self.log(f"Update Crash: {e}")
 
 def AutoUpdateCheck():
     if config.plugins.SimpleIPTV_EPG.auto_update.value:
@@ -408,6 +771,7 @@ def AutoUpdateCheck():
 def StartSession(**kwargs):
     write_log("Plugin Loaded. Initializing AutoUpdate timer...")
     reactor.callLater(60, AutoUpdateCheck)
+    reactor.callLater(20, lambda: threading.Thread(target=EPGWorker().reload_from_store, daemon=True).start())
 
 def main(session, **kwargs): session.open(IPTV_EPG_Config)
 
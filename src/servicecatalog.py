@@ -0,0 +1,164 @@
+# Wspólny katalog usług z bukietów (SAT + IPTV) dla łączenia SAT i mapowania XML.
+# Jeden przebieg po bukietach z bouquets.tv, klasyfikacja refów, nazwa znormalizowana liczona raz;
+# trwały cache per plik bukietu (mtime+rozmiar) - niezmienione bukiety nie są ponownie czytane.
+import os
+import re
+import json
+import threading
+from .normalizer import core_name
+
+BOUQUETS_PATH = '/etc/enigma2/'
+CATALOGUE_NAME = 'iptv_services.cache.json'
+CATALOGUE_VERSION = 1
+BOUQUET_ROOT = '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.tv" ORDER BY bouquet'
+LAMEDB_FILES = ('lamedb', 'lamedb5')   # nazwy usług SAT - zmiana (np. po skanowaniu) unieważnia cały katalog
+
+SAT = 'sat'
+IPTV = 'iptv'
+
+_BOUQUET_FILE = re.compile(r'FROM BOUQUET "([^"]+)"')
+_IPTV_TYPES = ('4097:', '5001:', '5002:')
+_IPTV_MARKS = ('http', '%3a', 'rtmp')
+
+def classify(ref, name=""):
+    # IPTV: odtwarzacze strumieni albo URL w refie (także MAC/Stalker 1:0:1...http); SAT: 1:0:... bez URL
+    if "---" in name or "###" in name: return None
+    if any(t in ref for t in _IPTV_TYPES): return IPTV
+    ref_lower = ref.lower()
+    if any(m in ref_lower for m in _IPTV_MARKS): return IPTV
+    if '1:0:' in ref: return SAT
+    return None
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return [int(st.st_mtime), st.st_size]
+    except OSError: return None
+
+def _enigma():
+    try:
+        from enigma import eServiceCenter, eServiceReference
+        return eServiceCenter.getInstance(), eServiceReference
+    except ImportError: return None, None
+
+def list_bouquets(bouquets_path):
+    # [(plik bukietu, ref bukietu)] w kolejności bouquets.tv: z pamięci enigmy, bez niej z dysku
+    center, Ref = _enigma()
+    if center:
+        root = center.list(Ref(BOUQUET_ROOT))
+        if root:
+            return [(m.group(1), ref) for ref, _ in root.getContent("SN") for m in [_BOUQUET_FILE.search(ref)] if m]
+    out = []
+    try:
+        with open(os.path.join(bouquets_path, 'bouquets.tv'), 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                m = _BOUQUET_FILE.search(line) if line.startswith('#SERVICE ') else None
+                if m: out.append((m.group(1), line[9:].strip()))
+    except OSError:
+        try: out = [(f, None) for f in sorted(os.listdir(bouquets_path)) if f.endswith('.tv') and 'userbouquet' in f]
+        except OSError: pass
+    return out
+
+def _read_bouquet_file(path):
+    # (ref, nazwa) z pliku; nazwa z #DESCRIPTION albo z ostatniego pola refa (IPTV: "...:http%3a//...:Nazwa")
+    rows = []
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if line.startswith('#SERVICE '):
+                ref = line[9:].strip()
+                rows.append([ref, ref.split(':')[-1].strip() if classify(ref) == IPTV else ""])
+            elif line.startswith('#DESCRIPTION') and rows:
+                rows[-1][1] = line[12:].strip(' :\r\n')
+    return rows
+
+def read_bouquet(path, bouquet_ref=None):
+    # Nazwy z enigmy (SAT: lamedb, IPTV: opis), bez niej z pliku
+    center, Ref = _enigma()
+    if center and bouquet_ref:
+        lst = center.list(Ref(bouquet_ref))
+        if lst is not None: return lst.getContent("SN")
+    return _read_bouquet_file(path) if os.path.exists(path) else []
+
+class ServiceCatalogue:
+    """Usługi wszystkich bukietów: {'ref', 'name', 'kind' (SAT/IPTV), 'core' (core_name)} w kolejności bukietów.
+    refresh() sprawdza tylko mtime/rozmiar plików; przeczytane zostają wyłącznie zmienione bukiety."""
+    def __init__(self, bouquets_path=BOUQUETS_PATH, cache_file=None):
+        self.bouquets_path = bouquets_path
+        self.cache_file = cache_file or os.path.join(bouquets_path, CATALOGUE_NAME)
+        self.bouquets = None     # plik -> {'stamp': [mtime, size], 'services': [[ref, name, kind, core]]}
+        self.lamedb = None
+        self.services = []
+        self.files_read = 0
+        self.files_total = 0
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, 'r') as f: data = json.load(f)
+            if data.get('version') == CATALOGUE_VERSION: return data
+        except: pass
+        return {}
+
+    def _save_cache(self):
+        try:
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, 'w') as f: json.dump({'version': CATALOGUE_VERSION, 'lamedb': self.lamedb, 'bouquets': self.bouquets}, f)
+            os.replace(tmp, self.cache_file)
+        except: pass
+
+    def refresh(self):
+        if self.bouquets is None:
+            data = self._load_cache()
+            self.bouquets = data.get('bouquets', {}); self.lamedb = data.get('lamedb')
+        lamedb = [_file_stamp(os.path.join(self.bouquets_path, n)) for n in LAMEDB_FILES]
+        cached = self.bouquets if lamedb == self.lamedb else {}
+        bouquets = {}
+        read = 0
+        for filename, bouquet_ref in list_bouquets(self.bouquets_path):
+            path = os.path.join(self.bouquets_path, filename)
+            stamp = _file_stamp(path)
+            entry = cached.get(filename)
+            # Bez pliku na dysku (stamp None) nie ma czym unieważniać - zawsze czytamy z enigmy
+            if not entry or stamp is None or entry.get('stamp') != stamp:
+                try: rows = read_bouquet(path, bouquet_ref)
+                except Exception: rows = []
+                services = []
+                for ref, name in rows:
+                    kind = classify(ref, name)
+                    if kind: services.append([ref, name, kind, core_name(name)])
+                entry = {'stamp': stamp, 'services': services}
+                read += 1
+            bouquets[filename] = entry
+        changed = read or lamedb != self.lamedb or set(bouquets) != set(self.bouquets)
+        self.bouquets = bouquets; self.lamedb = lamedb
+        self.files_total = len(bouquets); self.files_read = read
+        if changed or not self.services:
+            self.services = [{'ref': r, 'name': n, 'kind': k, 'core': c} for entry in bouquets.values() for r, n, k, c in entry['services']]
+        if changed: self._save_cache()
+        return self
+
+    def iptv(self):
+        # Usługi IPTV bez powtórzeń (ta sama usługa w kilku bukietach = jeden ref)
+        seen = set()
+        out = []
+        for s in self.services:
+            if s['kind'] == IPTV and s['ref'] not in seen:
+                seen.add(s['ref']); out.append(s)
+        return out
+
+    def sat_map(self):
+        # Znormalizowana nazwa -> ref SAT (przy powtórzeniach wygrywa ostatni bukiet, jak przy skanie RAM)
+        return {s['core']: s['ref'] for s in self.services if s['kind'] == SAT and len(s['core']) > 1}
+
+    def summary(self):
+        n_iptv = sum(1 for s in self.services if s['kind'] == IPTV)
+        return f"{len(self.services)} services ({n_iptv} IPTV), bouquets read {self.files_read}/{self.files_total}"
+
+_catalogues = {}
+_lock = threading.Lock()
+
+def load_catalogue(bouquets_path=BOUQUETS_PATH):
+    # Jeden katalog na katalog bukietów w procesie; kolejne wywołania tylko sprawdzają pliki
+    with _lock:
+        cat = _catalogues.get(bouquets_path)
+        if cat is None: cat = _catalogues[bouquets_path] = ServiceCatalogue(bouquets_path)
+        return cat.refresh()
@@ -0,0 +1,127 @@
+# Log wtyczki: buforowany plik z rotacją (zamiast open-append-close przy każdej linii)
+# oraz status GUI - ograniczony bufor linii + postęp, odświeżane w wątku reaktora najwyżej co STATUS_INTERVAL.
+import os
+import time
+import atexit
+import threading
+from collections import deque
+
+LOG_FILE = "/tmp/simple_epg.log"
+LOG_MAX_BYTES = 1024 * 1024   # po przekroczeniu plik -> .1 (starsza kopia usuwana)
+LOG_BACKUPS = 1
+LOG_FLUSH_INTERVAL = 2.0      # s - zapis zaległych linii (jednorazowy timer od pierwszej linii)
+LOG_MAX_PENDING = 200         # linii w pamięci - więcej = zapis od razu
+STATUS_LINES = 200            # linii w oknie statusu
+STATUS_INTERVAL = 0.25        # s - minimalny odstęp odświeżeń okna statusu
+
+class FileLog:
+    # Zapis: gdy bufor się zapełni, przy flush() (koniec importu, wyjście) albo po interval od pierwszej
+    # niezapisanej linii - timer jednorazowy, więc bez logowania nie działa żaden wątek
+    def __init__(self, path=LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, interval=LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.interval = interval
+        self.pending = []
+        self.size = None
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def write(self, line):
+        with self.lock:
+            self.pending.append(line)
+            if len(self.pending) >= LOG_MAX_PENDING: self._flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock: self._flush()
+
+    def _flush(self):
+        if self.timer is not None: self.timer.cancel(); self.timer = None
+        if not self.pending: return
+        data = "\n".join(self.pending) + "\n"
+        self.pending = []
+        try:
+            if self.size is None: self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if self.size and self.size + len(data) > self.max_bytes: self._rotate()
+            with open(self.path, "a") as f: f.write(data)
+            self.size += len(data)
+        except: pass
+
+    def _rotate(self):
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src): os.replace(src, f"{self.path}.{i}")
+        self.size = 0
+
+_logs = {}
+def get_log(path=LOG_FILE):
+    # Jeden bufor na plik (plugin.write_log i epgcore.log_debug piszą do tego samego)
+    log = _logs.get(path)
+    if log is None: log = _logs.setdefault(path, FileLog(path))
+    return log
+
+@atexit.register
+def _flush_all():
+    for log in list(_logs.values()): log.flush()
+
+class StatusBuffer:
+    """Stan okna statusu: ostatnie STATUS_LINES linii + bieżący postęp. add() dodaje linię (i kończy postęp),
+    progress() tylko podmienia linię postępu - wołający sam wie, co jest postępem. Oba można wołać
+    z dowolnego wątku - tylko zmieniają stan; render(text) idzie w wątku reaktora, najwyżej raz
+    na min_interval i z co najwyżej jednym oczekującym callFromThread."""
+    def __init__(self, reactor, render, max_lines=STATUS_LINES, min_interval=STATUS_INTERVAL):
+        self.reactor = reactor
+        self.render = render
+        self.min_interval = min_interval
+        self.lines = deque(maxlen=max_lines)
+        self.progress_text = None
+        self.lock = threading.Lock()
+        self.pending = False
+        self.closed = False
+        self.last = 0.0
+        self.renders = 0
+
+    def add(self, message):
+        with self.lock:
+            self.lines.append(f"[{time.strftime('%H:%M:%S')}] {message}")
+            self.progress_text = None
+            self._request()
+
+    def progress(self, text):
+        with self.lock:
+            self.progress_text = text
+            self._request()
+
+    def reset(self, message=None):
+        # Nowa operacja: czyste okno z nagłówkiem (bez znacznika czasu)
+        with self.lock:
+            self.lines.clear()
+            if message: self.lines.append(message)
+            self.progress_text = None
+            self._request()
+
+    def close(self):
+        with self.lock: self.closed = True
+
+    def _request(self):
+        if self.pending or self.closed: return
+        self.pending = True
+        self.reactor.callFromThread(self._schedule)
+
+    def _schedule(self):
+        self.reactor.callLater(max(0.0, self.last + self.min_interval - time.monotonic()), self._flush)
+
+    def _flush(self):
+        with self.lock:
+            self.pending = False
+            if self.closed: return
+            text = "\n".join(self.lines)
+            if self.progress_text: text += ("\n" if text else "") + self.progress_text
+        self.last = time.monotonic()
+        self.renders += 1
+        try: self.render(text)
+        except: pass
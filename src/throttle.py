@@ -0,0 +1,156 @@
+# Kooperacyjne dławienie importu w tle: wątki importu co porcję pracy oddają procesor (i GIL) pętli GUI,
+# długość porcji i pauzy dopasowywane do zmierzonego opóźnienia reaktora; obniżony priorytet CPU/IO
+# wątków i procesów pomocniczych; wstrzymanie w czasie nagrywania.
+import os
+import shutil
+import subprocess
+import threading
+import time
+from array import array
+from collections import deque
+
+# tryb: (docelowe opóźnienie reaktora [s], porcja startowa [s], nice)
+MODES = {
+    'light': (0.10, 0.20, 5),
+    'normal': (0.05, 0.10, 10),
+    'strong': (0.02, 0.05, 19),
+}
+PROBE_INTERVAL = 0.1       # s - co ile reaktor mierzy własne spóźnienie
+RECORDING_POLL = 5.0       # s - co ile (w wątku reaktora) sprawdzamy nagrywanie
+RECORDING_MAX_PAUSE = 900  # s - łączny limit wstrzymania importu przez nagrania (limit czasu importu: 45 min)
+SLICE_MIN, SLICE_MAX = 0.01, 1.0
+PAUSE_MIN, PAUSE_MAX = 0.005, 0.2
+
+def percentiles(samples):
+    # Próbki w ms -> p50/p95/p99/max
+    if not samples: return {'samples': 0}
+    s = sorted(samples); n = len(s)
+    pick = lambda q: round(s[min(n - 1, int(q * n))], 1)
+    return {'samples': n, 'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': round(s[-1], 1)}
+
+class ReactorProbe:
+    """Opóźnienie pętli GUI: timer co PROBE_INTERVAL mierzy, o ile później niż planowo został wywołany.
+    Wszystko poza lag() działa w wątku reaktora (start przez callFromThread). recording: opcjonalna funkcja
+    bez argumentów (np. lista nagrań enigmy) - wołana tylko w wątku reaktora, wynik czytany przez import."""
+    def __init__(self, reactor, recording=None, interval=PROBE_INTERVAL):
+        self.reactor = reactor
+        self.recording_check = recording
+        self.interval = interval
+        self.samples = array('d')
+        self.recent = deque(maxlen=10)
+        self.expected = None
+        self.recording = False
+        self.next_poll = 0.0
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.reactor.callFromThread(self._arm)
+
+    def stop(self): self.running = False
+
+    def _arm(self):
+        if not self.running: self.expected = None; return
+        self.expected = time.monotonic() + self.interval
+        self.reactor.callLater(self.interval, self._tick)
+
+    def _tick(self):
+        now = time.monotonic()
+        lag = max(0.0, now - self.expected) * 1000
+        self.samples.append(lag); self.recent.append(lag)
+        if self.recording_check and now >= self.next_poll:
+            self.next_poll = now + RECORDING_POLL
+            try: self.recording = bool(self.recording_check())
+            except: self.recording = False
+        self._arm()
+
+    def lag(self):
+        # Bieżące opóźnienie (ms): ostatnie próbki albo zaległy, jeszcze niewywołany timer
+        expected = self.expected
+        overdue = (time.monotonic() - expected) * 1000 if expected else 0.0
+        return max(max(self.recent, default=0.0), overdue)
+
+    def report(self): return percentiles(self.samples)
+
+def helper_prefix(nice):
+    # Prefiks polecenia procesów pomocniczych (np. parsowanie w procesach): niższy priorytet CPU i IO
+    if nice <= 0: return []
+    prefix = ['nice', '-n', str(nice)] if shutil.which('nice') else []
+    if shutil.which('ionice'): prefix += ['ionice', '-c', '2', '-n', '7']
+    return prefix
+
+class Throttle:
+    """checkpoint() wołany między porcjami pracy (blok kanału z parsera, wywołanie importEvents):
+    po przekroczeniu porcji czasu wątek śpi (zwalnia GIL), porcja skraca się, gdy reaktor się spóźnia
+    ponad cel trybu, i wydłuża, gdy nadąża. Pierwsze wywołanie w wątku obniża jego priorytet (nice/ionice)."""
+    def __init__(self, mode='normal', probe=None, pause_recording=True, log=None):
+        self.mode = mode
+        self.target, self.slice, self.nice = MODES.get(mode, MODES['normal'])
+        self.target *= 1000
+        self.pause = PAUSE_MIN * 2
+        self.probe = probe
+        self.pause_recording = pause_recording
+        self.log = log
+        self.cancel = None         # importstate.CancelToken - przerywa też oczekiwanie na koniec nagrania
+        self.local = threading.local()
+        self.yields = 0
+        self.slept = 0.0
+        self.recording_paused = 0.0
+        self.adjust_down = 0
+        self.adjust_up = 0
+
+    def enter_thread(self):
+        # Priorytet liczony per wątek (Linux: nice/ioprio dotyczą TID); nowe wątki dziedziczą go po twórcy
+        if getattr(self.local, 'deadline', None) is not None: return
+        self.local.deadline = time.monotonic() + self.slice
+        try:
+            # Cel liczony od priorytetu procesu (wątek główny = GUI), bo wątki potomne mogą już mieć obniżony
+            tid = threading.get_native_id()
+            want = min(19, os.getpriority(os.PRIO_PROCESS, os.getpid()) + self.nice)
+            if os.getpriority(os.PRIO_PROCESS, tid) < want: os.setpriority(os.PRIO_PROCESS, tid, want)
+            if shutil.which('ionice'):
+                subprocess.run(['ionice', '-c', '2', '-n', '7', '-p', str(tid)], capture_output=True, timeout=5)
+        except: pass
+
+    def niced(self, fn):
+        # Opakowanie funkcji wątku pomocniczego (np. pobieranie w run_parallel)
+        def run(*args, **kwargs):
+            self.enter_thread()
+            return fn(*args, **kwargs)
+        return run
+
+    def checkpoint(self):
+        deadline = getattr(self.local, 'deadline', None)
+        if deadline is None: self.enter_thread(); return
+        now = time.monotonic()
+        if now < deadline: return
+        if self.probe and self.probe.recording and self.pause_recording: self._wait_recording()
+        if self.probe:
+            lag = self.probe.lag()
+            if lag > self.target:
+                self.slice = max(SLICE_MIN, self.slice * 0.7); self.pause = min(PAUSE_MAX, self.pause * 1.5); self.adjust_down += 1
+            elif lag < self.target / 2:
+                self.slice = min(SLICE_MAX, self.slice * 1.2); self.pause = max(PAUSE_MIN, self.pause * 0.8); self.adjust_up += 1
+        time.sleep(self.pause)
+        self.yields += 1; self.slept += self.pause
+        self.local.deadline = time.monotonic() + self.slice
+
+    def paced(self, iterable):
+        # Generator z checkpoint() po każdym elemencie - w wątku, który go konsumuje
+        for item in iterable:
+            yield item
+            self.checkpoint()
+
+    def _wait_recording(self):
+        if self.recording_paused >= RECORDING_MAX_PAUSE: return
+        if self.log: self.log("Throttle: recording in progress, import paused")
+        t0 = time.monotonic()
+        while self.probe.recording and not (self.cancel and self.cancel.cancelled()) and self.recording_paused + (time.monotonic() - t0) < RECORDING_MAX_PAUSE:
+            time.sleep(1.0)
+        self.recording_paused += time.monotonic() - t0
+        if self.log: self.log(f"Throttle: resumed after {time.monotonic() - t0:.0f} s")
+
+    def stats(self):
+        return {'mode': self.mode, 'yields': self.yields, 'slept_s': round(self.slept, 2), 'slice_ms': round(self.slice * 1000, 1),
+                'pause_ms': round(self.pause * 1000, 1), 'shorter': self.adjust_down, 'longer': self.adjust_up,
+                'recording_pause_s': round(self.recording_paused, 1)}
@@ -0,0 +1,199 @@
+# Równoległe parsowanie XMLTV: proces główny rozpakowuje strumień i tnie sekcję <programme>
+# na kawałki na granicach "<programme", procesy potomne parsują kawałki (expat + czas),
+# wyniki wracają w kolejności jako zwarte tablice per ciągły blok kanału.
+# Moduł bez zależności od enigmy - procesy potomne (python3) importują tylko ten plik i czytniki.
+import array
+import collections
+import io
+import os
+import pickle
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import xml.parsers.expat
+from .xmltvstream import ExpatReader, READ_CHUNK
+from .xmltvtime import parse_xmltv_time
+
+CHUNK_BYTES = 4 * 1024 * 1024   # kawałek sekcji programów na jedno zadanie
+MAX_WORKERS = 4
+TAG = b'<programme'
+
+def split_programmes(f, chunk_bytes=CHUNK_BYTES, read_size=READ_CHUNK):
+    """Dzieli rozpakowany strumień XMLTV na (nagłówek, kawałki).
+    Nagłówek: wszystko przed pierwszym <programme (prolog + <tv> + <channel>).
+    Kawałki: ciągi całych elementów <programme>, bez zamykającego </tv>."""
+    buf = b''
+    while True:
+        data = f.read(read_size)
+        buf += data
+        i = buf.find(TAG)
+        if i >= 0 or not data: break
+    if i < 0:
+        yield buf, None
+        return
+    yield buf[:i], None
+    parts = [buf[i:]]; size = len(parts[0])
+    target = chunk_bytes
+    while True:
+        while size < target:
+            data = f.read(read_size)
+            if not data: break
+            parts.append(data); size += len(data)
+        buf = b''.join(parts)
+        if size < target:
+            end = buf.rfind(b'</tv>')
+            if end >= 0: buf = buf[:end]
+            if buf.strip(): yield None, buf
+            return
+        cut = buf.rfind(TAG)
+        if cut <= 0:
+            target = size + chunk_bytes  # jeden program większy niż kawałek - czytamy dalej
+            parts = [buf]
+            continue
+        yield None, buf[:cut]
+        parts = [buf[cut:]]; size = len(parts[0])
+        target = chunk_bytes
+
+def read_header(header):
+    # Kanały i prolog (deklaracja XML/DOCTYPE do owinięcia kawałków) z nagłówka
+    channels = []
+    t = header.find(b'<tv')
+    prolog = header[:t] if t >= 0 else b''
+    end = header.rfind(b'</tv>')
+    if end >= 0: header = header[:end]   # feed bez programów
+    r = ExpatReader(io.BytesIO(header + b'</tv>'))
+    for _ in r.programmes(lambda ch: channels.extend(ch) or ()): pass
+    return prolog, channels
+
+# --- PROCES POTOMNY ---
+_W = {}
+
+def _init_worker(prolog, wanted, window):
+    _W['prolog'] = prolog
+    _W['wanted'] = frozenset(wanted)
+    _W['window'] = window or (0, 1 << 62)
+
+def parse_chunk(data):
+    """Zwraca (widziane, przyjęte, [(chid, array('q') start/dur naprzemiennie, [tytuły], [opisy])], poza oknem).
+    Przyjęte = zmapowane, w oknie i z poprawnym czasem (to, co faktycznie idzie dalej)."""
+    wanted = _W['wanted']
+    lo, hi = _W['window']
+    out = []
+    dropped = kept = 0
+    cur = None; times = None
+    r = ExpatReader(io.BytesIO(_W['prolog'] + b'<tv>' + data + b'</tv>'))
+    parse = parse_xmltv_time
+    try:
+        for chid, start, stop, title, desc in r.programmes(lambda ch: wanted):
+            try:
+                start = parse(start)
+                if start >= hi: dropped += 1; continue
+                stop = parse(stop)
+                if stop <= lo: dropped += 1; continue
+                if not (start > 0 and stop > start): continue
+            except: continue
+            if chid != cur:
+                cur = chid; times = array.array('q'); titles = []; descs = []
+                out.append((chid, times, titles, descs))
+            times.append(start); times.append(stop - start)
+            titles.append(title[:240]); descs.append(desc[:1024])
+            kept += 1
+    except xml.parsers.expat.ExpatError: pass
+    return r.seen, kept, out, dropped
+
+def worker_main():
+    # Pętla procesu potomnego: (prolog, wanted, window), potem kawałki -> wyniki (pickle przez stdin/stdout)
+    inp = sys.stdin.buffer; out = sys.stdout.buffer
+    _init_worker(*pickle.load(inp))
+    while True:
+        try: data = pickle.load(inp)
+        except EOFError: break
+        if data is None: break
+        pickle.dump(parse_chunk(data), out, pickle.HIGHEST_PROTOCOL); out.flush()
+
+# --- PROCES GŁÓWNY ---
+def python_executable():
+    # W enigmie sys.executable to binarka enigma2 - procesy potomne to zwykły python3
+    if 'python' in os.path.basename(sys.executable or ''): return sys.executable
+    return shutil.which('python3') or '/usr/bin/python3'
+
+class _Worker:
+    """Proces python3 z worker_main. Bez multiprocessing: spawn w enigmie uruchomiłby w potomku
+    jej __main__ (mytest.py), a fork kopiuje wielowątkowy proces enigmy.
+    Zapis kawałków idzie z osobnego wątku, więc czekający na odczyt wyniku proces główny
+    nie blokuje potomka piszącego wynik (brak zakleszczenia na pełnych potokach)."""
+
+    def __init__(self, init, prefix=()):
+        boot = f"import sys; sys.path[:0] = {sys.path!r}; from {__package__}.xmltvchunks import worker_main; worker_main()"
+        self.proc = subprocess.Popen(list(prefix) + [python_executable(), '-c', boot], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.queue = queue.Queue(maxsize=1)
+        self.queue.put(init)
+        self.thread = threading.Thread(target=self._feed, daemon=True)
+        self.thread.start()
+
+    def _feed(self):
+        try:
+            while True:
+                item = self.queue.get()
+                pickle.dump(item, self.proc.stdin, pickle.HIGHEST_PROTOCOL); self.proc.stdin.flush()
+                if item is None: break
+        except: pass
+
+    def send(self, chunk): self.queue.put(chunk)
+
+    def result(self):
+        try: return pickle.load(self.proc.stdout)
+        except EOFError: raise RuntimeError(f"parse worker exited ({self.proc.poll()})")
+
+    def close(self):
+        try: self.queue.put_nowait(None)
+        except: pass
+        try: self.proc.wait(timeout=5)
+        except:
+            try: self.proc.kill()
+            except: pass
+
+class ParallelParse:
+    """Równoległe parsowanie strumienia (plik-podobny obiekt z rozpakowanymi bajtami).
+    Kawałek k trafia do procesu k % workers, wyniki odbierane po kolei; w locie najwyżej
+    ~2 kawałki na proces, więc pamięć nie zależy od wielkości feedu.
+    prefix: opcjonalny prefiks polecenia procesów (np. nice/ionice, patrz throttle.helper_prefix)."""
+
+    def __init__(self, fileobj, workers=2, window=None, chunk_bytes=CHUNK_BYTES, prefix=()):
+        self.f = fileobj
+        self.prefix = prefix
+        self.workers = max(1, min(int(workers), MAX_WORKERS))
+        self.window = window
+        self.chunk_bytes = chunk_bytes
+        self.seen = 0
+        self.kept = 0
+        self.dropped = 0
+        self.chunks = 0
+
+    def blocks(self, resolve):
+        # (chid, [(start, dur, title, desc)]) w kolejności pliku; resolve(channels) -> chciane xml_id
+        parts = split_programmes(self.f, self.chunk_bytes)
+        header = next(parts)[0]
+        prolog, channels = read_header(header)
+        wanted = resolve(channels) or ()
+        if not wanted: return
+        init = (prolog, list(wanted), self.window)
+        workers = [_Worker(init, self.prefix) for _ in range(self.workers)]
+        try:
+            pending = collections.deque()
+            for _, chunk in parts:
+                w = workers[self.chunks % len(workers)]
+                w.send(chunk); pending.append(w)
+                self.chunks += 1
+                if len(pending) >= len(workers) * 2: yield from self._collect(pending.popleft().result())
+            while pending: yield from self._collect(pending.popleft().result())
+        finally:
+            for w in workers: w.close()
+
+    def _collect(self, result):
+        seen, kept, out, dropped = result
+        self.seen += seen; self.kept += kept; self.dropped += dropped
+        for chid, times, titles, descs in out:
+            yield chid, list(zip(times[0::2], times[1::2], titles, descs))
@@ -0,0 +1,215 @@
+# Strumieniowe czytniki XMLTV. Wspólny interfejs:
+#   reader = Reader(fileobj); for chid, start, stop, title, desc in reader.programmes(resolve): ...
+# resolve(channels) jest wołane raz, po nagłówku <channel> (lista (xml_id, display-name)),
+# i zwraca kontener chcianych xml_id. Liczniki: reader.seen / reader.kept (programy).
+# Backendy: 'expat' (callbacki), 'iterparse' (xml.etree), 'lxml' (gdy zainstalowany);
+# select_backend('auto') wybiera najszybszy dostępny po krótkiej kalibracji.
+import gzip
+import io
+import time
+import xml.etree.ElementTree as ET
+import xml.parsers.expat
+try:
+    from lxml import etree as LET
+except ImportError:
+    LET = None
+
+READ_CHUNK = 256 * 1024
+
+def open_source(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+class ExpatReader:
+    """Czytnik na callbackach expat. Dla <programme> niezmapowanego kanału decyzja
+    zapada na tagu startowym: handlery startu i tekstu są odpinane do końca
+    poddrzewa, więc nie powstają elementy, atrybuty dzieci ani teksty.
+    Dla chcianych programów zbierany jest tylko tekst <title>/<desc>."""
+
+    def __init__(self, fileobj, chunk_size=READ_CHUNK):
+        self.f = fileobj
+        self.chunk_size = chunk_size
+        self.seen = 0
+        self.kept = 0
+
+    def programmes(self, resolve):
+        p = xml.parsers.expat.ParserCreate()
+        p.buffer_text = True
+        out = []
+        channels = []
+        st = {'wanted': None, 'prog': None, 'field': None, 'text': None, 'chan': None}
+
+        def collect(data): st['text'].append(data)
+
+        def start(name, attrs):
+            if name == 'programme':
+                wanted = st['wanted']
+                if wanted is None:
+                    wanted = st['wanted'] = resolve(channels) or ()
+                self.seen += 1
+                chid = attrs.get('channel')
+                if chid in wanted:
+                    st['prog'] = [chid, attrs.get('start'), attrs.get('stop'), "", ""]
+                else:
+                    # Pomijamy całe poddrzewo: tylko EndElementHandler czeka na </programme>
+                    p.StartElementHandler = None
+            elif st['prog'] is not None:
+                if name == 'title' or name == 'desc':
+                    st['field'] = name; st['text'] = []
+                    p.CharacterDataHandler = collect
+            elif name == 'channel':
+                st['chan'] = [attrs.get('id'), ""]
+            elif name == 'display-name' and st['chan'] is not None and not st['chan'][1]:
+                st['field'] = name; st['text'] = []
+                p.CharacterDataHandler = collect
+
+        def end(name):
+            if name == 'programme':
+                prog = st['prog']
+                if prog is not None:
+                    out.append(tuple(prog)); self.kept += 1
+                    st['prog'] = None
+                p.StartElementHandler = start
+            elif st['field'] == name:
+                p.CharacterDataHandler = None
+                text = ''.join(st['text']); st['field'] = None; st['text'] = None
+                if name == 'display-name': st['chan'][1] = text
+                elif st['prog'] is not None: st['prog'][3 if name == 'title' else 4] = text
+            elif name == 'channel' and st['chan'] is not None:
+                channels.append(tuple(st['chan'])); st['chan'] = None
+
+        p.StartElementHandler = start
+        p.EndElementHandler = end
+        read = self.f.read
+        while True:
+            data = read(self.chunk_size)
+            p.Parse(data, not data)
+            if out:
+                yield from out
+                out.clear()
+            if not data: break
+        # Plik bez <programme> - mapowanie i tak musi zostać policzone
+        if st['wanted'] is None: resolve(channels)
+
+class IterparseReader:
+    """Dotychczasowy tryb ElementTree.iterparse (pełny element dla każdego <programme>)."""
+
+    def __init__(self, fileobj):
+        self.f = fileobj
+        self.seen = 0
+        self.kept = 0
+
+    def programmes(self, resolve):
+        wanted = None
+        channels = []
+        for event, elem in ET.iterparse(self.f, events=("end",)):
+            tag = elem.tag
+            if tag == 'programme':
+                if wanted is None: wanted = resolve(channels) or ()
+                self.seen += 1
+                chid = elem.get('channel')
+                if chid in wanted:
+                    title = ""; desc = ""
+                    for child in elem:
+                        if child.tag == 'title': title = child.text
+                        elif child.tag == 'desc': desc = child.text
+                    self.kept += 1
+                    yield chid, elem.get('start'), elem.get('stop'), title or "", desc or ""
+                elem.clear()
+            elif tag == 'channel':
+                if wanted is None:
+                    display = ""
+                    for child in elem:
+                        if child.tag == 'display-name': display = child.text; break
+                    channels.append((elem.get('id'), display))
+                elem.clear()
+            elif tag == 'tv': elem.clear()
+        if wanted is None: resolve(channels)
+
+class LxmlReader:
+    """lxml.etree.iterparse (libxml2): tylko zdarzenia dla <channel>/<programme>,
+    przetworzone elementy usuwane z drzewa razem z poprzednikami."""
+
+    def __init__(self, fileobj):
+        self.f = fileobj
+        self.seen = 0
+        self.kept = 0
+
+    def programmes(self, resolve):
+        wanted = None
+        channels = []
+        for event, elem in LET.iterparse(self.f, events=("end",), tag=("channel", "programme"), huge_tree=True, resolve_entities=False):
+            if elem.tag == 'programme':
+                if wanted is None: wanted = resolve(channels) or ()
+                self.seen += 1
+                chid = elem.get('channel')
+                if chid in wanted:
+                    title = ""; desc = ""
+                    for child in elem:
+                        if child.tag == 'title': title = child.text
+                        elif child.tag == 'desc': desc = child.text
+                    self.kept += 1
+                    yield chid, elem.get('start'), elem.get('stop'), title or "", desc or ""
+            elif wanted is None:
+                display = ""
+                for child in elem:
+                    if child.tag == 'display-name': display = child.text; break
+                channels.append((elem.get('id'), display or ""))
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None: del parent[0]
+        if wanted is None: resolve(channels)
+
+READERS = {'expat': ExpatReader, 'iterparse': IterparseReader}
+if LET is not None: READERS['lxml'] = LxmlReader
+
+class _HeaderDone(Exception): pass
+
+def read_channels(fileobj):
+    # Tylko nagłówek <channel>: parsowanie przerywane na pierwszym <programme>
+    channels = []
+    def stop(found):
+        channels.extend(found)
+        raise _HeaderDone()
+    try:
+        for _ in ExpatReader(fileobj).programmes(stop): pass
+    except _HeaderDone: pass
+    return channels
+
+# --- WYBÓR BACKENDU ---
+_selected = {}
+
+def calibration_sample(channels=100, per_channel=30, mapped_every=10):
+    # Mały feed w pamięci (jak typowy: opisy, ikony, ~10% zmapowanych kanałów)
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<tv>\n']
+    for c in range(channels):
+        out.append(f'<channel id="c{c}.pl"><display-name lang="pl">Kanał {c} HD</display-name><icon src="http://x/{c}.png"/></channel>\n')
+    for c in range(channels):
+        for j in range(per_channel):
+            out.append(f'<programme start="2026101{j % 10}{j % 24:02d}0000 +0200" stop="2026101{j % 10}{j % 24:02d}3000 +0200" channel="c{c}.pl">'
+                       f'<title lang="pl">Program {j} &amp; co</title><desc lang="pl">{"Opis programu. " * (1 + j % 8)}</desc>'
+                       f'<category lang="en">News</category></programme>\n')
+    out.append('</tv>\n')
+    wanted = {f"c{c}.pl" for c in range(0, channels, mapped_every)}
+    return ''.join(out).encode('utf-8'), wanted
+
+def calibrate(sample=None, wanted=None, backends=None):
+    # [(sekundy, nazwa)] od najszybszego; backend z błędem jest pomijany
+    if sample is None: sample, wanted = calibration_sample()
+    results = []
+    for name in backends or READERS:
+        try:
+            t = time.perf_counter()
+            for _ in READERS[name](io.BytesIO(sample)).programmes(lambda channels: wanted): pass
+            results.append((time.perf_counter() - t, name))
+        except Exception: pass
+    return sorted(results)
+
+def select_backend(name='auto'):
+    # Jawnie wybrany i dostępny backend albo wynik kalibracji (liczony raz na proces)
+    if name in READERS: return name
+    if 'auto' not in _selected:
+        timings = calibrate()
+        _selected['auto'] = timings[0][1] if timings else 'expat'
+        _selected['timings'] = timings
+    return _selected['auto']
@@ -0,0 +1,58 @@
+# Szybkie dekodowanie dat XMLTV ("YYYYMMDDhhmmss +HHMM") bez strptime
+from functools import lru_cache
+
+TIME_CACHE_SIZE = 65536
+_DAY_CACHE_MAX = 4096
+_day_cache = {}
+_NAMED_ZONES = {'Z': 0, 'UTC': 0, 'GMT': 0}
+
+def _days_from_civil(y, m, d):
+    # Liczba dni od 1970-01-01 (kalendarz gregoriański, algorytm H. Hinnanta)
+    y -= m <= 2
+    era = (y if y >= 0 else y - 399) // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _day_base(ymd):
+    # 'YYYYMMDD' -> epoch północy UTC; cache per dzień
+    base = _day_cache.get(ymd)
+    if base is None:
+        base = _days_from_civil(int(ymd[0:4]), int(ymd[4:6]), int(ymd[6:8])) * 86400
+        if len(_day_cache) >= _DAY_CACHE_MAX: _day_cache.clear()
+        _day_cache[ymd] = base
+    return base
+
+def _offset(tz):
+    # '+0100' / '-0530' / '+01:00' / 'UTC' -> sekundy na wschód od UTC
+    if not tz: return 0
+    sign = tz[0]
+    if sign in '+-':
+        digits = tz[1:].replace(':', '')
+        if len(digits) < 4 or not digits[:4].isdigit(): return 0
+        secs = int(digits[0:2]) * 3600 + int(digits[2:4]) * 60
+        return -secs if sign == '-' else secs
+    return _NAMED_ZONES.get(tz.upper(), 0)
+
+@lru_cache(maxsize=TIME_CACHE_SIZE)
+def parse_xmltv_time(value):
+    """'20251130183000 +0100' -> epoch (int). Cyfry czytane ze stałych pozycji,
+    przesunięcie strefy uwzględnione; bez strefy przyjmujemy UTC (xmltv.dtd).
+    Dopuszczalne krótsze formy (YYYYMMDDhhmm). Zwraca 0 dla błędnej wartości."""
+    if not value: return 0
+    try:
+        n = 0
+        limit = min(len(value), 14)
+        while n < limit and value[n].isdigit(): n += 1
+        if n < 8: return 0
+        secs = _day_base(value[0:8])
+        if n >= 10: secs += int(value[8:10]) * 3600
+        if n >= 12: secs += int(value[10:12]) * 60
+        if n >= 14: secs += int(value[12:14])
+        return secs - _offset(value[n:].strip())
+    except: return 0
+
+def clear_cache():
+    parse_xmltv_time.cache_clear()
+    _day_cache.clear()
@@ -0,0 +1,7 @@
+# Testy poza tunerem: katalog repo (pakiet src), narzędzia (wzorce z benchmarków) i zastępczy moduł enigma
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT, os.path.join(ROOT, 'tools'), os.path.join(ROOT, 'tools', 'fake_enigma')):
+    if path not in sys.path: sys.path.insert(0, path)
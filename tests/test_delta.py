@@ -0,0 +1,24 @@
+# Import przyrostowy: grupa z nieudanym importEvents nie trafia do zapisanego stanu
+import json
+
+from src.epgcore import EPGInjector
+from src.epgdelta import DeltaFilter, group_key
+
+EVENTS = [(86400 + i * 3600, 3600, "t", "d") for i in range(10)]
+
+class FlakyCache:
+    def importEvents(self, refs, events):
+        if "bad" in refs: raise RuntimeError("cache busy")
+
+def test_failed_group_not_saved(tmp_path):
+    path = str(tmp_path / "delta.json")
+    delta = DeltaFilter(path)
+    injector = EPGInjector()
+    injector.epg_cache = FlakyCache()
+    for chid, refs, events in delta.filter(iter([("a", ["ok"], EVENTS), ("b", ["bad"], EVENTS)])):
+        injector.add_events(refs, events)
+    injector.commit()
+    assert injector.failed_refs == {"bad"}
+    delta.save(failed_refs=injector.failed_refs)
+    with open(path) as f: groups = json.load(f)['groups']
+    assert group_key(["ok"]) in groups and group_key(["bad"]) not in groups
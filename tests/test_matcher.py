@@ -0,0 +1,58 @@
+# NameIndex.find = dawna pętla liniowa "zawiera / zawarty w", ale przy kilku pasujących kluczach
+# wybór jest określony: najmniejsza różnica długości, potem kolejność dodania (pętla brała pierwszy z dict)
+import random
+
+import pytest
+
+from src.matcher import NameIndex
+from bench_matcher import linear, make_names, make_queries
+
+def linear_best(items, query, max_len_diff=None, min_len=2):
+    # Pełny skan wszystkich kluczy z regułą remisu NameIndex
+    best = None
+    for order, (key, value) in enumerate(items):
+        if len(key) < min_len: continue
+        if not (query in key or key in query): continue
+        diff = abs(len(key) - len(query))
+        if max_len_diff is not None and diff > max_len_diff: continue
+        if best is None or (diff, order) < best[0]: best = ((diff, order), value)
+    return None if best is None else best[1]
+
+def test_find_matches_linear_scan():
+    rnd = random.Random(42)
+    channels = make_names(2000, rnd)
+    items = [(c, c.lower()) for c in channels]
+    xml_map = dict(items)
+    index = NameIndex(items)
+    for q in make_queries(channels, 2000, rnd):   # nadzbiory, podciągi kluczy i nazwy bez trafienia
+        if len(q) <= 3: continue
+        got = index.find(q)
+        assert got == linear_best(items, q), q
+        # Jedno trafienie w pętli liniowej = dokładnie ten sam klucz
+        if sum(1 for k in xml_map if q in k or k in q) == 1: assert got == linear(xml_map, q), q
+
+@pytest.mark.parametrize("max_len_diff", [None, 2])
+def test_find_ties_on_overlapping_keys(max_len_diff):
+    # Mały alfabet: klucze są nawzajem swoimi podciągami, zapytania pasują do wielu kluczy naraz
+    rnd = random.Random(7)
+    keys = list(dict.fromkeys(''.join(rnd.choice('AB') for _ in range(rnd.randint(2, 7))) for _ in range(120)))
+    items = [(k, f"id{i}") for i, k in enumerate(keys)]
+    index = NameIndex(items)
+    for _ in range(3000):
+        base = rnd.choice(keys)
+        r = rnd.random()
+        if r < 0.4: q = base + ''.join(rnd.choice('AB') for _ in range(rnd.randint(1, 3)))   # nadzbiór klucza
+        elif r < 0.7 and len(base) > 3: q = base[1:-1]                                       # podciąg klucza
+        else: q = ''.join(rnd.choice('AB') for _ in range(rnd.randint(2, 9)))
+        assert index.find(q, max_len_diff) == linear_best(items, q, max_len_diff), q
+
+def test_find_prefers_closest_length():
+    index = NameIndex([("POLSATSPORTEXTRA", "extra"), ("POLSATSPORT", "sport"), ("SPORT", "short")])
+    assert index.find("POLSATSPORTX") == "sport"       # zawarty w zapytaniu, różnica 1
+    assert index.find("SATSPORT") == "sport"           # remis (różnica 3 i 3): wcześniej dodany klucz
+    assert index.find("ATSPORTEXTR") == "extra"        # zawiera zapytanie (5) wygrywa z zawartym w nim (6)
+
+def test_lookup_exact():
+    index = NameIndex([("TVP1", "tvp1.pl"), ("POLSAT", "polsat.pl")])
+    assert index.lookup("POLSAT") == "polsat.pl"
+    assert index.lookup("TVN") is None
@@ -0,0 +1,31 @@
+# RunMetrics: etap zagnieżdżony nie jest liczony dwa razy, nazwy plików przebiegów się nie powtarzają
+import threading
+import time
+
+from src.metrics import RunMetrics
+
+def test_nested_stage_subtracted_from_parent():
+    m = RunMetrics()
+    with m.stage("parse"):
+        def mapping():
+            with m.stage("mapping", within="parse"): time.sleep(0.1)
+        t = threading.Thread(target=mapping); t.start(); t.join()
+        time.sleep(0.05)
+    parse, mapping = m.stages["parse"]["wall_s"], m.stages["mapping"]["wall_s"]
+    assert mapping >= 0.1 and 0.04 <= parse < 0.1
+    assert m.to_dict()["stages"]["mapping"]["within"] == "parse"
+
+def test_stage_cpu_is_thread_cpu():
+    m = RunMetrics()
+    def spin():
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end: pass
+    with m.stage("wait"):
+        t = threading.Thread(target=spin); t.start(); t.join()
+    assert m.stages["wait"]["cpu_s"] < 0.05
+
+def test_run_files_do_not_collide(tmp_path):
+    a = RunMetrics(); b = RunMetrics()
+    b.started = a.started + 0.002
+    assert a.save(str(tmp_path)) != b.save(str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 2
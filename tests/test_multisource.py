@@ -0,0 +1,33 @@
+# SourceMerger: niższe źródło tylko w lukach wyższych, nakładanie w obrębie jednego źródła nie filtruje go samego
+from src.multisource import SourceMerger
+
+def ev(start, dur): return (start, dur, "t", "d")
+
+def run(merger, index, blocks):
+    merger.begin(index)
+    return [(chid, sorted(refs), [e[0] for e in events]) for chid, refs, events in merger.filter(iter(blocks))]
+
+def test_primary_overlaps_kept_and_both_neighbours_checked():
+    m = SourceMerger(2, tolerance=0)
+    # Źródło 0 samo ma nakładające się programy (0-3600 i 1800-2400) - oba przechodzą
+    out = run(m, 0, [("a", ["r1"], [ev(0, 3600), ev(1800, 600), ev(7200, 3600)])])
+    assert out == [("a", ["r1"], [0, 1800, 7200])]
+    # Luka 3600-7200: mieści się tylko 3600-7200; 3000-4000 nachodzi z lewej, 7000-7300 z prawej
+    out = run(m, 1, [("b", ["r1"], [ev(3000, 1000), ev(3600, 3600), ev(7000, 300), ev(10800, 600)])])
+    assert out == [("b", ["r1"], [3600, 10800])]
+    assert m.stats.kept == [3, 2] and m.stats.overlaps == [0, 2]
+
+def test_stats_in_service_events_and_split_groups():
+    m = SourceMerger(2, tolerance=0)
+    run(m, 0, [("a", ["r1"], [ev(0, 3600)])])
+    # r1 ma już źródło 0, r2 nie - ten sam blok dzielony na grupy
+    out = run(m, 1, [("b", ["r1", "r2"], [ev(0, 3600), ev(3600, 3600)])])
+    assert sorted(out) == [("b", ["r1"], [3600]), ("b", ["r2"], [0, 3600])]
+    assert m.stats.kept == [1, 3] and m.stats.overlaps == [0, 1]
+
+def test_tolerance():
+    m = SourceMerger(3, tolerance=120)
+    run(m, 0, [("a", ["r"], [ev(0, 3600)])])
+    assert run(m, 1, [("b", ["r"], [ev(3500, 3600)])]) == [("b", ["r"], [3500])]
+    # Trzecie źródło widzi sumę obu poprzednich
+    assert run(m, 2, [("c", ["r"], [ev(5000, 600), ev(7100, 600)])]) == [("c", ["r"], [7100])]
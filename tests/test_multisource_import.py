@@ -0,0 +1,59 @@
+# Import z kilku źródeł (EPGWorker.run_import): źródło przerwane w połowie i wszystkie źródła uszkodzone
+import datetime
+import os
+import sys
+import types
+from unittest import mock
+
+import enigma
+import fake_gui
+from xmltvgen import write_feed
+from src.automapper import AutoMapper
+from src.epgdelta import DeltaFilter
+from src.epgstore import STORE_FILE
+
+URLS = ["http://a.example/one.xml.gz", "http://b.example/two.xml.gz"]
+
+def map_all(self, channels, **kwargs):
+    return {xml_id: [f"4097:0:1:0:0:0:0:0:0:0:http%3a//x/{xml_id}:"] for xml_id, _ in channels}
+
+def run(tmp_path, truncate):
+    # truncate[i]: ułamek pliku źródła i, który zostaje (1 = cały plik)
+    start = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    good = tmp_path / "feed.xml.gz"
+    write_feed(str(good), channels=400, per_channel=24, start=start, slot_minutes=60, tz="+0000")
+    data = good.read_bytes()
+    store = tmp_path / STORE_FILE
+    store.write_bytes(b"previous store")
+    messages = []
+    enigma.configure(bouquets=[], sat_events=0, keep_events=False, import_us=0)
+    with mock.patch.dict(sys.modules, fake_gui.modules()), mock.patch.object(AutoMapper, 'map_channels', map_all), \
+         mock.patch.object(DeltaFilter, 'save') as delta_save:
+        sys.modules.pop('src.plugin', None)
+        from src import plugin
+        settings = plugin.config.plugins.SimpleIPTV_EPG
+        settings.source_select.value = "CUSTOM"; settings.custom_url.value = URLS[0]; settings.extra_sources.value = URLS[1]
+        for name in ('cache_dir', 'store_dir'): getattr(settings, name).value = str(tmp_path)
+        settings.mapping_file.value = str(tmp_path / "map.json")
+        settings.throttle_mode.value = "off"
+        worker = plugin.EPGWorker()
+        def fetch(url, path, callback_log=None, cancel=None):
+            with open(path, 'wb') as f: f.write(data[:int(len(data) * truncate[URLS.index(url)])])
+            return types.SimpleNamespace(ok=True, bytes=os.path.getsize(path), reused=0)
+        worker.fetch = fetch
+        try: result = worker.run_import(callback_log=messages.append)
+        except Exception as e: result = e
+    return result, messages, store.read_bytes(), delta_save.called
+
+def test_partial_source_counted(tmp_path):
+    result, messages, store, delta_saved = run(tmp_path, [0.5, 1])
+    assert result is True and delta_saved and store != b"previous store"
+    imported = enigma.eEPGCache.getInstance().imported_events
+    assert imported > 0 and any(f": {imported} |" in m for m in messages)
+
+def test_all_sources_fail(tmp_path):
+    result, messages, store, delta_saved = run(tmp_path, [0.5, 0.4])
+    assert isinstance(result, Exception)
+    assert enigma.eEPGCache.getInstance().imported_events > 0   # przed błędem, jak przy jednym źródle
+    assert store == b"previous store" and not delta_saved
+    assert not os.path.exists(str(tmp_path / STORE_FILE) + ".events.tmp")
@@ -0,0 +1,31 @@
+# core_name: tagi usuwane jednym przebiegiem (najdłuższy tag wygrywa) - celowo inaczej niż dawna pętla replace(),
+# która zostawiała resztki słów (POLSKA -> SKA, EUROPE -> ROPE); obie strony porównania używają tej samej funkcji
+import pytest
+
+from src import normalizer
+
+@pytest.mark.parametrize("name, key", [
+    ("Canal+ Sport HD [PL]", "CANALUSSPORT"),
+    ("TVN 24", "NTWENTYFOUR"),
+    ("HBO 2 HEVC", "HBO2"),
+    ("Discovery Channel HD", "DISCOVERY"),
+    ("Nickelodeon (PL)", "NICKELODEON"),
+    ("Cartoon Network|PL|", "CARTOONNETWORK"),
+    ("Żółć Ęą Śń", "ZOLCEASN"),
+    # Tag w środku słowa też wypada (wspólne z dawną pętlą)
+    ("Polsat Sport HD", "SATSPORT"),
+    ("Eurosport 1 FHD", "ROSPORT1"),
+    # Różnice względem dawnej pętli: dłuższy tag usuwany w całości, bez resztek
+    ("Kino Polska", "KINO"),            # dawniej KINOSKA
+    ("TVP HD Polska", "P"),             # dawniej PSKA
+    ("EUROPE", ""),                     # dawniej ROPE
+    ("Kino Polska Muzyka", "KINOMUZYKA"),
+])
+def test_core_name(name, key):
+    normalizer.clear_cache()
+    assert normalizer.core_name(name) == key
+
+def test_core_name_memoized_result_is_stable():
+    name = "Canal+ Sport HD [PL]"
+    assert normalizer.core_name(name) == normalizer.core_name(name) == "CANALUSSPORT"
+    assert normalizer.core_name("") == ""
@@ -0,0 +1,64 @@
+# pump_batches: błędy po obu stronach kolejki nie mogą zawiesić wątku parsera ani dać "sukcesu"
+import json
+import threading
+import time
+
+import pytest
+
+from src.epgcore import EPGInjector, pump_batches
+from src.importstate import CancelToken, ImportCancelled, ImportCheckpoint
+
+EVENTS = [(1000, 60, "t", "d")] * 100
+
+class Boom(Exception): pass
+
+class FailingInjector(EPGInjector):
+    def add_events(self, refs, events): raise Boom()
+
+def blocks(n):
+    for i in range(n): yield f"c{i}", ["r"], EVENTS
+
+def test_consumer_error_stops_producer():
+    before = threading.active_count()
+    with pytest.raises(Boom):
+        pump_batches(blocks(1000), FailingInjector(), max_events=200)
+    assert threading.active_count() == before
+
+def test_producer_error_reaches_caller():
+    def broken():
+        yield "c0", ["r"], EVENTS
+        raise ValueError("parse died")
+    injector = EPGInjector()
+    with pytest.raises(ValueError):
+        pump_batches(broken(), injector)
+    assert injector.imported == len(EVENTS)   # to, co już było w kolejce, jest zapisane
+
+def test_counts_events_per_ref():
+    count, peak = pump_batches(blocks(10), EPGInjector(), skip_refs={"x"})
+    assert count == 10 * len(EVENTS) and peak > 0
+
+class SlowCache:
+    def __init__(self): self.calls = 0
+    def importEvents(self, refs, events):
+        self.calls += 1
+        time.sleep(0.01)
+
+def test_cancel_stops_drained_queue_and_commit(tmp_path):
+    # Parser skończył (wszystko w kolejce/injectorze), przerwanie i tak zatrzymuje import w ciągu jednej porcji
+    cancel = CancelToken()
+    injector = EPGInjector(max_buffered=100000)
+    injector.epg_cache = SlowCache(); injector.target = 50; injector.cancel = cancel
+    checkpoint = ImportCheckpoint(path=str(tmp_path / "cp.json"), interval=1e9)
+    checkpoint.key = "k"; checkpoint.bind(injector)
+    def track(chid, refs):
+        checkpoint.track(chid, refs)
+        if chid == "c20": threading.Timer(0.05, cancel.cancel).start()
+    t = time.perf_counter()
+    with pytest.raises(ImportCancelled):
+        pump_batches(((f"c{i}", [f"r{i}"], EVENTS) for i in range(40)), injector, max_events=100000, on_batch=track, cancel=cancel)
+    assert time.perf_counter() - t < 1.0
+    assert injector.events_buffer   # niewysłana reszta została w buforze
+    assert checkpoint.save(commit=False)
+    with open(checkpoint.path) as f: saved = set(json.load(f)['channels'])
+    assert saved and saved < checkpoint.closed
+    assert all(not injector.uncommitted(checkpoint.groups[c]) for c in saved)
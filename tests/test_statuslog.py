@@ -0,0 +1,41 @@
+# Status GUI: wynik końcowy zostaje linią (postęp tylko przez progress()); log pisany bez stałego wątku
+import threading
+import time
+
+from src.statuslog import FileLog, StatusBuffer
+
+class Reactor:
+    # Wywołania odkładane jak w prawdziwym reaktorze, wykonywane w run()
+    def __init__(self): self.calls = []
+    def callFromThread(self, fn, *args): self.calls.append((fn, args))
+    def callLater(self, delay, fn, *args): self.calls.append((fn, args))
+    def run(self):
+        while self.calls:
+            fn, args = self.calls.pop(0); fn(*args)
+
+def test_result_lines_are_not_progress():
+    shown = []
+    reactor = Reactor()
+    status = StatusBuffer(reactor, shown.append, min_interval=0)
+    status.progress("[XML] Eventy: 10000")
+    status.add("SUCCESS!\nXML Imported: 152800 | SAT Linked: 303")
+    status.add("Mapping complete! Channels mapped: 837")
+    status.add("parse 2.1s | store 0.1s")
+    reactor.run()
+    assert status.progress_text is None
+    assert "XML Imported: 152800" in shown[-1] and "Channels mapped: 837" in shown[-1]
+
+def test_file_log_one_shot_timer(tmp_path):
+    path = str(tmp_path / "epg.log")
+    log = FileLog(path, interval=0.05)
+    threads = threading.active_count()
+    log.write("a"); log.write("b")
+    assert threading.active_count() == threads + 1
+    time.sleep(0.2)
+    with open(path) as f: assert f.read() == "a\nb\n"
+    assert log.timer is None and threading.active_count() == threads
+    # flush() (koniec importu) zapisuje od razu i zatrzymuje timer
+    log.write("c"); log.flush()
+    with open(path) as f: assert f.read().endswith("c\n")
+    time.sleep(0.1)
+    assert log.timer is None and threading.active_count() == threads
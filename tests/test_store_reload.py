@@ -0,0 +1,26 @@
+# Przeładowanie magazynu przy starcie (EPGWorker.reload_from_store) na prawdziwym pliku magazynu
+import sys
+import time
+from unittest import mock
+
+import enigma
+import fake_gui
+from src.epgstore import EPGStoreWriter, STORE_FILE
+
+def test_reload_from_store_injects_saved_events(tmp_path):
+    now = int(time.time()) // 3600 * 3600
+    groups = [([f"4097:0:1:{i:X}:0:0:0:0:0:0:http%3a//x/{i}:", f"4097:0:1:{i:X}:1:0:0:0:0:0:http%3a//x/{i}b:"],
+               [(now + k * 3600, 3600, f"P{i} {k}", "opis") for k in range(20)]) for i in range(30)]
+    w = EPGStoreWriter(str(tmp_path / STORE_FILE))
+    for refs, events in groups: w.add(refs, events)
+    w.close()
+    enigma.configure(sat_events=24, keep_events=False, import_us=0)
+    with mock.patch.dict(sys.modules, fake_gui.modules()):
+        sys.modules.pop('src.plugin', None)
+        from src import plugin
+        settings = plugin.config.plugins.SimpleIPTV_EPG
+        settings.store_dir.value = str(tmp_path)
+        settings.throttle_mode.value = "off"
+        count = plugin.EPGWorker().reload_from_store()
+    assert count == 30 * 20 * 2
+    assert enigma.eEPGCache.getInstance().imported_events == count
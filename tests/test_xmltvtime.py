@@ -0,0 +1,36 @@
+# Dekoder dat XMLTV: zgodność z datetime (pełna obsługa strefy) także wokół zmian czasu
+import datetime
+
+import pytest
+
+from src import xmltvtime
+from bench_timestamp import local_strings, reference
+
+zoneinfo = pytest.importorskip("zoneinfo")
+
+UTC = datetime.timezone.utc
+DST_CASES = [
+    ("Europe/Warsaw", datetime.datetime(2026, 3, 28, 22, tzinfo=UTC)),
+    ("Europe/Warsaw", datetime.datetime(2026, 10, 24, 22, tzinfo=UTC)),
+    ("Europe/London", datetime.datetime(2026, 3, 28, 22, tzinfo=UTC)),
+    ("America/New_York", datetime.datetime(2026, 11, 1, 2, tzinfo=UTC)),
+    ("Asia/Kolkata", datetime.datetime(2026, 1, 1, 0, tzinfo=UTC)),
+]
+
+@pytest.mark.parametrize("zone,start", DST_CASES)
+def test_across_dst_transitions(zone, start):
+    try: tz = zoneinfo.ZoneInfo(zone)
+    except zoneinfo.ZoneInfoNotFoundError: pytest.skip(f"no tzdata for {zone}")
+    xmltvtime.clear_cache()
+    for expected, value in local_strings(tz, int(start.timestamp()), 12, 15):
+        assert xmltvtime.parse_xmltv_time(value) == expected == reference(value), value
+
+@pytest.mark.parametrize("value,expected", [
+    ("20260329010000", 1774746000),                   # bez strefy = UTC
+    ("202603290100 +0100", 1774742400),               # bez sekund
+    ("20260329010000+0530", 1774746000 - 19800),      # offset bez spacji
+    ("", 0),
+    ("abc", 0),
+])
+def test_forms(value, expected):
+    assert xmltvtime.parse_xmltv_time(value) == expected
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Pobieranie warunkowe i wznawiane (httpstream.fetch_feed) na lokalnym serwerze HTTP
+# z ETag/Last-Modified/Range i zrywanym połączeniem. Wypisuje przesłane bajty i czasy.
+# Uruchom z katalogu repo: python3 tools/bench_download.py [--mb 8 --kbps 20000]
+import argparse
+import email.utils
+import hashlib
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.httpstream import fetch_feed
+
+class FeedHandler(http.server.BaseHTTPRequestHandler):
+    body = b''
+    kbps = 20000
+    cut_after = None   # zerwij połączenie po tylu bajtach (raz)
+    mtime = time.time()
+    def log_message(self, *a): pass
+    def do_GET(self):
+        cls = type(self)
+        etag = '"' + hashlib.md5(cls.body).hexdigest() + '"'
+        last_mod = email.utils.formatdate(cls.mtime, usegmt=True)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304); self.send_header('ETag', etag); self.end_headers(); return
+        start = 0
+        rng = self.headers.get('Range')
+        if rng and self.headers.get('If-Range') in (etag, last_mod):
+            start = int(rng.split('=')[1].split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(cls.body) - 1}/{len(cls.body)}")
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag); self.send_header('Last-Modified', last_mod)
+        self.send_header('Content-Length', str(len(cls.body) - start))
+        self.end_headers()
+        sent = 0; step = 32 * 1024
+        for i in range(start, len(cls.body), step):
+            chunk = cls.body[i:i + step]
+            if cls.cut_after is not None and sent + len(chunk) > cls.cut_after:
+                cls.cut_after = None
+                self.wfile.write(chunk[:100]); self.wfile.flush()
+                self.connection.close(); return
+            self.wfile.write(chunk); sent += len(chunk)
+            time.sleep(len(chunk) / (cls.kbps * 128.0))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--mb', type=float, default=8)
+    ap.add_argument('--kbps', type=int, default=20000)
+    a = ap.parse_args()
+    FeedHandler.body = os.urandom(int(a.mb * 1e6))
+    FeedHandler.kbps = a.kbps
+    srv = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_address[1]}/feed.xml.gz"
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'epg_temp.xml.gz')
+    try:
+        r = fetch_feed(url, path); print("first download :", r.summary())
+        assert r.status == "downloaded" and open(path, 'rb').read() == FeedHandler.body
+        r = fetch_feed(url, path); print("unchanged feed :", r.summary())
+        assert r.status == "not_modified" and r.bytes == 0
+        FeedHandler.body = os.urandom(len(FeedHandler.body)); FeedHandler.mtime = time.time() + 60
+        FeedHandler.cut_after = len(FeedHandler.body) // 2
+        r = fetch_feed(url, path); print("cut + resume   :", r.summary())
+        assert r.status == "resumed" and open(path, 'rb').read() == FeedHandler.body
+        # przerwana część + reszta, bez ponownego pobierania od zera
+        assert r.bytes < len(FeedHandler.body) * 1.1
+        srv.shutdown()
+        print("OK")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == '__main__': main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Benchmark: czas mapowania (fallback "zawiera / zawarty w") - pętla liniowa vs NameIndex
+# Uruchom z katalogu repo: python3 tools/bench_matcher.py
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.matcher import NameIndex
+
+SIZES = [(1000, 1000), (5000, 5000), (20000, 10000)]
+
+def make_names(count, rnd):
+    names = set()
+    while len(names) < count:
+        names.add(''.join(rnd.choice(string.ascii_uppercase) for _ in range(rnd.randint(4, 12))) + str(rnd.randint(0, 99)))
+    return sorted(names)
+
+def make_queries(channels, count, rnd):
+    out = []
+    for _ in range(count):
+        c = rnd.choice(channels)
+        r = rnd.random()
+        if r < 0.3: out.append(c + rnd.choice(['EXTRA', 'X', 'PLUS1']))   # nadzbiór klucza
+        elif r < 0.6 and len(c) > 5: out.append(c[1:-1])                    # podciąg klucza
+        else: out.append(''.join(rnd.choice(string.ascii_uppercase) for _ in range(10)))  # brak trafienia
+    return out
+
+def linear(xml_map, name):
+    for xk, xid in xml_map.items():
+        if name in xk or xk in name: return xid
+    return None
+
+def main():
+    rnd = random.Random(42)
+    print(f"{'services':>9} {'channels':>9} {'linear[s]':>10} {'index[s]':>9} {'build[s]':>9} {'speedup':>8}")
+    for n_services, n_channels in SIZES:
+        channels = make_names(n_channels, rnd)
+        xml_map = {c: c.lower() for c in channels}
+        queries = make_queries(channels, n_services, rnd)
+
+        t = time.perf_counter()
+        for q in queries:
+            if len(q) > 3: linear(xml_map, q)
+        t_lin = time.perf_counter() - t
+
+        t = time.perf_counter()
+        index = NameIndex(xml_map.items())
+        t_build = time.perf_counter() - t
+        t = time.perf_counter()
+        for q in queries:
+            if len(q) > 3: index.find(q)
+        t_idx = time.perf_counter() - t
+
+        # Tylko czasy; wybór klucza (także remisy) względem pełnego skanu sprawdza tests/test_matcher.py
+        print(f"{n_services:>9} {n_channels:>9} {t_lin:>10.3f} {t_idx:>9.3f} {t_build:>9.3f} {t_lin / max(t_idx + t_build, 1e-9):>7.1f}x")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# Micro-benchmark normalizacji nazw: stara pętla replace() vs normalizer.core_name
+# (oczekiwane klucze, także tam, gdzie celowo różnią się od dawnej pętli: tests/test_normalizer.py)
+# Uruchom z katalogu repo: python3 tools/bench_normalizer.py
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src import normalizer
+
+COUNT = 50000
+
+def legacy_core_name(name):
+    # Kopia dawnego epgcore.get_extended_core_name (punkt odniesienia)
+    if not name: return ""
+    name = name.upper()
+    for old, new in normalizer.REPLACEMENTS.items(): name = name.replace(old, new)
+    for t in normalizer.TRASH: name = name.replace(t, '')
+    name = re.sub(r'[^A-Z0-9]', '', name)
+    return name.strip()
+
+def make_names(count, rnd):
+    bases = ['TVP 1', 'TVP Info', 'Polsat', 'TVN 24', 'Canal+ Sport', 'Eurosport 1', 'Łódź TV', 'HBO 2', 'Discovery', 'BBC One']
+    tags = ['', ' HD', ' FHD', ' HEVC', ' VIP', ' (PL)', ' [PL]', ' 4K', ' RAW', ' BACKUP', ' H.265']
+    return [f"{rnd.choice(bases)} {rnd.randint(0, count)}{rnd.choice(tags)}{rnd.choice(tags)}" for _ in range(count)]
+
+def rate(fn, names):
+    t = time.perf_counter()
+    for n in names: fn(n)
+    return len(names) / (time.perf_counter() - t)
+
+def main():
+    rnd = random.Random(7)
+    unique = make_names(COUNT, rnd)
+    repeated = [rnd.choice(unique[:2000]) for _ in range(COUNT)]
+
+    print(f"legacy             : {rate(legacy_core_name, unique):>12,.0f} names/s")
+    normalizer.clear_cache()
+    print(f"compiled (cold)    : {rate(normalizer.core_name, unique):>12,.0f} names/s")
+    normalizer.clear_cache()
+    print(f"legacy (repeated)  : {rate(legacy_core_name, repeated):>12,.0f} names/s")
+    print(f"compiled (repeated): {rate(normalizer.core_name, repeated):>12,.0f} names/s")
+
+if __name__ == '__main__': main()
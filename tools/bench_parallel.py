@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Skalowanie parsowania XMLTV z liczbą procesów (xmltvchunks) względem parsowania w jednym wątku
+# Uruchom z katalogu repo: python3 tools/bench_parallel.py [--channels 2000 --per-channel 100 --workers 1,2,3,4]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from xmltvgen import write_feed
+from src.xmltvstream import ExpatReader, open_source
+from src.xmltvtime import parse_xmltv_time
+from src.xmltvchunks import ParallelParse, CHUNK_BYTES
+
+def serial(path, wanted):
+    out = []
+    with open_source(path) as f:
+        for chid, start, stop, title, desc in ExpatReader(f).programmes(lambda channels: wanted):
+            s = parse_xmltv_time(start); e = parse_xmltv_time(stop)
+            out.append((chid, s, e - s, title[:240], desc[:1024]))
+    return out
+
+def parallel(path, wanted, workers, chunk_bytes):
+    with open_source(path) as f:
+        pp = ParallelParse(f, workers=workers, chunk_bytes=chunk_bytes)
+        return [(chid,) + ev for chid, events in pp.blocks(lambda channels: wanted) for ev in events], pp.chunks
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--channels', type=int, default=2000)
+    ap.add_argument('--per-channel', type=int, default=100)
+    ap.add_argument('--mapped', type=float, default=0.5, help='udział zmapowanych kanałów')
+    ap.add_argument('--workers', default='1,2,3,4')
+    ap.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / 1048576.0)
+    a = ap.parse_args()
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'feed.xml.gz')
+    channels = write_feed(path, a.channels, a.per_channel)
+    step = max(1, int(round(1 / a.mapped)))
+    wanted = {cid for i, (cid, _) in enumerate(channels) if i % step == 0}
+    print(f"feed: {a.channels} channels x {a.per_channel}, mapped {len(wanted)}, cpus {os.cpu_count()}")
+
+    t = time.perf_counter()
+    ref = serial(path, wanted)
+    base = time.perf_counter() - t
+    print(f"serial:     {base:6.2f} s  {a.channels * a.per_channel / base:10,.0f} prog/s")
+    for w in [int(x) for x in a.workers.split(',')]:
+        t = time.perf_counter()
+        got, chunks = parallel(path, wanted, w, int(a.chunk_mb * 1048576))
+        el = time.perf_counter() - t
+        assert got == ref, f"workers={w}: result differs from serial parse"
+        print(f"workers {w}:  {el:6.2f} s  {a.channels * a.per_channel / el:10,.0f} prog/s  x{base / el:.2f}  ({chunks} chunks)")
+    os.remove(path); os.rmdir(tmp)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# Przepustowość (programy/s) i szczytowe RSS backendów XMLTV przy częściowym mapowaniu, na feedach
+# 10k / 100k / 1M programów (1M: generowanie i pomiar trwają kilka minut).
+# Uruchom z katalogu repo: python3 tools/bench_parser.py [--sizes 10000,100000,1000000 --mapped 0.05]
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PER_CHANNEL = 100
+
+def run_one(path, backend, mapped):
+    # Wykonywane w osobnym procesie, żeby ru_maxrss dotyczył tylko tego czytnika
+    from src.xmltvstream import READERS, open_source, select_backend, _selected
+    def resolve(channels):
+        step = max(1, int(round(1 / mapped))) if mapped > 0 else 0
+        return {c[0] for i, c in enumerate(channels) if step and i % step == 0}
+    name = select_backend(backend)
+    h = hashlib.sha1()
+    t = time.perf_counter()
+    with open_source(path) as f:
+        reader = READERS[name](f)
+        for prog in reader.programmes(resolve): h.update(repr(prog).encode('utf-8'))
+    elapsed = time.perf_counter() - t
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'backend': backend if backend == name else f"{backend}->{name}", 'seen': reader.seen, 'kept': reader.kept,
+                      'seconds': elapsed, 'prog_per_s': reader.seen / max(elapsed, 1e-9), 'peak_rss_mb': rss_kb / 1024.0,
+                      'digest': h.hexdigest(), 'calibration': [[round(s, 4), n] for s, n in _selected.get('timings', [])]}))
+
+def main():
+    from src.xmltvstream import READERS
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', default='10000,100000,1000000', help='liczby programów w feedach')
+    ap.add_argument('--mapped', type=float, default=0.05, help='udział zmapowanych kanałów')
+    ap.add_argument('--backends', default=','.join(list(READERS) + ['auto']))
+    ap.add_argument('--json', help='zapis wyników do pliku JSON')
+    ap.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.child:
+        run_one(a.child[0], a.child[1], a.mapped); return
+
+    from xmltvgen import write_feed
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(x) for x in a.sizes.split(',')]:
+            path = os.path.join(tmp, f'feed_{size}.xml.gz')
+            channels = max(1, size // PER_CHANNEL)
+            write_feed(path, channels, PER_CHANNEL)
+            print(f"feed: {channels * PER_CHANNEL} programmes ({channels} channels), {os.path.getsize(path) / 1e6:.1f} MB gz, mapped {a.mapped:.0%}")
+            digests = set()
+            for backend in a.backends.split(','):
+                out = subprocess.run([sys.executable, __file__, '--mapped', str(a.mapped), '--child', path, backend],
+                                     capture_output=True, text=True, check=True).stdout
+                r = json.loads(out)
+                r['programmes'] = channels * PER_CHANNEL
+                digests.add(r['digest']); results.append(r)
+                print(f"{r['backend']:>14}: {r['prog_per_s']:>10,.0f} prog/s  {r['seconds']:>7.2f} s  kept {r['kept']:>8}  peak RSS {r['peak_rss_mb']:.1f} MB")
+            if len(digests) != 1: print("  !! backends returned different programme tuples")
+    if a.json:
+        with open(a.json, 'w') as f: json.dump(results, f, indent=1)
+
+if __name__ == '__main__': main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Benchmark całego importu poza tunerem: syntetyczny feed + bukiety, zastępczy moduł enigma (tools/fake_enigma).
+# Etapy (każdy w osobnym procesie - osobne szczytowe RSS): mapowanie (zimne/z cache), parsowanie,
+# łączenie SAT, pełny import. Wynik: czasy, RSS i liczniki jako JSON do śledzenia regresji.
+# Uruchom z katalogu repo: python3 tools/bench_pipeline.py [--channels 1000 --per-channel 100 --services 3000 --json out.json]
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(TOOLS, '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, TOOLS)
+sys.path.insert(0, os.path.join(TOOLS, 'fake_enigma'))
+
+STAGES = ['map_cold', 'map_warm', 'parse', 'sat_link', 'import']
+
+def build_scenario(a, tmp):
+    # Feed, bukiety IPTV (nazwy z szumem "TVP1 FHD VIP") i SAT; zapis plików + opis scenariusza
+    from xmltvgen import write_feed, noisy
+    rnd = random.Random(a.seed)
+    feed = os.path.join(tmp, 'feed.xml' + ('.gz' if a.gz else ''))
+    start = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0) - datetime.timedelta(hours=2)
+    channels = write_feed(feed, a.channels, a.per_channel, seed=a.seed, start=start, tz="+0000")
+    iptv = []
+    for i in range(a.services):
+        if rnd.random() < a.match: name = noisy(channels[rnd.randrange(len(channels))][1], rnd)
+        else: name = f"Bench Unknown {i} {rnd.choice(['HD', 'VIP', ''])}".strip()
+        iptv.append((f"4097:0:1:{i:X}:0:0:0:0:0:0:http%3a//bench.local/{i}:{name}", name))
+    sat = []
+    for i in range(a.sat):
+        name = channels[(i * 7) % len(channels)][1] if a.sat_match > rnd.random() else f"Sat Only {i}"
+        sat.append((f"1:0:19:{i + 1:X}:1:1:C00000:0:0:0:", name))
+    bouquets = [("Bench SAT", sat)]
+    for b in range(0, len(iptv), a.bouquet_size):
+        bouquets.append((f"Bench IPTV {b // a.bouquet_size}", iptv[b:b + a.bouquet_size]))
+    # Pliki w tej samej kolejności co bukiety zastępczej enigmy (userbouquet.bench<i>.tv)
+    bq_dir = os.path.join(tmp, 'bouquets'); os.makedirs(bq_dir)
+    with open(os.path.join(bq_dir, 'bouquets.tv'), 'w') as root:
+        root.write("#NAME User - bouquets (TV)\n")
+        for i, (bname, services) in enumerate(bouquets):
+            root.write(f'#SERVICE 1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "userbouquet.bench{i}.tv" ORDER BY bouquet\n')
+            with open(os.path.join(bq_dir, f"userbouquet.bench{i}.tv"), 'w') as f:
+                f.write(f"#NAME {bname}\n")
+                for ref, name in services: f.write(f"#SERVICE {ref}\n#DESCRIPTION {name}\n")
+    return {'feed': feed, 'bouquets': bouquets, 'bouquets_path': bq_dir + '/', 'cache_file': os.path.join(tmp, 'map.cache.json'),
+            'sat_events': a.sat_events, 'backend': a.backend, 'workers': a.workers, 'budget': a.budget}
+
+def run_stage(stage, scenario_path):
+    import enigma
+    with open(scenario_path) as f: sc = json.load(f)
+    enigma.configure(bouquets=[(n, [tuple(s) for s in svc]) for n, svc in sc['bouquets']], sat_events=sc['sat_events'])
+    from src.automapper import AutoMapper, read_xmltv_channels
+    from src.epgcore import EPGParser, EPGInjector, epg_window, inject_sat_clone_by_name, pump_batches
+    from src.servicecatalog import CATALOGUE_NAME, load_catalogue
+    window = epg_window(3, 7)
+    def mapper():
+        m = AutoMapper(cache_file=sc['cache_file']); m.bouquets_path = sc['bouquets_path']
+        return m
+    out = {'stage': stage}
+    if stage == 'map_cold':
+        for path in (sc['cache_file'], os.path.join(sc['bouquets_path'], CATALOGUE_NAME)):
+            try: os.remove(path)
+            except OSError: pass
+    if stage in ('map_cold', 'map_warm'):
+        t = time.perf_counter()
+        mapping = mapper().map_channels(read_xmltv_channels(sc['feed']))
+        out['seconds'] = time.perf_counter() - t
+        out['mapped_services'] = sum(len(v) for v in mapping.values()); out['mapped_channels'] = len(mapping)
+    elif stage == 'parse':
+        mapping = mapper().map_channels(read_xmltv_channels(sc['feed']))
+        parser = EPGParser(sc['feed'], backend=sc['backend'], window=window, workers=sc['workers'])
+        t = time.perf_counter()
+        events = sum(len(ev) for _, _, ev in parser.load_batches(mapping))
+        out['seconds'] = time.perf_counter() - t
+        out.update(backend=parser.backend, programmes=parser.seen, kept=parser.kept, dropped=parser.dropped, events=events)
+    elif stage == 'sat_link':
+        injector = EPGInjector(max_buffered=sc['budget'])
+        t = time.perf_counter()
+        cloned = inject_sat_clone_by_name(injector, window=window, catalogue=load_catalogue(sc['bouquets_path']))
+        out['seconds'] = time.perf_counter() - t
+        out['cloned_services'] = len(cloned)
+    elif stage == 'import':
+        # Jak EPGWorker.run_import (tryb download): SAT, mapowanie z nagłówka w tym samym przebiegu, parser -> kolejka -> injector
+        injector = EPGInjector(max_buffered=sc['budget'])
+        t = time.perf_counter()
+        cloned = inject_sat_clone_by_name(injector, window=window, catalogue=load_catalogue(sc['bouquets_path']))
+        m = mapper()
+        parser = EPGParser(sc['feed'], backend=sc['backend'], window=window, workers=sc['workers'])
+        batches = parser.load_batches(lambda channels: m.map_channels(channels, exclude_refs=cloned))
+        count, queue_peak = pump_batches(batches, injector, max_events=sc['budget'], skip_refs=cloned)
+        out['seconds'] = time.perf_counter() - t
+        out.update(xml_events=count, cloned_services=len(cloned), queue_peak=queue_peak, injector_peak=injector.peak_buffered)
+    out['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    out['enigma'] = enigma.eEPGCache.getInstance().stats()
+    print(json.dumps(out))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--channels', type=int, default=1000)
+    ap.add_argument('--per-channel', type=int, default=100)
+    ap.add_argument('--services', type=int, default=3000, help='usług IPTV w bukietach')
+    ap.add_argument('--match', type=float, default=0.6, help='udział usług IPTV z kanałem w feedzie')
+    ap.add_argument('--sat', type=int, default=300, help='usług SAT')
+    ap.add_argument('--sat-match', type=float, default=0.5)
+    ap.add_argument('--sat-events', type=int, default=48)
+    ap.add_argument('--bouquet-size', type=int, default=500)
+    ap.add_argument('--gz', dest='gz', action='store_true', default=True)
+    ap.add_argument('--plain', dest='gz', action='store_false')
+    ap.add_argument('--backend', default='auto')
+    ap.add_argument('--workers', type=int, default=1)
+    ap.add_argument('--budget', type=int, default=50000)
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--stages', default=','.join(STAGES))
+    ap.add_argument('--json', help='plik wyników (domyślnie tylko podsumowanie na stdout)')
+    ap.add_argument('--stage', nargs=2, help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.stage:
+        run_stage(*a.stage); return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t = time.perf_counter()
+        sc = build_scenario(a, tmp)
+        sc_path = os.path.join(tmp, 'scenario.json')
+        with open(sc_path, 'w') as f: json.dump(sc, f)
+        print(f"scenario: {a.channels} ch x {a.per_channel} prog ({os.path.getsize(sc['feed']) / 1e6:.1f} MB{' gz' if a.gz else ''}), "
+              f"{a.services} IPTV / {a.sat} SAT services, built in {time.perf_counter() - t:.1f} s")
+        results = {}
+        for stage in a.stages.split(','):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--stage', stage, sc_path],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            results[stage] = r
+            extra = ', '.join(f"{k}={v}" for k, v in r.items() if k not in ('stage', 'seconds', 'peak_rss_mb', 'enigma'))
+            print(f"{stage:>9}: {r['seconds']:7.2f} s  peak RSS {r['peak_rss_mb']:6.1f} MB  {extra}")
+    report = {'time': int(time.time()), 'python': platform.python_version(), 'machine': platform.machine(),
+              'args': {k: v for k, v in vars(a).items() if k not in ('stage', 'json')}, 'stages': results}
+    if a.json:
+        with open(a.json, 'w') as f: json.dump(report, f, indent=1)
+        print(f"written {a.json}")
+
+if __name__ == '__main__': main()
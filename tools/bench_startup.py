@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Koszt załadowania plugin.py przy starcie GUI (import modułu + StartSession) poza tunerem.
+# Moduły GUI enigmy (Plugins, Screens, Components, twisted) są zastępowane atrapami (fake_enigma/fake_gui) w procesie potomnym,
+# każdy pomiar w świeżym interpreterze; -X importtime daje listę najdroższych modułów.
+# Porównanie z inną wersją: python3 tools/bench_startup.py --ref HEAD~1 [--runs 9 --top 12]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import io
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(TOOLS, '..'))
+HEAVY = ['xml.etree.ElementTree', 'xml.parsers.expat', 'gzip', 'ssl', 'urllib.request', 'subprocess', 'enigma', 'src.epgcore', 'src.automapper']
+
+CHILD = r'''
+import sys, time, json
+sys.path.insert(0, sys.argv[1]); sys.path.insert(0, sys.argv[2])
+import fake_gui
+reactor = fake_gui.Reactor()
+sys.modules.update(fake_gui.modules(reactor))
+calls = reactor.calls
+before = set(sys.modules)
+t = time.perf_counter()
+import src.plugin as plugin
+t_import = time.perf_counter() - t
+t = time.perf_counter()
+for d in plugin.Plugins(): pass
+plugin.write_log = lambda msg: None
+plugin.StartSession()
+t_session = time.perf_counter() - t
+loaded = set(sys.modules) - before
+print(json.dumps({'import_ms': t_import * 1000, 'session_ms': t_session * 1000, 'modules': len(loaded),
+                  'heavy': sorted(m for m in sys.argv[3].split(',') if m in loaded), 'timers': calls}))
+'''
+
+def export_ref(ref, dest):
+    # Drzewo src/ z podanej rewizji gita do katalogu tymczasowego
+    data = subprocess.run(['git', '-C', ROOT, 'archive', ref, 'src'], capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar: tar.extractall(dest)
+    return dest
+
+def importtime(root):
+    # Czas skumulowany modułów importowanych bezpośrednio przez src.plugin (poziom 1 drzewa -X importtime)
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, root, os.path.join(TOOLS, 'fake_enigma'), ''],
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:'): continue
+        try: _, cumul, name = line[12:].split('|'); rows.append((int(cumul), len(name) - len(name.lstrip()) - 1, name.strip()))
+        except ValueError: continue
+    end = next((i for i, (_, level, n) in enumerate(rows) if n == 'src.plugin' and level == 0), None)
+    if end is None: return []
+    start = end
+    while start > 0 and rows[start - 1][1] > 0: start -= 1
+    return sorted(((c, n) for c, level, n in rows[start:end] if level == 2), reverse=True)
+
+def measure(root, runs):
+    out = []
+    for _ in range(runs):
+        res = subprocess.run([sys.executable, '-c', CHILD, root, os.path.join(TOOLS, 'fake_enigma'), ','.join(HEAVY)],
+                             capture_output=True, text=True)
+        if res.returncode: sys.exit(f"{root}: plugin import failed\n{res.stderr}")
+        out.append(json.loads(res.stdout.strip().splitlines()[-1]))
+    return {'import_ms': statistics.median(r['import_ms'] for r in out), 'session_ms': statistics.median(r['session_ms'] for r in out),
+            'modules': out[-1]['modules'], 'heavy': out[-1]['heavy'], 'timers': out[-1]['timers']}
+
+def report(label, r, top):
+    print(f"{label:>10}: import {r['import_ms']:7.1f} ms  StartSession {r['session_ms']:5.2f} ms  new modules {r['modules']:4}  "
+          f"timers {r['timers']}")
+    print(f"{'':>10}  heavy: {', '.join(r['heavy']) or '-'}")
+    for us, name in top: print(f"{'':>12}{us / 1000.0:7.1f} ms  {name}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--ref', help='rewizja gita do porównania (np. HEAD~1)')
+    ap.add_argument('--runs', type=int, default=9, help='pomiarów na wersję (mediana)')
+    ap.add_argument('--top', type=int, default=10, help='najdroższych importów z -X importtime')
+    ap.add_argument('--json', help='zapis wyników do pliku JSON')
+    a = ap.parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        trees = [('current', ROOT)]
+        if a.ref: trees.insert(0, (a.ref, export_ref(a.ref, tmp)))
+        for label, root in trees:
+            r = measure(root, a.runs)
+            top = importtime(root)[:a.top]
+            r['top'] = [[n, us] for us, n in top]
+            results[label] = r
+            report(label, r, top)
+    if a.ref:
+        old, new = results[a.ref], results['current']
+        print(f"import: {old['import_ms']:.1f} -> {new['import_ms']:.1f} ms (x{old['import_ms'] / max(new['import_ms'], 1e-6):.1f}), "
+              f"modules {old['modules']} -> {new['modules']}")
+    if a.json:
+        with open(a.json, 'w') as f: json.dump(results, f, indent=1)
+
+if __name__ == '__main__': main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Magazyn EPG: rozmiar zapisu i czas odtworzenia w porównaniu z parsowaniem XML (.xml.gz)
+# Uruchom z katalogu repo: python3 tools/bench_store.py [--channels 1000 --per-channel 150]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from xmltvgen import write_feed
+from src.xmltvstream import ExpatReader, open_source
+from src.xmltvtime import parse_xmltv_time, clear_cache
+from src.epgstore import EPGStoreWriter, EPGStore
+
+def parse_xml(path, refs_for):
+    # To samo, co EPGParser.load_batches (bez okna): bloki kanałów z krotkami zdarzeń
+    groups = []
+    cur = None; batch = []
+    with open_source(path) as f:
+        for chid, start, stop, title, desc in ExpatReader(f).programmes(lambda channels: refs_for):
+            if chid != cur:
+                if batch: groups.append((refs_for[cur], batch))
+                cur = chid; batch = []
+            s = parse_xmltv_time(start); e = parse_xmltv_time(stop)
+            batch.append((s, e - s, title[:240], desc[:1024]))
+    if batch: groups.append((refs_for[cur], batch))
+    return groups
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--channels', type=int, default=1000)
+    ap.add_argument('--per-channel', type=int, default=150)
+    ap.add_argument('--refs-per-channel', type=int, default=2)
+    a = ap.parse_args()
+    tmp = tempfile.mkdtemp()
+    feed = os.path.join(tmp, 'feed.xml.gz')
+    store_path = os.path.join(tmp, 'epg.store')
+    channels = write_feed(feed, a.channels, a.per_channel)
+    refs_for = {cid: [f"4097:0:1:{i:X}:{k}:0:0:0:0:0:http%3a//x/{i}/{k}:" for k in range(a.refs_per_channel)]
+                for i, (cid, _) in enumerate(channels)}
+
+    clear_cache()
+    t = time.perf_counter()
+    groups = parse_xml(feed, refs_for)
+    t_xml = time.perf_counter() - t
+    n_events = sum(len(ev) for _, ev in groups)
+
+    t = time.perf_counter()
+    w = EPGStoreWriter(store_path)
+    for refs, events in groups: w.add(refs, events)
+    w.close()
+    t_write = time.perf_counter() - t
+
+    t = time.perf_counter()
+    n = 0
+    with EPGStore(store_path) as store:
+        for refs, events in store.iter_groups(): n += len(events)
+    t_reload = time.perf_counter() - t
+    assert n == n_events
+
+    with EPGStore(store_path) as store:
+        back = list(store.iter_groups())
+    assert back == [(list(r), e) for r, e in groups], "round trip mismatch"
+
+    print(f"events: {n_events} ({a.channels} channels)")
+    print(f"feed .xml.gz: {os.path.getsize(feed) / 1e6:.2f} MB, store: {os.path.getsize(store_path) / 1e6:.2f} MB")
+    print(f"xml parse:    {t_xml:.2f} s ({n_events / t_xml:,.0f} ev/s)")
+    print(f"store write:  {t_write:.2f} s")
+    print(f"store reload: {t_reload:.2f} s ({n_events / t_reload:,.0f} ev/s, x{t_xml / t_reload:.1f} vs xml)")
+    for name in os.listdir(tmp): os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Pobieranie + parsowanie: "najpierw cały plik" vs strumień (FeedStream) na lokalnym serwerze HTTP
+# z ograniczonym pasmem. Sprawdza też kopię (tee) i identyczność wyników.
+# Uruchom z katalogu repo: python3 tools/bench_stream.py [--channels 1000 --per-channel 100 --kbps 4000]
+import argparse
+import filecmp
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.httpstream import FeedStream, open_url
+from src.xmltvstream import ExpatReader, open_source
+from xmltvgen import write_feed
+
+def serve(directory, kbps):
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *a, **kw): super().__init__(*a, directory=directory, **kw)
+        def log_message(self, *a): pass
+        def copyfile(self, source, outputfile):
+            # Symulacja łącza: paczki 16 KB w tempie kbps
+            step = 16 * 1024
+            while True:
+                buf = source.read(step)
+                if not buf: break
+                outputfile.write(buf)
+                time.sleep(step / (kbps * 128.0))
+    srv = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def parse(f):
+    r = ExpatReader(f)
+    out = [p for p in r.programmes(lambda channels: {c[0] for c in channels[::10]})]
+    return out, r.seen
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--channels', type=int, default=1000)
+    ap.add_argument('--per-channel', type=int, default=100)
+    ap.add_argument('--kbps', type=int, default=4000, help='przepustowość serwera (kbit/s)')
+    a = ap.parse_args()
+    tmp = tempfile.mkdtemp()
+    try:
+        write_feed(os.path.join(tmp, 'feed.xml.gz'), a.channels, a.per_channel)
+        srv = serve(tmp, a.kbps)
+        url = f"http://127.0.0.1:{srv.server_address[1]}/feed.xml.gz"
+        print(f"feed {os.path.getsize(os.path.join(tmp, 'feed.xml.gz')) / 1e6:.1f} MB gz @ {a.kbps} kbit/s")
+
+        t = time.perf_counter()
+        local = os.path.join(tmp, 'download.xml.gz')
+        with open_url(url) as res, open(local, 'wb') as f: shutil.copyfileobj(res, f)
+        t_dl = time.perf_counter() - t
+        with open_source(local) as f: ref, seen = parse(f)
+        t_total = time.perf_counter() - t
+        print(f"download then parse: {t_total:6.2f} s (download {t_dl:.2f} s, parse {t_total - t_dl:.2f} s)")
+
+        t = time.perf_counter()
+        tee = os.path.join(tmp, 'tee.xml.gz')
+        with FeedStream.from_url(url, tee_path=tee) as f: got, seen2 = parse(f)
+        t_stream = time.perf_counter() - t
+        print(f"streamed parse     : {t_stream:6.2f} s ({t_total / max(t_stream, 1e-9):.2f}x)")
+
+        assert got == ref and seen == seen2, "stream result differs"
+        assert filecmp.cmp(tee, os.path.join(tmp, 'feed.xml.gz'), shallow=False), "tee copy differs"
+        print(f"results identical ({len(got)} programmes kept of {seen}), tee copy identical")
+        srv.shutdown()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == '__main__': main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Opóźnienie pętli GUI w czasie importu w tle: bez dławienia ("off") i w trybach throttle.
+# Reaktor zastępczy (wątek z timerami jak twisted) rysuje "klatki" GUI (--frame-ms co --gui-ms pracy Pythona)
+# i mierzy spóźnienie własnego timera (ReactorProbe); import jak w bench_pipeline (stage "import").
+# Każdy tryb w osobnym procesie; "idle" = sam reaktor bez importu (punkt odniesienia).
+# Uruchom z katalogu repo: python3 tools/bench_throttle.py [--modes idle,off,light,normal,strong --channels 600]
+import argparse
+import heapq
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS, '..'))
+sys.path.insert(0, TOOLS)
+sys.path.insert(0, os.path.join(TOOLS, 'fake_enigma'))
+
+IDLE_SECONDS = 5
+
+class FakeReactor:
+    # Jeden wątek, kolejka timerów; callFromThread = callLater(0)
+    def __init__(self):
+        self.timers = []; self.seq = 0
+        self.lock = threading.Lock(); self.wake = threading.Event()
+        self.running = True
+
+    def callLater(self, delay, fn, *args):
+        with self.lock:
+            heapq.heappush(self.timers, (time.monotonic() + delay, self.seq, fn, args)); self.seq += 1
+        self.wake.set()
+
+    def callFromThread(self, fn, *args): self.callLater(0, fn, *args)
+
+    def run(self):
+        while self.running:
+            with self.lock: due = self.timers[0][0] if self.timers else None
+            now = time.monotonic()
+            if due is None or due > now:
+                self.wake.wait(None if due is None else due - now); self.wake.clear()
+                continue
+            with self.lock: _, _, fn, args = heapq.heappop(self.timers)
+            fn(*args)
+
+    def stop(self):
+        self.running = False; self.wake.set()
+
+def gui_frames(reactor, frame_s, work_s):
+    # Praca GUI w wątku reaktora (rysowanie, obsługa klawiszy) - trzyma GIL jak prawdziwe callbacki
+    def frame():
+        end = time.perf_counter() + work_s
+        while time.perf_counter() < end: pass
+        reactor.callLater(frame_s, frame)
+    reactor.callLater(frame_s, frame)
+
+def run_mode(mode, scenario_path, frame_ms, gui_ms):
+    import enigma
+    from src.throttle import ReactorProbe, Throttle
+    with open(scenario_path) as f: sc = json.load(f)
+    enigma.configure(bouquets=[(n, [tuple(s) for s in svc]) for n, svc in sc['bouquets']], sat_events=sc['sat_events'], import_us=sc['import_us'])
+    reactor = FakeReactor()
+    threading.Thread(target=reactor.run, daemon=True).start()
+    gui_frames(reactor, frame_ms / 1000.0, gui_ms / 1000.0)
+    probe = ReactorProbe(reactor, interval=0.02)
+    probe.start()
+    out = {'mode': mode}
+    t = time.perf_counter()
+    if mode == 'idle':
+        time.sleep(IDLE_SECONDS)
+    else:
+        from src.automapper import AutoMapper
+        from src.epgcore import EPGParser, EPGInjector, epg_window, inject_sat_clone_by_name, pump_batches
+        from src.servicecatalog import load_catalogue
+        throttle = Throttle(mode, probe) if mode != 'off' else None
+        if throttle: throttle.enter_thread()
+        window = epg_window(3, 7)
+        # Jak EPGWorker.new_injector: przy dławieniu budżet importEvents = cel opóźnienia GUI
+        injector = EPGInjector(max_buffered=sc['budget'], latency_budget=min(0.05, throttle.target / 1000.0) if throttle else 0.05)
+        injector.throttle = throttle
+        cloned = inject_sat_clone_by_name(injector, window=window, catalogue=load_catalogue(sc['bouquets_path']))
+        m = AutoMapper(cache_file=sc['cache_file']); m.bouquets_path = sc['bouquets_path']
+        parser = EPGParser(sc['feed'], backend=sc['backend'], window=window)
+        batches = parser.load_batches(lambda channels: m.map_channels(channels, exclude_refs=cloned))
+        count, _ = pump_batches(throttle.paced(batches) if throttle else batches, injector, max_events=sc['budget'], skip_refs=cloned)
+        out['events'] = count
+        if throttle: out['throttle'] = throttle.stats()
+    out['seconds'] = time.perf_counter() - t
+    probe.stop(); reactor.stop()
+    out['lag_ms'] = probe.report()
+    print(json.dumps(out))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--modes', default='idle,off,light,normal,strong')
+    ap.add_argument('--channels', type=int, default=2000)
+    ap.add_argument('--per-channel', type=int, default=100)
+    ap.add_argument('--services', type=int, default=1500)
+    ap.add_argument('--sat', type=int, default=200)
+    ap.add_argument('--frame-ms', type=float, default=40, help='odstęp klatek GUI')
+    ap.add_argument('--gui-ms', type=float, default=2, help='praca Pythona na klatkę GUI')
+    ap.add_argument('--import-us', type=float, default=10, help='koszt importEvents na zdarzenie x usługę (z GIL)')
+    ap.add_argument('--json', help='zapis wyników do pliku JSON')
+    ap.add_argument('--mode', nargs=2, help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.mode:
+        run_mode(a.mode[0], a.mode[1], a.frame_ms, a.gui_ms); return
+
+    from bench_pipeline import build_scenario
+    scenario_args = argparse.Namespace(channels=a.channels, per_channel=a.per_channel, services=a.services, match=0.6, sat=a.sat,
+                                       sat_match=0.5, sat_events=48, bouquet_size=500, gz=True, backend='auto', workers=1,
+                                       budget=50000, seed=1)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        sc = build_scenario(scenario_args, tmp)
+        sc['import_us'] = a.import_us
+        sc_path = os.path.join(tmp, 'scenario.json')
+        with open(sc_path, 'w') as f: json.dump(sc, f)
+        print(f"feed {a.channels} ch x {a.per_channel} prog, {a.services} IPTV services, importEvents {a.import_us:g} us/event; "
+              f"GUI frame {a.gui_ms:g} ms every {a.frame_ms:g} ms")
+        for mode in a.modes.split(','):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--frame-ms', str(a.frame_ms), '--gui-ms', str(a.gui_ms),
+                                  '--mode', mode, sc_path], capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            results.append(r)
+            lag = r['lag_ms']
+            th = r.get('throttle')
+            print(f"{mode:>7}: {r['seconds']:6.2f} s  lag p50 {lag.get('p50', 0):6.1f}  p95 {lag.get('p95', 0):6.1f}  p99 {lag.get('p99', 0):6.1f}  "
+                  f"max {lag.get('max', 0):6.1f} ms" + (f"  ({th['yields']} yields, slept {th['slept_s']} s, slice {th['slice_ms']} ms)" if th else ""))
+    if a.json:
+        with open(a.json, 'w') as f: json.dump(results, f, indent=1)
+
+if __name__ == '__main__': main()
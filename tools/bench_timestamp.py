@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# Benchmark dekodera dat XMLTV (xmltvtime.parse_xmltv_time); poprawność (strefy, DST): tests/test_xmltvtime.py
+# Uruchom z katalogu repo: python3 tools/bench_timestamp.py
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src import xmltvtime
+
+COUNT = 200000
+
+def legacy(value):
+    # Dawny EPGParser.parse_timestamp (czas lokalny, strefa ignorowana)
+    try: return int(datetime.datetime.strptime(value[:14], "%Y%m%d%H%M%S").timestamp())
+    except: return 0
+
+def reference(value):
+    # Wzorzec: datetime z pełną obsługą strefy
+    return int(datetime.datetime.strptime(value, "%Y%m%d%H%M%S %z").timestamp())
+
+def local_strings(zone, start, hours, step_min):
+    # Kolejne momenty zapisane jako czas lokalny strefy + jej offset (jak w feedach)
+    out = []
+    t = start
+    for _ in range(hours * 60 // step_min):
+        local = datetime.datetime.fromtimestamp(t, zone)
+        out.append((t, local.strftime("%Y%m%d%H%M%S %z")))
+        t += step_min * 60
+    return out
+
+def make_values(count, rnd):
+    # Realistycznie: starty na pełnych 5 minutach w ciągu 8 dni, mało unikalnych wartości
+    base = datetime.datetime(2026, 10, 18)
+    out = []
+    for _ in range(count):
+        t = base + datetime.timedelta(minutes=5 * rnd.randint(0, 8 * 288))
+        out.append(t.strftime("%Y%m%d%H%M%S") + " +0200")
+    return out
+
+def rate(fn, values):
+    t = time.perf_counter()
+    for v in values: fn(v)
+    return len(values) / (time.perf_counter() - t)
+
+def main():
+    values = make_values(COUNT, random.Random(3))
+    unique = sorted(set(values))
+    print(f"legacy strptime      : {rate(legacy, values):>12,.0f} ts/s")
+    xmltvtime.clear_cache()
+    print(f"fast (unique, cold)  : {rate(xmltvtime.parse_xmltv_time.__wrapped__, unique):>12,.0f} ts/s")
+    xmltvtime.clear_cache()
+    print(f"fast (memoized feed) : {rate(xmltvtime.parse_xmltv_time, values):>12,.0f} ts/s")
+
+if __name__ == '__main__': main()
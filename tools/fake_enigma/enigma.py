@@ -0,0 +1,102 @@
+# Zastępczy moduł "enigma" do benchmarków poza tunerem (katalog dodawany do sys.path przez narzędzia).
+# Symuluje bukiety (eServiceCenter.list / getContent) i cache EPG (importEvents / lookupEvent),
+# rejestrując wywołania. Konfiguracja: enigma.configure(bouquets=..., sat_events=...).
+import threading
+import time
+
+STATE = {
+    'bouquets': [],          # [(nazwa bukietu, [(ref, nazwa usługi)])]
+    'sat_events': 24,        # zdarzeń zwracanych przez lookupEvent na usługę SAT
+    'keep_events': False,    # importEvents: True = trzymaj zdarzenia (pamięć!), False = tylko liczniki
+    'import_us': 0,          # importEvents: µs pracy na zdarzenie x usługę z trzymanym GIL (jak wywołanie C++)
+}
+ROOT_REF = '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.tv" ORDER BY bouquet'
+
+def configure(**kwargs):
+    STATE.update(kwargs)
+    eEPGCache.instance = None
+
+_rate = []
+def hold_gil(us):
+    # Pętla w C (sum po range) nie oddaje GIL - tak blokuje pozostałe wątki prawdziwe importEvents
+    if not _rate:
+        t = time.perf_counter(); sum(range(200000)); _rate.append(200000 / max((time.perf_counter() - t) * 1e6, 1e-3))
+    sum(range(int(us * _rate[0])))
+
+def bouquet_ref(index): return f'1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "userbouquet.bench{index}.tv" ORDER BY bouquet'
+
+class eServiceReference:
+    def __init__(self, ref): self.ref = ref
+    def toString(self): return self.ref
+
+class _List:
+    def __init__(self, rows): self.rows = rows
+    def getContent(self, fmt, sorted=False):
+        # Tylko "S" (ref) i "N" (nazwa) - tyle używa wtyczka
+        return [tuple(ref if c == 'S' else name for c in fmt) for ref, name in self.rows]
+
+class eServiceCenter:
+    instance = None
+    @classmethod
+    def getInstance(cls):
+        if cls.instance is None: cls.instance = cls()
+        return cls.instance
+    def list(self, ref):
+        ref = ref.ref if isinstance(ref, eServiceReference) else ref
+        if ref == ROOT_REF:
+            return _List([(bouquet_ref(i), name) for i, (name, _) in enumerate(STATE['bouquets'])])
+        for i, (name, services) in enumerate(STATE['bouquets']):
+            if ref == bouquet_ref(i): return _List(services)
+        return None
+
+class eEPGCache:
+    instance = None
+    @classmethod
+    def getInstance(cls):
+        if cls.instance is None: cls.instance = cls()
+        return cls.instance
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.import_calls = 0
+        self.imported_events = 0      # zdarzenia x usługi
+        self.imported_refs = set()
+        self.lookup_calls = 0
+        self.lookup_services = 0
+        self.events = {}
+
+    def importEvents(self, refs, events):
+        # Jak enigma2: pojedynczy ref (str) albo krotka refów dla jednej listy zdarzeń
+        if isinstance(refs, str): refs = (refs,)
+        events = list(events)
+        if STATE['import_us']: hold_gil(STATE['import_us'] * len(events) * len(refs))
+        with self.lock:
+            self.import_calls += 1
+            self.imported_events += len(events) * len(refs)
+            self.imported_refs.update(refs)
+            if STATE['keep_events']:
+                for r in refs: self.events.setdefault(r, []).extend(events)
+
+    def lookupEvent(self, query):
+        # [format, (ref, typ, start, minuty), ...] -> wiersze wg liter formatu (R B D T S E I)
+        fmt = query[0]
+        out = []
+        with self.lock:
+            self.lookup_calls += 1
+            self.lookup_services += len(query) - 1
+        for ref, _, start, minutes in query[1:]:
+            if STATE['keep_events'] and ref in self.events:
+                rows = [(start_, dur, title, short, desc, i) for i, (start_, dur, title, short, desc, _) in enumerate(self.events[ref])]
+            elif ref.startswith('1:0:'):
+                step = max(1, minutes * 60 // max(1, STATE['sat_events']))
+                rows = [(start + k * step, step, f"SAT {ref[-6:]} {k}", "short", "Extended description", k) for k in range(STATE['sat_events'])]
+            else:
+                rows = []
+            for b, d, t, s, e, i in rows:
+                row = {'R': ref, 'B': b, 'D': d, 'T': t, 'S': s, 'E': e, 'I': i}
+                out.append(tuple(row.get(c) for c in fmt))
+        return out
+
+    def stats(self):
+        return {'import_calls': self.import_calls, 'imported_events': self.imported_events, 'imported_refs': len(self.imported_refs),
+                'lookup_calls': self.lookup_calls, 'lookup_services': self.lookup_services}
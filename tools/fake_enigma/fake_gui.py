@@ -0,0 +1,52 @@
+# Atrapy modułów GUI enigmy (Plugins, Screens, Components, twisted) - plugin.py importowany poza tunerem.
+# modules() zwraca słownik nazwa -> moduł do podstawienia w sys.modules (np. mock.patch.dict w testach);
+# config przyjmuje dowolne atrybuty, ConfigXxx(default=...) daje obiekt z .value = default.
+import types
+
+class _Any:
+    def __init__(self, *a, **k): self.value = k.get('default')
+    def __getattr__(self, name):
+        v = _Any(); setattr(self, name, v); return v
+    def __call__(self, *a, **k): return _Any()
+    def save(self): pass
+
+class Reactor:
+    # Timery tylko zapisywane (opóźnienia w calls), nic nie jest wywoływane
+    def __init__(self): self.calls = []
+    def callLater(self, delay, fn, *a): self.calls.append(delay)
+    def callFromThread(self, fn, *a): pass
+
+class Language:
+    def getLanguage(self): return "en_GB"
+
+class Descriptor(_Any):
+    WHERE_PLUGINMENU = 1; WHERE_SESSIONSTART = 2
+
+class Box(_Any):
+    TYPE_YESNO = 0; TYPE_INFO = 1; TYPE_ERROR = 3
+
+class Screen: pass
+class ConfigListScreen: pass
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name); mod.__dict__.update(attrs)
+    return mod
+
+def modules(reactor=None):
+    reactor = reactor or Reactor()
+    mods = {name: _module(name) for name in ('Plugins', 'Screens', 'Components', 'twisted', 'twisted.web')}
+    mods['twisted.internet'] = _module('twisted.internet', reactor=reactor)
+    mods['twisted.internet.reactor'] = _module('twisted.internet.reactor')
+    mods['Plugins.Plugin'] = _module('Plugins.Plugin', PluginDescriptor=Descriptor)
+    mods['Screens.Screen'] = _module('Screens.Screen', Screen=Screen)
+    mods['Screens.MessageBox'] = _module('Screens.MessageBox', MessageBox=Box)
+    mods['Components.Label'] = _module('Components.Label', Label=_Any)
+    mods['Components.ActionMap'] = _module('Components.ActionMap', ActionMap=_Any)
+    mods['Components.ConfigList'] = _module('Components.ConfigList', ConfigListScreen=ConfigListScreen)
+    mods['Components.ScrollLabel'] = _module('Components.ScrollLabel', ScrollLabel=_Any)
+    mods['Components.Pixmap'] = _module('Components.Pixmap', Pixmap=_Any)
+    mods['Components.Language'] = _module('Components.Language', language=Language())
+    mods['Components.config'] = _module('Components.config', config=_Any(), ConfigSubsection=_Any, ConfigText=_Any,
+                                        ConfigSelection=_Any, ConfigYesNo=_Any, getConfigListEntry=_Any)
+    mods['twisted.web.client'] = _module('twisted.web.client', getPage=_Any())
+    return mods
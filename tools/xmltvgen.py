@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Generator syntetycznych feedów XMLTV do benchmarków
+# python3 tools/xmltvgen.py out.xml.gz --channels 500 --per-channel 200
+import argparse
+import datetime
+import gzip
+import random
+
+BASES = ['TVP', 'Polsat', 'TVN', 'Canal+', 'Eurosport', 'HBO', 'Discovery', 'BBC', 'Sky', 'ZDF', 'Rai', 'Nat Geo', 'Cartoon', 'Kino', 'Sport']
+NOISE = ['', ' HD', ' FHD', ' HEVC', ' VIP', ' 4K', ' RAW', ' (PL)', ' [PL]', ' BACKUP', ' H.265', ' UHD']
+CATEGORIES = ['News', 'Sport', 'Movie', 'Series', 'Kids', 'Documentary']
+
+def channel_names(count, seed=1):
+    # Unikalne nazwy kanałów w stylu "Polsat Sport 12"
+    rnd = random.Random(seed)
+    return [f"{rnd.choice(BASES)} {rnd.choice(['', 'Sport ', 'News ', 'Film ', 'Kids '])}{i}" for i in range(count)]
+
+def noisy(name, rnd):
+    # Nazwa jak na liście IPTV: "TVP1 FHD VIP"
+    return name + rnd.choice(NOISE) + rnd.choice(NOISE)
+
+def write_feed(path, channels=500, per_channel=200, seed=1, start=None, slot_minutes=30, tz="+0200", rich=True):
+    """Zapisuje feed (gz jeśli ścieżka kończy się na .gz). Zwraca listę (xml_id, display-name)."""
+    rnd = random.Random(seed)
+    names = channel_names(channels, seed)
+    ids = [(f"ch{i}.{rnd.choice(['pl', 'uk', 'de'])}", n) for i, n in enumerate(names)]
+    if start is None: start = datetime.datetime(2026, 10, 18)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv generator-info-name="xmltvgen">\n')
+        for xml_id, name in ids:
+            f.write(f'  <channel id="{xml_id}">\n    <display-name lang="pl">{name}</display-name>\n    <icon src="http://example.com/{xml_id}.png" />\n  </channel>\n')
+        fmt = "%Y%m%d%H%M%S " + tz
+        for xml_id, name in ids:
+            t = start
+            for j in range(per_channel):
+                stop = t + datetime.timedelta(minutes=slot_minutes)
+                f.write(f'  <programme start="{t.strftime(fmt)}" stop="{stop.strftime(fmt)}" channel="{xml_id}">\n')
+                f.write(f'    <title lang="pl">{name} &amp; programme {j}</title>\n')
+                f.write(f'    <desc lang="pl">Description of programme {j} on {name}. ' + 'Lorem ipsum dolor sit amet. ' * rnd.randint(1, 6) + '</desc>\n')
+                if rich:
+                    f.write(f'    <category lang="en">{rnd.choice(CATEGORIES)}</category>\n')
+                    f.write('    <credits><director>Jan Kowalski</director><actor>Anna Nowak</actor><actor>Piotr Zielinski</actor></credits>\n')
+                    f.write(f'    <icon src="http://example.com/p/{j}.jpg" />\n    <episode-num system="onscreen">S1 E{j}</episode-num>\n')
+                f.write('  </programme>\n')
+                t = stop
+        f.write('</tv>\n')
+    return ids
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('path')
+    ap.add_argument('--channels', type=int, default=500)
+    ap.add_argument('--per-channel', type=int, default=200)
+    ap.add_argument('--seed', type=int, default=1)
+    a = ap.parse_args()
+    write_feed(a.path, a.channels, a.per_channel, a.seed)
+
+if __name__ == '__main__': main()